@@ -3,14 +3,18 @@ from pams import events
 from pams import runners
 from pams import utils
 from pams.fundamentals import Fundamentals
+from pams.fundamentals import PrecomputedFundamentals
 from pams.index_market import IndexMarket
 from pams.market import Market
+from pams.market_statistics import MarketStatistics
 from pams.order import LIMIT_ORDER
 from pams.order import MARKET_ORDER
 from pams.order import Cancel
 from pams.order import Order
+from pams.order import OrderBatch
 from pams.order import OrderKind
 from pams.order_book import OrderBook
+from pams.order_book import PriceLevelOrderBook
 from pams.runners import Runner
 from pams.runners import SequentialRunner
 from pams.session import Session
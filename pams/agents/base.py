@@ -5,6 +5,7 @@ from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Union
 
 from ..logs.base import CancelLog
@@ -14,6 +15,7 @@ from ..logs.base import OrderLog
 from ..market import Market
 from ..order import Cancel
 from ..order import Order
+from ..order import OrderBatch
 from ..utils.json_random import JsonRandom
 
 
@@ -63,6 +65,9 @@ class Agent(ABC):
         self.prng: random.Random = prng
         self.simulator: "Simulator" = simulator  # type: ignore  # NOQA
         self.logger: Optional[Logger] = logger
+        # the longest lookback (in time steps) to refer fundamental prices in pams.fundamentals.Fundamentals.
+        # None means that the agent may refer any past fundamental price.
+        self.fundamental_lookback: Optional[int] = None
 
     def __repr__(self) -> str:
         return (
@@ -76,6 +81,8 @@ class Agent(ABC):
         Args:
             settings (Dict[str, Any]): agent configuration.  Usually, automatically set from json config of simulator.
                                        This must include the parameters "cashAmount" and "assetVolume".
+                                       This can include the parameter "fundamentalLookback", the longest lookback in time steps
+                                       to refer generated fundamental prices. Older fundamental prices can be dropped to bound memory.
             accessible_markets_ids (List[int]): list of market IDs.
 
         Returns:
@@ -88,7 +95,11 @@ class Agent(ABC):
         )
         if "assetVolume" not in settings:
             raise ValueError("cashAmount is required property of agent settings")
-
+        if "fundamentalLookback" in settings:
+            fundamental_lookback: int = settings["fundamentalLookback"]
+            if fundamental_lookback < 0:
+                raise ValueError("fundamentalLookback must be non-negative")
+            self.fundamental_lookback = fundamental_lookback
         for market_id in accessible_markets_ids:
             self.set_market_accessible(market_id=market_id)
             volume = int(
@@ -147,6 +158,17 @@ class Agent(ABC):
         """
         pass
 
+    def submitted_order_batch(self, batch: OrderBatch) -> None:
+        """call back when an order batch submission is accepted by a market.
+
+        Args:
+            batch (OrderBatch): order batch whose order IDs are set
+
+        Returns:
+            None
+        """
+        pass
+
     def executed_order(self, log: ExecutionLog) -> None:
         """call back when a submitted order is executed in a market.
 
@@ -210,17 +232,20 @@ class Agent(ABC):
         self.asset_volumes[market_id] = 0
 
     @abstractmethod
-    def submit_orders(self, markets: List[Market]) -> List[Union[Order, Cancel]]:
+    def submit_orders(
+        self, markets: List[Market]
+    ) -> Sequence[Union[Order, Cancel, OrderBatch]]:
         """submit orders (abstract method). This method automatically called from runners.
 
         This method is called only when this agent has a chance to submit orders.
         Therefore, it is not guaranteed that this method is called at all the step of simulation.
+        Many orders for a market can be submitted at once as an :class:`pams.order.OrderBatch`.
 
         Args:
             markets (List[Market]): markets to order.
 
         Returns:
-            List[Union[Order, Cancel]]: order list.
+            Sequence[Union[Order, Cancel, OrderBatch]]: order list.
 
         Note:
             You should implement this method if you inherit this agent.
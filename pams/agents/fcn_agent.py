@@ -142,15 +142,10 @@ class FCNAgent(Agent):
         assert self.noise_weight >= 0.0
 
         fundamental_scale: float = 1.0 / max(self.mean_reversion_time, 1)
-        fundamental_log_return = fundamental_scale * math.log(
-            market.get_fundamental_price() / market.get_market_price()
-        )
+        fundamental_log_return = fundamental_scale * market.stats.fundamental_gap()
         assert self.is_finite(fundamental_log_return)
 
-        chart_scale: float = 1.0 / max(time_window_size, 1)
-        chart_mean_log_return = chart_scale * math.log(
-            market.get_market_price() / market.get_market_price(time - time_window_size)
-        )
+        chart_mean_log_return = market.stats.mean_log_return(window=time_window_size)
         assert self.is_finite(chart_mean_log_return)
 
         noise_log_return: float = self.noise_scale * self.prng.gauss(mu=0.0, sigma=1.0)
@@ -45,5 +45,5 @@ class MarketShareFCNAgent(FCNAgent):
         """
         t: int = market.get_time()
         t_start: int = max(0, t - self.time_window_size)
-        volume: int = sum(market.get_executed_volumes(range(t_start, t + 1)))
+        volume: int = market.get_executed_volume_sum(start=t_start, end=t)
         return volume
@@ -1,15 +1,43 @@
+import os
 import random
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
 from typing import Dict
 from typing import Iterable
 from typing import List
+from typing import Optional
 from typing import Tuple
+from typing import Type
+from typing import cast
 
 import numpy as np
 from scipy.linalg import cholesky
 
+from .utils.memmap import extend_memmap
+from .utils.memmap import remap_memmap
+
+# shared memory blocks of precomputed prices start with the shape as two int64 values
+_SHARED_HEADER_SIZE: int = 16
+
 
 class Fundamentals:
-    """Fundamental generator for simulator."""
+    """Fundamental generator for simulator.
+
+    Generated prices of all markets are stored in a 2D array (markets x time steps) growing geometrically.
+    Pairwise correlations are factorized separately for each connected component of the correlation graph,
+    and markets can instead load on common factors (see :func:`pams.fundamentals.Fundamentals.set_factor_loadings`),
+    whose sampling cost is proportional to the number of markets times the number of factors.
+    The factorizations are cached until volatilities or correlations are changed.
+    Generated prices before :attr:`prices_offset` can be dropped to bound memory
+    (see :func:`pams.fundamentals.Fundamentals.drop_prices_before`).
+    The price at time step t of a market is stored at ``prices[market_id][t - prices_offset]``.
+    If a history directory is set, dropped prices are written to memory-mapped files and remain readable
+    (see :func:`pams.fundamentals.Fundamentals.set_history_directory`).
+    For variance reduction, the random numbers can be seeded independently of the simulation and negated
+    (see :func:`pams.fundamentals.Fundamentals.set_random_numbers`).
+    """
 
     def __init__(self, prng: random.Random) -> None:
         """initialize.
@@ -24,15 +52,71 @@ class Fundamentals:
         self._np_prng: np.random.Generator = np.random.default_rng(
             self._prng.randint(0, 2**31)
         )
+        self.antithetic: bool = False
         self.correlation: Dict[Tuple[int, int], float] = {}
+        self.factor_loadings: Dict[int, List[float]] = {}
         self.drifts: Dict[int, float] = {}
         self.volatilities: Dict[int, float] = {}
-        self.prices: Dict[int, List[float]] = {}
         self.market_ids: List[int] = []
         self.initials: Dict[int, float] = {}
         self.start_at: Dict[int, int] = {}
         self._generated_until: int = 0
         self._generate_chunk_size = 100
+        self.prices_offset: int = 0
+        self.history_directory: Optional[str] = None
+        # prices before prices_offset written to memory-mapped files
+        self._spilled_prices: Dict[int, np.ndarray] = {}
+        # generated prices whose rows are in the order of market_ids and whose column j is the time step prices_offset + j
+        self._prices: np.ndarray = np.empty((0, 0), dtype=np.float64)
+        self._market_rows: Dict[int, int] = {}
+        # factorizations of the correlations keyed by the target market IDs
+        self._cholesky_cache: Dict[Tuple[int, ...], _CorrelationStructure] = {}
+
+    @property
+    def prices(self) -> Dict[int, np.ndarray]:
+        """generated prices of each market from :attr:`prices_offset`.
+
+        Returns:
+            Dict[int, np.ndarray]: views of the generated prices keyed by market IDs.
+        """
+        return {
+            market_id: self._prices[row, : self._get_length(market_id=market_id)]
+            for market_id, row in self._market_rows.items()
+        }
+
+    def _get_length(self, market_id: int) -> int:
+        """get the number of prices of a market from :attr:`prices_offset`. (Internal method)
+
+        Args:
+            market_id (int): market ID.
+
+        Returns:
+            int: the number of prices.
+        """
+        return (
+            max(self._generated_until, self.start_at[market_id])
+            + 1
+            - self.prices_offset
+        )
+
+    def _reserve(self, length: int) -> None:
+        """reserve the prices array for the length from :attr:`prices_offset`. (Internal method)
+        The array grows geometrically so that the amortized cost per time step is constant.
+
+        Args:
+            length (int): length.
+
+        Returns:
+            None
+        """
+        capacity: int = self._prices.shape[1]
+        if capacity >= length:
+            return
+        prices: np.ndarray = np.full(
+            (self._prices.shape[0], max(length, 2 * capacity)), np.nan
+        )
+        prices[:, :capacity] = self._prices
+        self._prices = prices
 
     def add_market(
         self,
@@ -60,13 +144,25 @@ class Fundamentals:
             raise ValueError("volatility must be non-negative")
         if initial <= 0.0:
             raise ValueError("initial value must be positive")
+        self._check_dropped(time=start_at)
         self.market_ids.append(market_id)
         self.drifts[market_id] = drift
         self.volatilities[market_id] = volatility
         self.initials[market_id] = initial
         self.start_at[market_id] = start_at
-        self.prices[market_id] = [initial for _ in range(start_at + 1)]
+        self._market_rows[market_id] = len(self._market_rows)
+        prices: np.ndarray = np.full(
+            (
+                len(self.market_ids),
+                max(self._prices.shape[1], start_at + 1 - self.prices_offset),
+            ),
+            np.nan,
+        )
+        prices[:-1, : self._prices.shape[1]] = self._prices
+        prices[-1, : start_at + 1 - self.prices_offset] = initial
+        self._prices = prices
         self._generated_until = min(start_at, self._generated_until)
+        self._cholesky_cache = {}
 
     def remove_market(self, market_id: int) -> None:
         """remove a market from the list of markets whose fundamental prices are generated in this class.
@@ -82,7 +178,11 @@ class Fundamentals:
         self.volatilities.pop(market_id)
         self.initials.pop(market_id)
         self.start_at.pop(market_id)
-        self.prices.pop(market_id)
+        self.factor_loadings.pop(market_id, None)
+        self._prices = np.delete(self._prices, self._market_rows[market_id], axis=0)
+        self._market_rows = {x: i for i, x in enumerate(self.market_ids)}
+        self._spilled_prices.pop(market_id, None)
+        self._cholesky_cache = {}
 
     def change_volatility(
         self, market_id: int, volatility: float, time: int = 0
@@ -99,8 +199,10 @@ class Fundamentals:
         """
         if volatility < 0.0:
             raise ValueError("volatility must be non-negative")
+        self._check_dropped(time=time)
         self.volatilities[market_id] = volatility
-        self._generated_until = time
+        self._regenerate_from(time=time)
+        self._cholesky_cache = {}
 
     def change_drift(self, market_id: int, drift: float, time: int = 0) -> None:
         """change drift.
@@ -113,8 +215,35 @@ class Fundamentals:
         Returns:
             None
         """
+        self._check_dropped(time=time)
         self.drifts[market_id] = drift
-        self._generated_until = time
+        self._regenerate_from(time=time)
+
+    def rescale_prices(self, market_id: int, scale: float, time: int) -> None:
+        """rescale the fundamental prices of a market from the time step onward.
+
+        The generated path of the market from the time step is multiplied by the scale,
+        i.e., the log prices are shifted by :math:`\\log(scale)`.
+        Unlike changing settings, prices already generated are kept and no random numbers are drawn,
+        so that the cost is proportional to the number of prices generated ahead for the market.
+
+        Args:
+            market_id (int): market ID.
+            scale (float): scale.
+            time (int): the first time step to rescale.
+
+        Returns:
+            None
+        """
+        if scale <= 0.0:
+            raise ValueError("scale must be positive")
+        self._check_dropped(time=time)
+        while time >= self._generated_until:
+            self._generate_next()
+        self._prices[
+            self._market_rows[market_id],
+            time - self.prices_offset : self._get_length(market_id=market_id),
+        ] *= scale
 
     def set_correlation(
         self, market_id1: int, market_id2: int, corr: float, time: int = 0
@@ -134,11 +263,17 @@ class Fundamentals:
             raise ValueError("corr must be between 0.0 and 1.0")
         if market_id1 == market_id2:
             raise ValueError("market_id1 and market_id2 must be different")
+        if market_id1 in self.factor_loadings or market_id2 in self.factor_loadings:
+            raise ValueError(
+                "correlation cannot be set for markets with factor loadings"
+            )
+        self._check_dropped(time=time)
         if (market_id2, market_id1) in self.correlation:
             self.correlation[(market_id2, market_id1)] = corr
         else:
             self.correlation[(market_id1, market_id2)] = corr
-        self._generated_until = time
+        self._regenerate_from(time=time)
+        self._cholesky_cache = {}
 
     def remove_correlation(
         self, market_id1: int, market_id2: int, time: int = 0
@@ -155,80 +290,483 @@ class Fundamentals:
         """
         if market_id1 == market_id2:
             raise ValueError("market_id1 and market_id2 must be different")
+        self._check_dropped(time=time)
         if (market_id2, market_id1) in self.correlation:
             self.correlation.pop((market_id2, market_id1))
         else:
             self.correlation.pop((market_id1, market_id2))
+        self._regenerate_from(time=time)
+        self._cholesky_cache = {}
+
+    def set_factor_loadings(
+        self, market_id: int, loadings: List[float], time: int = 0
+    ) -> None:
+        """set loadings of a market on common factors.
+
+        The log return of the market is :math:`\\mu + \\sigma (\\sum_k b_k f_k + \\sqrt{1 - \\sum_k b_k^2} \\epsilon)`,
+        where :math:`f_k` and :math:`\\epsilon` are independent standard normal variables shared by all markets and
+        specific to the market, respectively. Therefore, the correlation between markets is :math:`\\sum_k b_k b'_k`.
+        Markets with factor loadings cannot have pairwise correlations.
+
+        Args:
+            market_id (int): market ID.
+            loadings (List[float]): loadings on the factors. The number of factors must be the same among markets.
+            time (int): time step to apply the loadings (default 0).
+
+        Returns:
+            None
+        """
+        if len(loadings) == 0:
+            raise ValueError("loadings must not be empty")
+        for other_loadings in self.factor_loadings.values():
+            if len(other_loadings) != len(loadings):
+                raise ValueError("the number of factors must be the same")
+        if sum([x**2 for x in loadings]) > 1.0:
+            raise ValueError("the sum of squared loadings must not exceed 1.0")
+        if any([market_id in key for key in self.correlation.keys()]):
+            raise ValueError(
+                "factor loadings cannot be set for markets with pairwise correlations"
+            )
+        self._check_dropped(time=time)
+        self.factor_loadings[market_id] = list(loadings)
+        self._regenerate_from(time=time)
+        self._cholesky_cache = {}
+
+    def remove_factor_loadings(self, market_id: int, time: int = 0) -> None:
+        """remove loadings of a market on common factors.
+
+        Args:
+            market_id (int): market ID.
+            time (int): time step to apply the removal (default 0).
+
+        Returns:
+            None
+        """
+        self._check_dropped(time=time)
+        self.factor_loadings.pop(market_id)
+        self._regenerate_from(time=time)
+        self._cholesky_cache = {}
+
+    def set_random_numbers(
+        self, seed: Optional[int] = None, antithetic: bool = False
+    ) -> None:
+        """set the random numbers for fundamental price shocks.
+
+        If a seed is given, the shocks are drawn from a generator seeded only by it,
+        so that paired runs given the same seed consume identical shocks (common random numbers)
+        regardless of their own random seeds and of rules and agents not affecting fundamentals.
+        The shocks are identical only if the fundamental settings (markets, volatilities, drifts, correlations
+        and the time steps when they are changed) are also identical.
+        If antithetic is True, all the standard normal draws are negated, so that a run paired with
+        the same seed and antithetic False follows the mirrored shocks (antithetic variates).
+        The prices are generated again from time step 0.
+        Seeds for paired runs can be made by :func:`pams.utils.antithetic_pairs` and :func:`pams.utils.common_random_number_sets`.
+
+        Args:
+            seed (int, Optional): seed of the random numbers. If not specified, the current generator is kept.
+            antithetic (bool): whether the standard normal draws are negated or not.
+
+        Returns:
+            None
+        """
+        self._check_dropped(time=0)
+        if seed is not None:
+            self._np_prng = np.random.default_rng(seed)
+        self.antithetic = antithetic
+        self._regenerate_from(time=0)
+
+    def _regenerate_from(self, time: int) -> None:
+        """discard the prices after the time step so that they are generated again with new settings. (Internal method)
+
+        Args:
+            time (int): time step.
+
+        Returns:
+            None
+        """
         self._generated_until = time
 
-    def _generate_log_return(
-        self, generate_target_ids: List[int], length: int
-    ) -> np.ndarray:
-        """get log returns. (Internal method)
+    def _check_dropped(self, time: int) -> None:
+        """check that the prices at the time step are not dropped. (Internal method)
+
+        Args:
+            time (int): time step.
+
+        Returns:
+            None
+        """
+        if time < self.prices_offset:
+            raise ValueError(
+                f"fundamental prices before time step {self.prices_offset} are already dropped (requested {time})"
+            )
+
+    def set_history_directory(self, directory: str) -> None:
+        """set the directory to write dropped prices to.
+        Prices of each market are stored in a memory-mapped .npy file named "prices_<market ID>.npy",
+        which can be read by :func:`pams.utils.load_histories` in other processes.
+
+        Args:
+            directory (str): directory.
+
+        Returns:
+            None
+        """
+        if self.prices_offset > 0:
+            raise AssertionError(
+                "history directory cannot be set after prices are dropped"
+            )
+        os.makedirs(directory, exist_ok=True)
+        self.history_directory = directory
+
+    def _spill_prices(self, market_id: int, prices: np.ndarray) -> None:
+        """write prices from :attr:`prices_offset` to the memory-mapped file. (Internal method)
+        The file is mapped again after writing so that the written pages are not kept resident.
+
+        Args:
+            market_id (int): market ID.
+            prices (np.ndarray): prices from :attr:`prices_offset`.
+
+        Returns:
+            None
+        """
+        stop: int = self.prices_offset + len(prices)
+        spilled: np.ndarray = self._spilled_prices.get(
+            market_id, np.empty(0, dtype=np.float64)
+        )
+        if len(spilled) < stop:
+            spilled = extend_memmap(
+                path=os.path.join(
+                    cast(str, self.history_directory), f"prices_{market_id}.npy"
+                ),
+                values=spilled,
+                length=max(stop, 2 * len(spilled)),
+                fill_value=np.nan,
+            )
+        spilled[self.prices_offset : stop] = prices
+        self._spilled_prices[market_id] = remap_memmap(values=spilled)
+
+    def flush_histories(self) -> None:
+        """write all generated prices to the memory-mapped files without dropping them.
+        This does nothing if the history directory is not set.
+
+        Returns:
+            None
+        """
+        if self.history_directory is None:
+            return
+        for market_id, prices in self.prices.items():
+            self._spill_prices(market_id=market_id, prices=prices)
+
+    def drop_prices_before(self, time: int) -> None:
+        """drop generated prices before the time step to bound memory.
+
+        Prices are dropped in chunks of at least the generation chunk size so that the amortized cost per time step is constant.
+        Therefore, some prices before the time step may be kept.
+        If the history directory is set, dropped prices are written to the memory-mapped files.
+
+        Args:
+            time (int): time step. Prices at this time step and later are kept.
+
+        Returns:
+            None
+        """
+        time = min(time, self._generated_until)
+        shift: int = time - self.prices_offset
+        if shift < self._generate_chunk_size:
+            return
+        if self.history_directory is not None:
+            for market_id, row in self._market_rows.items():
+                self._spill_prices(
+                    market_id=market_id, prices=self._prices[row, :shift]
+                )
+        length: int = max(
+            [self._get_length(market_id=x) for x in self.market_ids], default=shift
+        )
+        # prices are copied so that views returned before remain unchanged
+        self._prices = self._prices[:, shift:length].copy()
+        self.prices_offset = time
+
+    def precompute_prices(self, until: int) -> np.ndarray:
+        """generate the fundamental prices of all markets until the time step.
+
+        Args:
+            until (int): the last time step.
+
+        Returns:
+            np.ndarray: prices (markets x time steps from 0 to until) whose rows are in the order of :attr:`market_ids`.
+            This is a view of the prices and should be copied before settings are changed.
+        """
+        self._check_dropped(time=0)
+        while until >= self._generated_until:
+            self._generate_next()
+        return self._prices[: len(self.market_ids), : until + 1]
+
+    def save_prices(self, path: str, until: int) -> None:
+        """save the fundamental prices of all markets until the time step to a .npy file.
+        The file can be attached by :class:`pams.fundamentals.PrecomputedFundamentals` in any number of processes.
+
+        Args:
+            path (str): path of the .npy file.
+            until (int): the last time step.
+
+        Returns:
+            None
+        """
+        np.save(path, self.precompute_prices(until=until))
+
+    def share_prices(self, name: str, until: int) -> SharedMemory:
+        """copy the fundamental prices of all markets until the time step to a shared memory block.
+        The block can be attached by :class:`pams.fundamentals.PrecomputedFundamentals` in any number of processes.
+        The caller owns the block, i.e., it must keep the block until the processes finish and unlink it after that.
+
+        Args:
+            name (str): name of the shared memory block.
+            until (int): the last time step.
+
+        Returns:
+            SharedMemory: the shared memory block.
+        """
+        prices: np.ndarray = self.precompute_prices(until=until)
+        shared_memory = SharedMemory(
+            name=name, create=True, size=_SHARED_HEADER_SIZE + max(prices.nbytes, 1)
+        )
+        np.ndarray((2,), dtype=np.int64, buffer=shared_memory.buf)[:] = prices.shape
+        np.ndarray(
+            prices.shape,
+            dtype=np.float64,
+            buffer=shared_memory.buf,
+            offset=_SHARED_HEADER_SIZE,
+        )[:] = prices
+        return shared_memory
+
+    def snapshot(self) -> Dict[str, Any]:
+        """take a snapshot of the state of this class.
+
+        Returns:
+            Dict[str, Any]: snapshot. This should be passed to :func:`pams.fundamentals.Fundamentals.restore`.
+        """
+        return {
+            "prng_state": self._prng.getstate(),
+            "np_prng_state": self._np_prng.bit_generator.state,
+            "antithetic": self.antithetic,
+            "correlation": dict(self.correlation),
+            "factor_loadings": {
+                key: list(value) for key, value in self.factor_loadings.items()
+            },
+            "drifts": dict(self.drifts),
+            "volatilities": dict(self.volatilities),
+            # read-only prices are shared without copying
+            "prices": self._prices.copy()
+            if self._prices.flags.writeable
+            else self._prices,
+            "market_ids": list(self.market_ids),
+            "initials": dict(self.initials),
+            "start_at": dict(self.start_at),
+            "generated_until": self._generated_until,
+            "prices_offset": self.prices_offset,
+        }
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """restore the state of this class from a snapshot.
+
+        Args:
+            snapshot (Dict[str, Any]): snapshot taken by :func:`pams.fundamentals.Fundamentals.snapshot`.
+
+        Returns:
+            None
+        """
+        self._prng.setstate(snapshot["prng_state"])
+        self._np_prng.bit_generator.state = snapshot["np_prng_state"]
+        self.antithetic = snapshot["antithetic"]
+        self.correlation = dict(snapshot["correlation"])
+        self.factor_loadings = {
+            key: list(value) for key, value in snapshot["factor_loadings"].items()
+        }
+        self.drifts = dict(snapshot["drifts"])
+        self.volatilities = dict(snapshot["volatilities"])
+        self._prices = (
+            snapshot["prices"].copy()
+            if snapshot["prices"].flags.writeable
+            else snapshot["prices"]
+        )
+        self.market_ids = list(snapshot["market_ids"])
+        self._market_rows = {x: i for i, x in enumerate(self.market_ids)}
+        self._cholesky_cache = {}
+        self.initials = dict(snapshot["initials"])
+        self.start_at = dict(snapshot["start_at"])
+        self._generated_until = snapshot["generated_until"]
+        self.prices_offset = snapshot["prices_offset"]
+
+    def _get_cholesky(self, generate_target_ids: List[int]) -> "_CorrelationStructure":
+        """get the factorization of the correlations among target markets. (Internal method)
+        Markets with volatility are split into the connected components of the pairwise correlation graph,
+        and the covariance matrix of each component is factorized separately.
+        Results are cached until volatilities, correlations or markets are changed.
 
         Args:
             generate_target_ids (List[int]): target market ID list.
-            length (int): return length.
 
         Returns:
-            np.ndarray: log returns.
+            :class:`_CorrelationStructure`: factorization of the correlations.
         """
+        key: Tuple[int, ...] = tuple(generate_target_ids)
+        if key in self._cholesky_cache:
+            return self._cholesky_cache[key]
         generate_target_ids_cholesky = list(
             filter(lambda x: self.volatilities[x] != 0.0, generate_target_ids)
         )
-        generate_target_ids_other = list(
-            filter(lambda x: self.volatilities[x] == 0.0, generate_target_ids)
-        )
-        corr_matrix = np.eye(len(generate_target_ids_cholesky))
+        rows: Dict[int, int] = {
+            x: i for i, x in enumerate(generate_target_ids_cholesky)
+        }
+        # union-find over the markets without factor loadings
+        parents: List[int] = list(range(len(generate_target_ids_cholesky)))
+
+        def find(i: int) -> int:
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
         for (id1, id2), corr in self.correlation.items():
-            if id1 not in generate_target_ids_cholesky:
+            if id1 not in rows:
                 continue
-            if id2 not in generate_target_ids_cholesky:
+            if id2 not in rows:
                 continue
             if id1 == id2:
                 raise AssertionError
-            corr_matrix[
-                generate_target_ids_cholesky.index(id1),
-                generate_target_ids_cholesky.index(id2),
-            ] = corr
-            corr_matrix[
-                generate_target_ids_cholesky.index(id2),
-                generate_target_ids_cholesky.index(id1),
-            ] = corr
+            parents[find(rows[id1])] = find(rows[id2])
+        components: Dict[int, List[int]] = {}
+        factor_rows: List[int] = []
+        for x, i in rows.items():
+            if x in self.factor_loadings:
+                factor_rows.append(i)
+            else:
+                components.setdefault(find(i), []).append(i)
+        component_correlations: Dict[int, List[Tuple[int, int, float]]] = {}
+        for (id1, id2), corr in self.correlation.items():
+            if id1 in rows and id2 in rows:
+                component_correlations.setdefault(find(rows[id1]), []).append(
+                    (rows[id1], rows[id2], corr)
+                )
         vol = np.asarray([self.volatilities[x] for x in generate_target_ids_cholesky])
-        cov_matrix = vol * corr_matrix * vol.reshape(-1, 1)
-        try:
-            cholesky_matrix = cholesky(cov_matrix, lower=True)
-        except Exception as e:
-            print(
-                "Error happened when calculating cholesky matrix for fundamental calculation."
-                "This possibly means that fundamental correlations have a invalid circle correlation."
-                "Please consider delete a circle correlation."
+        diagonal_rows: List[int] = []
+        # rows and cholesky factors of components grouped by the sizes of components
+        blocks_by_size: Dict[int, Tuple[List[List[int]], List[np.ndarray]]] = {}
+        for root, component in components.items():
+            if len(component) == 1:
+                diagonal_rows.extend(component)
+                continue
+            positions: Dict[int, int] = {i: j for j, i in enumerate(component)}
+            corr_matrix = np.eye(len(component))
+            for row1, row2, corr in component_correlations[root]:
+                corr_matrix[positions[row1], positions[row2]] = corr
+                corr_matrix[positions[row2], positions[row1]] = corr
+            block_vol = vol[component]
+            cov_matrix = block_vol * corr_matrix * block_vol.reshape(-1, 1)
+            try:
+                cholesky_matrix = cholesky(cov_matrix, lower=True)
+            except Exception as e:
+                print(
+                    "Error happened when calculating cholesky matrix for fundamental calculation."
+                    "This possibly means that fundamental correlations have a invalid circle correlation."
+                    "Please consider delete a circle correlation."
+                )
+                raise e
+            block_rows, block_matrices = blocks_by_size.setdefault(
+                len(component), ([], [])
             )
-            raise e
-
-        dw_cholesky = self._np_prng.standard_normal(
-            size=(len(generate_target_ids_cholesky), length)
+            block_rows.append(component)
+            block_matrices.append(cholesky_matrix)
+        loadings = np.asarray(
+            [
+                self.factor_loadings[generate_target_ids_cholesky[i]]
+                for i in factor_rows
+            ],
+            dtype=np.float64,
+        ).reshape(
+            len(factor_rows),
+            max([len(x) for x in self.factor_loadings.values()], default=0),
         )
-        drifts_cholesky = np.asarray(
-            [self.drifts[x] for x in generate_target_ids_cholesky]
+        factor_vol = vol[factor_rows]
+        result = _CorrelationStructure(
+            cholesky_positions=np.asarray(
+                [i for i, x in enumerate(generate_target_ids) if x in rows],
+                dtype=np.int64,
+            ),
+            other_positions=np.asarray(
+                [i for i, x in enumerate(generate_target_ids) if x not in rows],
+                dtype=np.int64,
+            ),
+            diagonal_rows=np.asarray(diagonal_rows, dtype=np.int64),
+            diagonal=np.sqrt(vol[diagonal_rows] * vol[diagonal_rows]),
+            blocks=[
+                (np.asarray(block_rows, dtype=np.int64), np.stack(block_matrices))
+                for block_rows, block_matrices in blocks_by_size.values()
+            ],
+            factor_rows=np.asarray(factor_rows, dtype=np.int64),
+            factor_loadings=factor_vol.reshape(-1, 1) * loadings,
+            specific_scales=factor_vol
+            * np.sqrt(np.maximum(1.0 - np.sum(loadings**2, axis=1), 0.0)),
         )
-        result_cholesky = np.dot(
-            cholesky_matrix, dw_cholesky
-        ) + drifts_cholesky.T.reshape(-1, 1)
+        self._cholesky_cache[key] = result
+        return result
 
-        drifts_others = np.asarray(
-            [[self.drifts[x] for _ in range(length)] for x in generate_target_ids_other]
-        )
+    def _generate_log_return(
+        self, generate_target_ids: List[int], length: int
+    ) -> np.ndarray:
+        """get log returns. (Internal method)
 
-        return np.stack(
-            [
-                result_cholesky[generate_target_ids_cholesky.index(x)]
-                if x in generate_target_ids_cholesky
-                else drifts_others[generate_target_ids_other.index(x)]
-                for x in generate_target_ids
-            ]
+        Args:
+            generate_target_ids (List[int]): target market ID list.
+            length (int): return length.
+
+        Returns:
+            np.ndarray: log returns.
+        """
+        structure = self._get_cholesky(generate_target_ids=generate_target_ids)
+        dw_cholesky = self._standard_normal(
+            size=(len(structure.cholesky_positions), length)
         )
+        result_cholesky = np.empty_like(dw_cholesky)
+        result_cholesky[structure.diagonal_rows] = (
+            structure.diagonal.reshape(-1, 1) * dw_cholesky[structure.diagonal_rows]
+        )
+        for block_rows, cholesky_matrices in structure.blocks:
+            result_cholesky[block_rows] = np.matmul(
+                cholesky_matrices, dw_cholesky[block_rows]
+            )
+        if len(structure.factor_rows) > 0:
+            factors = self._standard_normal(
+                size=(structure.factor_loadings.shape[1], length)
+            )
+            result_cholesky[structure.factor_rows] = (
+                np.dot(structure.factor_loadings, factors)
+                + structure.specific_scales.reshape(-1, 1)
+                * dw_cholesky[structure.factor_rows]
+            )
+        drifts = np.asarray([self.drifts[x] for x in generate_target_ids])
+        result = np.empty((len(generate_target_ids), length))
+        result[structure.cholesky_positions] = result_cholesky + drifts[
+            structure.cholesky_positions
+        ].reshape(-1, 1)
+        result[structure.other_positions] = drifts[structure.other_positions].reshape(
+            -1, 1
+        )
+        return result
+
+    def _standard_normal(self, size: Tuple[int, int]) -> np.ndarray:
+        """draw standard normal random numbers, which are negated in the antithetic mode. (Internal method)
+
+        Args:
+            size (Tuple[int, int]): shape of the random numbers.
+
+        Returns:
+            np.ndarray: random numbers.
+        """
+        result: np.ndarray = self._np_prng.standard_normal(size=size)
+        if self.antithetic:
+            np.negative(result, out=result)
+        return result
 
     def _generate_next(self) -> None:
         """execute to next step. (Internal method)
@@ -248,16 +786,16 @@ class Fundamentals:
         log_return = self._generate_log_return(
             generate_target_ids=target_market_ids, length=length
         )
-        current_prices = np.asarray(
-            [self.prices[x][self._generated_until] for x in target_market_ids]
+        start: int = self._generated_until - self.prices_offset
+        self._reserve(length=start + length + 1)
+        target_rows = np.asarray(
+            [self._market_rows[x] for x in target_market_ids], dtype=np.int64
         )
+        current_prices = self._prices[target_rows, start]
         prices = current_prices.T.reshape(-1, 1) * np.exp(
             np.cumsum(log_return, axis=-1)
         )
-        for market_id, price_seq in zip(target_market_ids, prices):
-            self.prices[market_id] = (
-                self.prices[market_id][: self._generated_until + 1] + price_seq.tolist()
-            )
+        self._prices[target_rows, start + 1 : start + length + 1] = prices
         self._generated_until += length
 
     def get_fundamental_price(self, market_id: int, time: int) -> float:
@@ -270,13 +808,17 @@ class Fundamentals:
         Returns:
             float: fundamental price at the specified time step.
         """
+        if time < self.prices_offset:
+            return self._get_spilled_price(market_id=market_id, time=time)
         while time >= self._generated_until:
             self._generate_next()
-        return self.prices[market_id][time]
+        return float(
+            self._prices[self._market_rows[market_id], time - self.prices_offset]
+        )
 
     def get_fundamental_prices(
         self, market_id: int, times: Iterable[int]
-    ) -> List[float]:
+    ) -> np.ndarray:
         """get some fundamental prices.
 
         Args:
@@ -284,8 +826,283 @@ class Fundamentals:
             times (Iterable[int]): time steps to get the price.
 
         Returns:
-            List[float]: fundamental prices in specified range of time steps.
+            np.ndarray: fundamental prices in specified range of time steps.
+            For a range of consecutive time steps whose prices are not dropped, this is a read-only view without copying,
+            which reflects prices regenerated after changing settings.
         """
-        while max([x for x in times]) >= self._generated_until:
+        row: int = self._market_rows[market_id]
+        if (
+            isinstance(times, range)
+            and times.step == 1
+            and len(times) > 0
+            and times.start >= self.prices_offset
+        ):
+            while times.stop - 1 >= self._generated_until:
+                self._generate_next()
+            view: np.ndarray = self._prices[
+                row, times.start - self.prices_offset : times.stop - self.prices_offset
+            ]
+            view.flags.writeable = False
+            return view
+        time_array: np.ndarray = np.fromiter(times, dtype=np.int64)
+        while time_array.max() >= self._generated_until:
             self._generate_next()
-        return [self.prices[market_id][x] for x in times]
+        result: np.ndarray = np.empty(len(time_array), dtype=np.float64)
+        is_dropped: np.ndarray = time_array < self.prices_offset
+        result[~is_dropped] = self._prices[
+            row, time_array[~is_dropped] - self.prices_offset
+        ]
+        if is_dropped.any():
+            if market_id not in self._spilled_prices:
+                self._check_dropped(time=int(time_array.min()))
+            result[is_dropped] = self._spilled_prices[market_id][time_array[is_dropped]]
+        return result
+
+    def _get_spilled_price(self, market_id: int, time: int) -> float:
+        """get a fundamental price dropped from :attr:`prices`. (Internal method)
+
+        Args:
+            market_id (int): market ID.
+            time (int): time step to get the price.
+
+        Returns:
+            float: fundamental price read from the memory-mapped file.
+        """
+        if market_id not in self._spilled_prices:
+            self._check_dropped(time=time)
+        return float(self._spilled_prices[market_id][time])
+
+
+class PrecomputedFundamentals(Fundamentals):
+    """Fundamentals attached to prices precomputed for a run.
+
+    Prices are read from a .npy file saved by :func:`pams.fundamentals.Fundamentals.save_prices`
+    or a shared memory block created by :func:`pams.fundamentals.Fundamentals.share_prices` without copying,
+    so that any number of simulator processes share one copy of the prices and skip generating them.
+    The source is given by the class attributes :attr:`prices_path` or :attr:`shared_memory_name`,
+    usually set by :func:`pams.fundamentals.PrecomputedFundamentals.attach`.
+    Markets must be added in the same order as the run where the prices were precomputed.
+    Settings given at time step 0 are recorded but do not change the precomputed prices, and changing them later is not allowed.
+    Rescaling prices (e.g., by :class:`pams.events.FundamentalPriceShock`) makes a private copy of the prices in the process.
+
+    Examples:
+        >>> runner = SequentialRunner(settings=config, prng=random.Random(42))
+        >>> runner.precompute_fundamentals(path="fundamentals.npy")
+        >>> fundamental_class = PrecomputedFundamentals.attach(prices_path="fundamentals.npy")
+        >>> SequentialRunner(settings=config, prng=random.Random(seed), fundamental_class=fundamental_class).main()
+    """
+
+    prices_path: Optional[str] = None
+    shared_memory_name: Optional[str] = None
+
+    def __init__(self, prng: random.Random) -> None:
+        """initialize.
+
+        Args:
+            prng (random.Random): pseudo random number generator for cholesky.
+
+        Returns:
+            None
+        """
+        super().__init__(prng=prng)
+        self._shared_memory: Optional[SharedMemory] = None
+        if self.prices_path is not None:
+            self._prices = np.load(self.prices_path, mmap_mode="r")
+        elif self.shared_memory_name is not None:
+            self._shared_memory = _attach_shared_memory(name=self.shared_memory_name)
+            shape = tuple(
+                np.ndarray((2,), dtype=np.int64, buffer=self._shared_memory.buf)
+            )
+            self._prices = np.ndarray(
+                shape,
+                dtype=np.float64,
+                buffer=self._shared_memory.buf,
+                offset=_SHARED_HEADER_SIZE,
+            )
+            self._prices.flags.writeable = False
+        else:
+            raise AssertionError("prices_path or shared_memory_name is required")
+        self._generated_until = self._prices.shape[1]
+
+    @classmethod
+    def attach(
+        cls, prices_path: Optional[str] = None, shared_memory_name: Optional[str] = None
+    ) -> Type["PrecomputedFundamentals"]:
+        """get a class attached to precomputed prices, which can be passed as ``fundamental_class``.
+
+        Args:
+            prices_path (str, Optional): path of the .npy file.
+            shared_memory_name (str, Optional): name of the shared memory block.
+
+        Returns:
+            Type[PrecomputedFundamentals]: a subclass whose source is set.
+        """
+        if (prices_path is None) == (shared_memory_name is None):
+            raise ValueError("either prices_path or shared_memory_name is required")
+        return type(
+            cls.__name__,
+            (cls,),
+            {"prices_path": prices_path, "shared_memory_name": shared_memory_name},
+        )
+
+    def add_market(
+        self,
+        market_id: int,
+        initial: float,
+        drift: float,
+        volatility: float,
+        start_at: int = 0,
+    ) -> None:
+        """add a market whose fundamental prices are precomputed.
+
+        Args:
+            market_id (int): market ID to add.
+            initial (float): initial value. This must be the same as the precomputed price at start_at.
+            drift (float): drifts.
+            volatility (float): volatility.
+            start_at (int): time step to start simulation (default 0).
+
+        Returns:
+            None
+        """
+        if market_id in self.market_ids:
+            raise ValueError(f"market {market_id} is already registered")
+        row: int = len(self.market_ids)
+        if row >= self._prices.shape[0]:
+            raise ValueError(f"precomputed prices for market {market_id} are missing")
+        if start_at < self._prices.shape[1] and self._prices[row, start_at] != initial:
+            raise ValueError(
+                f"initial value of market {market_id} differs from the precomputed prices"
+            )
+        self.market_ids.append(market_id)
+        self.drifts[market_id] = drift
+        self.volatilities[market_id] = volatility
+        self.initials[market_id] = initial
+        self.start_at[market_id] = start_at
+        self._market_rows[market_id] = row
+
+    def remove_market(self, market_id: int) -> None:
+        """remove a market. The precomputed prices of other markets are kept.
+
+        Args:
+            market_id (int): market ID to remove.
+
+        Returns:
+            None
+        """
+        self.market_ids.remove(market_id)
+        self.drifts.pop(market_id)
+        self.volatilities.pop(market_id)
+        self.initials.pop(market_id)
+        self.start_at.pop(market_id)
+        self.factor_loadings.pop(market_id, None)
+        self._market_rows.pop(market_id)
+        self._spilled_prices.pop(market_id, None)
+
+    def rescale_prices(self, market_id: int, scale: float, time: int) -> None:
+        """rescale the fundamental prices of a market from the time step onward.
+        The shared prices are copied into this process before the first rescaling.
+
+        Args:
+            market_id (int): market ID.
+            scale (float): scale.
+            time (int): the first time step to rescale.
+
+        Returns:
+            None
+        """
+        if not self._prices.flags.writeable:
+            self._prices = np.array(self._prices)
+        super().rescale_prices(market_id=market_id, scale=scale, time=time)
+
+    def drop_prices_before(self, time: int) -> None:
+        """do nothing because precomputed prices are shared.
+
+        Args:
+            time (int): time step.
+
+        Returns:
+            None
+        """
+        pass
+
+    def _regenerate_from(self, time: int) -> None:
+        """reject changing settings after time step 0. (Internal method)
+
+        Args:
+            time (int): time step.
+
+        Returns:
+            None
+        """
+        if time > 0:
+            raise ValueError(
+                "settings of precomputed fundamental prices cannot be changed"
+            )
+
+    def _generate_next(self) -> None:
+        """reject generating prices beyond the precomputed time steps. (Internal method)"""
+        raise ValueError(
+            f"fundamental prices are precomputed only until time step {self._prices.shape[1] - 1}"
+        )
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    """attach to an existing shared memory block without owning it. (Internal function)
+    Before Python 3.13, the resource tracker unlinks attached blocks at exit unless they are unregistered.
+
+    Args:
+        name (str): name of the shared memory block.
+
+    Returns:
+        SharedMemory: the shared memory block.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)  # type: ignore
+    shared_memory = SharedMemory(name=name)
+    resource_tracker.unregister(shared_memory._name, "shared_memory")  # type: ignore
+    return shared_memory
+
+
+class _CorrelationStructure:
+    """Factorization of the correlations among target markets. (Internal class)
+
+    Rows are the indices of the markets with volatility in the target markets,
+    i.e., the rows of the standard normal variables drawn for the markets.
+    """
+
+    def __init__(
+        self,
+        cholesky_positions: np.ndarray,
+        other_positions: np.ndarray,
+        diagonal_rows: np.ndarray,
+        diagonal: np.ndarray,
+        blocks: List[Tuple[np.ndarray, np.ndarray]],
+        factor_rows: np.ndarray,
+        factor_loadings: np.ndarray,
+        specific_scales: np.ndarray,
+    ) -> None:
+        """initialize.
+
+        Args:
+            cholesky_positions (np.ndarray): positions of the markets with volatility in the target markets.
+            other_positions (np.ndarray): positions of the markets without volatility in the target markets.
+            diagonal_rows (np.ndarray): rows of the markets without correlations.
+            diagonal (np.ndarray): volatilities of the markets without correlations.
+            blocks (List[Tuple[np.ndarray, np.ndarray]]): rows (components x size) and the lower cholesky factors
+                                                         (components x size x size) of connected components of each size.
+            factor_rows (np.ndarray): rows of the markets with factor loadings.
+            factor_loadings (np.ndarray): factor loadings scaled by volatilities (markets x factors).
+            specific_scales (np.ndarray): scales of the market-specific variables.
+
+        Returns:
+            None
+        """
+        self.cholesky_positions: np.ndarray = cholesky_positions
+        self.other_positions: np.ndarray = other_positions
+        self.diagonal_rows: np.ndarray = diagonal_rows
+        self.diagonal: np.ndarray = diagonal
+        self.blocks: List[Tuple[np.ndarray, np.ndarray]] = blocks
+        self.factor_rows: np.ndarray = factor_rows
+        self.factor_loadings: np.ndarray = factor_loadings
+        self.specific_scales: np.ndarray = specific_scales
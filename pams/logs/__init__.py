@@ -5,6 +5,8 @@ from .base import Log
 from .base import Logger
 from .base import MarketStepBeginLog
 from .base import MarketStepEndLog
+from .base import OrderBookDeltaLog
+from .base import OrderBookSnapshotLog
 from .base import OrderLog
 from .base import SessionBeginLog
 from .base import SessionEndLog
@@ -12,3 +14,4 @@ from .base import SimulationBeginLog
 from .base import SimulationEndLog
 from .market_step_loggers import MarketStepPrintLogger
 from .market_step_loggers import MarketStepSaver
+from .order_book_feed import OrderBookFeedSaver
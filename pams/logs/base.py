@@ -1,5 +1,7 @@
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 from pams.order import OrderKind
 
@@ -205,6 +207,60 @@ class ExecutionLog(Log):
         # TODO: Type validation
 
 
+class OrderBookDeltaLog(Log):
+    """Order book delta log class.
+
+    This log is usually generated by markets with the order book feed at the end of each time step.
+    It includes the price levels whose aggregated volumes are changed in the time step.
+    """
+
+    def __init__(
+        self,
+        market_id: int,
+        time: int,
+        changes: List[Tuple[bool, Optional[float], int]],
+    ):
+        """initialize.
+
+        Args:
+            market_id (int): market ID.
+            time (int): time step.
+            changes (List[Tuple[bool, Optional[float], int]]): changed price levels. Each element is a tuple of
+                                                               whether it is the buy side, the price (None for market orders),
+                                                               and the new aggregated volume (0 if the price level is removed).
+        """
+        self.market_id: int = market_id
+        self.time: int = time
+        self.changes: List[Tuple[bool, Optional[float], int]] = changes
+
+
+class OrderBookSnapshotLog(Log):
+    """Order book snapshot log class.
+
+    This log is usually generated by markets with the order book feed periodically as keyframes of :class:`OrderBookDeltaLog`.
+    """
+
+    def __init__(
+        self,
+        market_id: int,
+        time: int,
+        buy_price_volume: Dict[Optional[float], int],
+        sell_price_volume: Dict[Optional[float], int],
+    ):
+        """initialize.
+
+        Args:
+            market_id (int): market ID.
+            time (int): time step. This is the state at the end of the time step.
+            buy_price_volume (Dict[Optional[float], int]): prices and volumes of the buy order book.
+            sell_price_volume (Dict[Optional[float], int]): prices and volumes of the sell order book.
+        """
+        self.market_id: int = market_id
+        self.time: int = time
+        self.buy_price_volume: Dict[Optional[float], int] = buy_price_volume
+        self.sell_price_volume: Dict[Optional[float], int] = sell_price_volume
+
+
 class SimulationBeginLog(Log):
     """Simulation beginning log class."""
 
@@ -377,6 +433,8 @@ class Logger:
          - :func:`process_order_log`
          - :func:`process_cancel_log`
          - :func:`process_execution_log`
+         - :func:`process_order_book_delta_log`
+         - :func:`process_order_book_snapshot_log`
          - :func:`process_simulation_begin_log`
          - :func:`process_simulation_end_log`
          - :func:`process_session_begin_log`
@@ -401,6 +459,10 @@ class Logger:
                 self.process_expiration_log(log=log)
             elif isinstance(log, ExecutionLog):
                 self.process_execution_log(log=log)
+            elif isinstance(log, OrderBookDeltaLog):
+                self.process_order_book_delta_log(log=log)
+            elif isinstance(log, OrderBookSnapshotLog):
+                self.process_order_book_snapshot_log(log=log)
             elif isinstance(log, SimulationBeginLog):
                 self.process_simulation_begin_log(log=log)
             elif isinstance(log, SimulationEndLog):
@@ -459,6 +521,28 @@ class Logger:
         """
         pass
 
+    def process_order_book_delta_log(self, log: "OrderBookDeltaLog") -> None:
+        """process order book delta log. Called from :func:`process`.
+
+        Args:
+            log (:class:`pams.logs.OrderBookDeltaLog`]): order book delta log
+
+        Returns:
+            None
+        """
+        pass
+
+    def process_order_book_snapshot_log(self, log: "OrderBookSnapshotLog") -> None:
+        """process order book snapshot log. Called from :func:`process`.
+
+        Args:
+            log (:class:`pams.logs.OrderBookSnapshotLog`]): order book snapshot log
+
+        Returns:
+            None
+        """
+        pass
+
     def process_simulation_begin_log(self, log: "SimulationBeginLog") -> None:
         """process simulation begin log. Called from :func:`process`.
 
@@ -0,0 +1,93 @@
+from bisect import bisect_right
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from .base import Logger
+from .base import OrderBookDeltaLog
+from .base import OrderBookSnapshotLog
+
+
+class OrderBookFeedSaver(Logger):
+    """Saver of the order book feed.
+
+    This stores :class:`pams.logs.OrderBookSnapshotLog` and :class:`pams.logs.OrderBookDeltaLog`
+    and rebuilds order books at any time step by seeking to the nearest keyframe (snapshot) before the time step
+    and applying the deltas after the keyframe.
+    Logs are expected to be processed in the order of time steps for each market.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.snapshot_logs: Dict[int, List[OrderBookSnapshotLog]] = {}
+        self.delta_logs: Dict[int, List[OrderBookDeltaLog]] = {}
+        self._snapshot_times: Dict[int, List[int]] = {}
+        self._delta_times: Dict[int, List[int]] = {}
+
+    def process_order_book_delta_log(self, log: OrderBookDeltaLog) -> None:
+        """stack the order book delta log.
+
+        Args:
+            log (:class:`pams.logs.OrderBookDeltaLog`): order book delta log.
+
+        Returns:
+            None
+        """
+        self.delta_logs.setdefault(log.market_id, []).append(log)
+        self._delta_times.setdefault(log.market_id, []).append(log.time)
+
+    def process_order_book_snapshot_log(self, log: OrderBookSnapshotLog) -> None:
+        """stack the order book snapshot log.
+
+        Args:
+            log (:class:`pams.logs.OrderBookSnapshotLog`): order book snapshot log.
+
+        Returns:
+            None
+        """
+        self.snapshot_logs.setdefault(log.market_id, []).append(log)
+        self._snapshot_times.setdefault(log.market_id, []).append(log.time)
+
+    def get_price_volume(
+        self, market_id: int, time: int, is_buy: bool
+    ) -> Dict[Optional[float], int]:
+        """rebuild the prices and volumes of an order book at the end of a time step.
+
+        Args:
+            market_id (int): market ID.
+            time (int): time step.
+            is_buy (bool): whether it is the buy order book or not.
+
+        Returns:
+            Dict[Optional[float], int]: the same format as :func:`pams.order_book.OrderBook.get_price_volume`.
+        """
+        price_volume: Dict[Optional[float], int] = {}
+        start_time: int = -1
+        snapshot_times: List[int] = self._snapshot_times.get(market_id, [])
+        snapshot_index: int = bisect_right(snapshot_times, time) - 1
+        if snapshot_index >= 0:
+            snapshot: OrderBookSnapshotLog = self.snapshot_logs[market_id][
+                snapshot_index
+            ]
+            price_volume = dict(
+                snapshot.buy_price_volume if is_buy else snapshot.sell_price_volume
+            )
+            start_time = snapshot.time
+        delta_times: List[int] = self._delta_times.get(market_id, [])
+        delta_logs: List[OrderBookDeltaLog] = self.delta_logs.get(market_id, [])
+        for i in range(
+            bisect_right(delta_times, start_time), bisect_right(delta_times, time)
+        ):
+            for change_is_buy, price, volume in delta_logs[i].changes:
+                if change_is_buy != is_buy:
+                    continue
+                if volume == 0:
+                    price_volume.pop(price, None)
+                else:
+                    price_volume[price] = volume
+        result: Dict[Optional[float], int] = {}
+        if None in price_volume:
+            result[None] = price_volume.pop(None)
+        for price in sorted(price_volume, key=float, reverse=is_buy):  # type: ignore
+            result[price] = price_volume[price]
+        return result
@@ -1,30 +1,136 @@
-import heapq
+import copy
 import math
+import os
 import random
 import warnings
 from typing import Any
 from typing import Dict
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
+from typing import Type
 from typing import TypeVar
 from typing import Union
 from typing import cast
 
+import numpy as np
+
 from .logs.base import CancelLog
 from .logs.base import ExecutionLog
 from .logs.base import ExpirationLog
 from .logs.base import Log
 from .logs.base import Logger
+from .logs.base import OrderBookDeltaLog
+from .logs.base import OrderBookSnapshotLog
 from .logs.base import OrderLog
+from .market_statistics import MarketStatistics
 from .order import Cancel
 from .order import Order
+from .order import OrderBatch
 from .order_book import OrderBook
+from .utils.class_finder import find_class
+from .utils.memmap import extend_memmap
+from .utils.memmap import remap_memmap
 
 T = TypeVar("T")
 
 
+# histories and their default values, which are captured by Market.snapshot
+_HISTORIES: List[Tuple[str, float]] = [
+    ("_market_prices", np.nan),
+    ("_last_executed_prices", np.nan),
+    ("_mid_prices", np.nan),
+    ("_fundamental_prices", np.nan),
+    ("_executed_volumes", 0),
+    ("_executed_total_prices", 0.0),
+    ("_n_buy_orders", 0),
+    ("_n_sell_orders", 0),
+    ("_cumulative_executed_volumes", 0),
+    ("_cumulative_executed_total_prices", 0.0),
+    ("_cumulative_n_buy_orders", 0),
+    ("_cumulative_n_sell_orders", 0),
+]
+
+
+# fields of the summaries of evicted time steps
+_SUMMARY_FIELDS: List[Tuple[str, Any, float]] = [
+    ("open", np.float64, np.nan),
+    ("high", np.float64, np.nan),
+    ("low", np.float64, np.nan),
+    ("close", np.float64, np.nan),
+    ("volume", np.int64, 0),
+    ("total_price", np.float64, 0.0),
+    ("n_buy_orders", np.int64, 0),
+    ("n_sell_orders", np.int64, 0),
+]
+
+
+def _nan_to_none(value: Any) -> Any:
+    """convert nan to None. (Internal function)
+
+    Args:
+        value (Any): value.
+
+    Returns:
+        Any: None if the value is nan. Otherwise, the value itself.
+    """
+    if value is None or value != value:
+        return None
+    return value
+
+
+def _find_last_known_time(prices: np.ndarray, end: int) -> int:
+    """find the last time step before the end whose price is known. (Internal function)
+    The history is searched backward with geometrically growing windows, so that the cost depends on the distance to the found time step.
+
+    Args:
+        prices (np.ndarray): price history. nan is regarded as unknown.
+        end (int): end of the search (exclusive).
+
+    Returns:
+        int: the last time step with a known price. -1 if no price is known.
+    """
+    end = min(end, len(prices))
+    window: int = 64
+    while end > 0:
+        start: int = max(end - window, 0)
+        known_times: np.ndarray = np.flatnonzero(~np.isnan(prices[start:end]))
+        if len(known_times) > 0:
+            return start + int(known_times[-1])
+        end = start
+        window *= 2
+    return -1
+
+
+def _extend_array(
+    values: Union[Sequence[Any], np.ndarray],
+    length: int,
+    fill_value: float,
+    dtype: Any = np.float64,
+) -> np.ndarray:
+    """extend an array to the length. (Internal function)
+
+    Args:
+        values (Union[Sequence[Any], np.ndarray]): original values.
+        length (int): length after the extension.
+        fill_value (float): value for the extended elements.
+        dtype (Any): dtype of the array if the values are not an array.
+
+    Returns:
+        np.ndarray: the original array if it is long enough, or the extended copy.
+    """
+    if isinstance(values, np.ndarray):
+        if len(values) >= length:
+            return values
+        dtype = values.dtype
+    result: np.ndarray = np.full(length, fill_value, dtype=dtype)
+    result[: len(values)] = values
+    return result
+
+
 class Market:
     """Market class.
 
@@ -55,24 +161,67 @@ class Market:
         self.market_id: int = market_id
         self._prng = prng
         self.logger: Optional[Logger] = logger
-        self._is_running: bool = False
+        # the mid price and the market price of the current time step are recomputed lazily when this flag is set
+        self._is_price_stale: bool = False
+        self._running: bool = False
         self.tick_size: float = 1.0
+        self.warn_price_rounding: bool = False
+        self.n_rounded_prices: int = 0
         self.chunk_size = 100
-        self.sell_order_book: OrderBook = OrderBook(is_buy=False)
-        self.buy_order_book: OrderBook = OrderBook(is_buy=True)
+        self.order_book_class: Type[OrderBook] = OrderBook
+        self.sell_order_book: OrderBook = self.order_book_class(
+            is_buy=False, tick_size=self.tick_size
+        )
+        self.buy_order_book: OrderBook = self.order_book_class(
+            is_buy=True, tick_size=self.tick_size
+        )
         self.time: int = -1
-        self._market_prices: List[Optional[float]] = []
-        self._last_executed_prices: List[Optional[float]] = []
-        self._mid_prices: List[Optional[float]] = []
-        self._fundamental_prices: List[Optional[float]] = []
-        self._executed_volumes: List[int] = []
-        self._executed_total_prices: List[float] = []
-        self._n_buy_orders: List[int] = []
-        self._n_sell_orders: List[int] = []
+        # histories are stored in arrays indexed by time step. Missing prices are nan.
+        self._market_prices: np.ndarray = np.empty(0, dtype=np.float64)
+        self._last_executed_prices: np.ndarray = np.empty(0, dtype=np.float64)
+        self._mid_prices: np.ndarray = np.empty(0, dtype=np.float64)
+        self._fundamental_prices: np.ndarray = np.empty(0, dtype=np.float64)
+        self._executed_volumes: np.ndarray = np.empty(0, dtype=np.int64)
+        self._executed_total_prices: np.ndarray = np.empty(0, dtype=np.float64)
+        self._n_buy_orders: np.ndarray = np.empty(0, dtype=np.int64)
+        self._n_sell_orders: np.ndarray = np.empty(0, dtype=np.int64)
+        # cumulative sums of the histories. They are valid for the closed time steps before _n_closed_steps.
+        self._cumulative_executed_volumes: np.ndarray = np.empty(0, dtype=np.int64)
+        self._cumulative_executed_total_prices: np.ndarray = np.empty(
+            0, dtype=np.float64
+        )
+        self._cumulative_n_buy_orders: np.ndarray = np.empty(0, dtype=np.int64)
+        self._cumulative_n_sell_orders: np.ndarray = np.empty(0, dtype=np.int64)
+        self._n_closed_steps: int = 0
+        # histories keep the time steps from _history_offset. Older time steps are evicted by the retention policy.
+        self.history_retention: str = "all"
+        self.history_window: Optional[int] = None
+        self.history_summary_interval: Optional[int] = None
+        self._history_offset: int = 0
+        # per-interval summaries of evicted time steps (only for the "summary" retention)
+        self._summaries: Dict[str, np.ndarray] = {
+            name: np.empty(0, dtype=dtype) for name, dtype, _ in _SUMMARY_FIELDS
+        }
+        self._n_summaries: int = 0
+        # histories are backed by memory-mapped files in history_directory if it is set
+        self.history_directory: Optional[str] = None
+        self.history_memory_limit: Optional[int] = None
+        # level changes of the order books are written as logs if order_book_feed is True
+        self.order_book_feed: bool = False
+        self.order_book_keyframe_interval: int = 100
+        # the first time step whose histories may be resident in memory since the files were mapped
+        self._resident_from: int = 0
+        # the last time steps before the current time step whose prices are known (-1 if none)
+        self._last_known_times: Dict[str, int] = {
+            "_last_executed_prices": -1,
+            "_mid_prices": -1,
+            "_market_prices": -1,
+        }
         self._next_order_id: int = 0
         self.simulator: "Simulator" = simulator  # type: ignore  # NOQA
         self.name: str = name
         self.outstanding_shares: Optional[int] = None
+        self.stats: MarketStatistics = MarketStatistics(market=self)
 
     def __repr__(self) -> str:
         return (
@@ -86,7 +235,26 @@ class Market:
         Args:
             settings (Dict[str, Any]): market configuration. Usually, automatically set from json config of simulator.
                                        This must include the parameters "tickSize" and either "marketPrice" or "fundamentalPrice".
-                                       This can include the parameter "outstandingShares" and "tradeVolume".
+                                       This can include the parameter "outstandingShares", "tradeVolume", "orderBookClass",
+                                       "warnPriceRounding", "historyRetention", "historyWindow", "historySummaryInterval",
+                                       "historyDirectory", "historyMemoryLimit", "orderBookFeed" and "orderBookKeyframeInterval".
+                                       "orderBookClass" is the name of the order book class for this market
+                                       (default :class:`pams.order_book.OrderBook`).
+                                       "warnPriceRounding" is whether a warning is issued when an order price is rounded
+                                       to the tick size (default False).
+                                       "historyRetention" is how histories are retained: "all" (default) keeps everything,
+                                       "window" keeps only the last "historyWindow" time steps,
+                                       and "summary" additionally compacts older time steps into per-"historySummaryInterval"
+                                       summaries (see :func:`pams.market.Market.get_history_summaries`).
+                                       "historyDirectory" is a run directory where the histories are stored as memory-mapped .npy
+                                       files in the subdirectory named after this market (only for the "all" retention).
+                                       The files can be read by :func:`pams.utils.load_histories` in other processes.
+                                       "historyMemoryLimit" is the resident-memory ceiling of the histories in bytes.
+                                       Above this, the histories of completed time steps are flushed and unmapped.
+                                       "orderBookFeed" is whether the changes of price levels are written as
+                                       :class:`pams.logs.OrderBookDeltaLog` at the end of each time step (default False).
+                                       "orderBookKeyframeInterval" is the interval of time steps at which
+                                       :class:`pams.logs.OrderBookSnapshotLog` is written as a keyframe of the feed (default 100).
 
         Returns:
             None
@@ -99,33 +267,144 @@ class Market:
                 raise ValueError("outstandingShares must be int")
             self.outstanding_shares = settings["outstandingShares"]
         if "marketPrice" in settings:
-            self._market_prices = [float(settings["marketPrice"])]
+            self._market_prices = np.array([float(settings["marketPrice"])])
         elif "fundamentalPrice" in settings:
-            self._market_prices = [float(settings["fundamentalPrice"])]
+            self._market_prices = np.array([float(settings["fundamentalPrice"])])
         else:
             raise ValueError("fundamentalPrice or marketPrice is required for market")
+        if "warnPriceRounding" in settings:
+            if not isinstance(settings["warnPriceRounding"], bool):
+                raise ValueError("warnPriceRounding must be bool")
+            self.warn_price_rounding = settings["warnPriceRounding"]
+        if "historyRetention" in settings:
+            if settings["historyRetention"] not in ["all", "window", "summary"]:
+                raise ValueError("historyRetention must be all, window or summary")
+            self.history_retention = settings["historyRetention"]
+        if self.history_retention != "all":
+            if "historyWindow" not in settings:
+                raise ValueError(
+                    f"historyWindow is required for {self.history_retention} retention"
+                )
+            if (
+                not isinstance(settings["historyWindow"], int)
+                or settings["historyWindow"] < 1
+            ):
+                raise ValueError("historyWindow must be positive int")
+            self.history_window = settings["historyWindow"]
+        if self.history_retention == "summary":
+            if "historySummaryInterval" not in settings:
+                raise ValueError(
+                    "historySummaryInterval is required for summary retention"
+                )
+            if (
+                not isinstance(settings["historySummaryInterval"], int)
+                or settings["historySummaryInterval"] < 1
+            ):
+                raise ValueError("historySummaryInterval must be positive int")
+            self.history_summary_interval = settings["historySummaryInterval"]
+        if "historyMemoryLimit" in settings:
+            if "historyDirectory" not in settings:
+                raise ValueError("historyDirectory is required for historyMemoryLimit")
+            if (
+                not isinstance(settings["historyMemoryLimit"], int)
+                or settings["historyMemoryLimit"] < 1
+            ):
+                raise ValueError("historyMemoryLimit must be positive int")
+            self.history_memory_limit = settings["historyMemoryLimit"]
+        if "historyDirectory" in settings:
+            if self.history_retention != "all":
+                raise ValueError(
+                    "historyDirectory is only available with all retention"
+                )
+            self.history_directory = os.path.join(
+                settings["historyDirectory"], self.name
+            )
+            os.makedirs(self.history_directory, exist_ok=True)
+            self._extend_histories(
+                length=max(len(self._market_prices), len(self._mid_prices))
+            )
+        if "orderBookClass" in settings:
+            order_book_class: Type = find_class(name=settings["orderBookClass"])
+            if not issubclass(order_book_class, OrderBook):
+                raise ValueError("orderBookClass does not inherit OrderBook class")
+            if len(self.sell_order_book) > 0 or len(self.buy_order_book) > 0:
+                raise AssertionError(
+                    "order book cannot be changed after orders are placed"
+                )
+            self.order_book_class = order_book_class
+        if len(self.sell_order_book) == 0 and len(self.buy_order_book) == 0:
+            # order books handle prices as integer tick levels
+            self.sell_order_book = self.order_book_class(
+                is_buy=False, tick_size=self.tick_size
+            )
+            self.buy_order_book = self.order_book_class(
+                is_buy=True, tick_size=self.tick_size
+            )
+        elif self.sell_order_book.tick_size != self.tick_size:
+            raise AssertionError("tick size cannot be changed after orders are placed")
+        if "orderBookFeed" in settings:
+            if not isinstance(settings["orderBookFeed"], bool):
+                raise ValueError("orderBookFeed must be bool")
+            self.order_book_feed = settings["orderBookFeed"]
+        if "orderBookKeyframeInterval" in settings:
+            if (
+                not isinstance(settings["orderBookKeyframeInterval"], int)
+                or settings["orderBookKeyframeInterval"] < 1
+            ):
+                raise ValueError("orderBookKeyframeInterval must be positive int")
+            self.order_book_keyframe_interval = settings["orderBookKeyframeInterval"]
+        if self.order_book_feed:
+            self.buy_order_book._track_level_changes()
+            self.sell_order_book._track_level_changes()
 
     def _extract_sequential_data_by_time(
         self,
         times: Union[Iterable[int], None],
-        parameters: List[Optional[T]],
+        parameters: Union[Sequence[Optional[T]], np.ndarray],
         allow_none: bool = False,
     ) -> List[Optional[T]]:
         """extract sequential parameters by time. (Internal method)
 
         Args:
             times (Union[Iterable[int], None]): range of time steps.
-            parameters (List[Optional[T]]): referenced parameters.
+            parameters (Union[Sequence[Optional[T]], np.ndarray]): referenced parameters. nan in arrays is regarded as None.
             allow_none (bool): whether a None result can be returned.
 
         Returns:
             List[Optional[T]]: extracted parameters.
         """
+        self._refresh_prices()
+        values: Union[Sequence[Optional[T]], np.ndarray]
+        offset: int = self._history_offset
         if times is None:
-            times = range(self.time + 1)
-        if sum([t > self.time for t in times]) > 0:
-            raise AssertionError("Cannot refer the future parameters")
-        result = [parameters[t] for t in times]
+            self._check_evicted(time=0)
+            values = parameters[: self.time + 1]
+        elif (
+            isinstance(times, range)
+            and isinstance(parameters, np.ndarray)
+            and times.step > 0
+            and times.start >= 0
+        ):
+            if len(times) > 0:
+                if times[-1] > self.time:
+                    raise AssertionError("Cannot refer the future parameters")
+                self._check_evicted(time=times[0])
+            values = parameters[times.start - offset : times.stop - offset : times.step]
+        else:
+            times = list(times)
+            if len(times) > 0:
+                if max(times) > self.time:
+                    raise AssertionError("Cannot refer the future parameters")
+                self._check_evicted(time=min(times))
+            if offset > 0:
+                times = [t - offset for t in times]
+            if isinstance(parameters, np.ndarray):
+                values = parameters[times]
+            else:
+                values = [parameters[t] for t in times]
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        result: List[Optional[T]] = [_nan_to_none(value) for value in values]
         if not allow_none and None in result:
             raise AssertionError
         return result
@@ -133,14 +412,14 @@ class Market:
     def _extract_data_by_time(
         self,
         time: Union[int, None],
-        parameters: List[Optional[T]],
+        parameters: Union[Sequence[Optional[T]], np.ndarray],
         allow_none: bool = False,
     ) -> Optional[T]:
         """extract a parameter by time. (Internal method)
 
         Args:
             time (Union[int, None]): time step.
-            parameters (List[Optional[T]]): referenced parameters.
+            parameters (Union[Sequence[Optional[T]], np.ndarray]): referenced parameters. nan in arrays is regarded as None.
             allow_none (bool): whether a None result can be returned.
 
         Returns:
@@ -150,11 +429,192 @@ class Market:
             time = self.time
         if time > self.time:
             raise AssertionError("Cannot refer the future parameters")
-        result = parameters[time]
+        self._check_evicted(time=time)
+        self._refresh_prices()
+        value = parameters[time - self._history_offset]
+        result: Optional[T] = _nan_to_none(
+            value.item() if isinstance(value, np.generic) else value
+        )
         if not allow_none and result is None:
             raise AssertionError
         return result
 
+    def _check_evicted(self, time: int) -> None:
+        """check that a time step is not evicted from the histories. (Internal method)
+
+        Args:
+            time (int): time step.
+
+        Returns:
+            None
+        """
+        if self._history_offset > 0 and time < self._history_offset:
+            raise ValueError(
+                f"time step {time} is evicted from the histories of {self.name} "
+                f"(histories are retained from time step {self._history_offset})"
+            )
+
+    def _get_array_view(
+        self, parameters: np.ndarray, start: int, stop: Optional[int]
+    ) -> np.ndarray:
+        """get a read-only view of a history. (Internal method)
+
+        Args:
+            parameters (np.ndarray): history.
+            start (int): first time step.
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of the history.
+        """
+        self._refresh_prices()
+        if stop is None:
+            stop = self.time + 1
+        if stop > self.time + 1:
+            raise AssertionError("Cannot refer the future parameters")
+        if start < 0 or start > stop:
+            raise ValueError(f"invalid range of time steps: [{start}, {stop})")
+        self._check_evicted(time=start)
+        view: np.ndarray = parameters[
+            start - self._history_offset : stop - self._history_offset
+        ]
+        if self.history_retention != "all":
+            # histories are shifted when old time steps are evicted
+            view = view.copy()
+        view.flags.writeable = False
+        return view
+
+    def get_market_prices_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get market prices as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of market prices. Missing prices are nan.
+
+        Note:
+            The view shares the memory with the market until the histories are reallocated.
+            Prices at the current time step can still be updated.
+            If old time steps can be evicted (see :func:`pams.market.Market.setup`), a read-only copy is returned instead.
+        """
+        return self._get_array_view(
+            parameters=self._market_prices, start=start, stop=stop
+        )
+
+    def get_mid_prices_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get middle prices as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of middle prices. Missing prices are nan.
+        """
+        return self._get_array_view(parameters=self._mid_prices, start=start, stop=stop)
+
+    def get_last_executed_prices_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get prices executed last as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of prices. Missing prices are nan.
+        """
+        return self._get_array_view(
+            parameters=self._last_executed_prices, start=start, stop=stop
+        )
+
+    def get_fundamental_prices_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get fundamental prices as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of fundamental prices.
+        """
+        return self._get_array_view(
+            parameters=self._fundamental_prices, start=start, stop=stop
+        )
+
+    def get_executed_volumes_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get executed volumes as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of volumes.
+        """
+        return self._get_array_view(
+            parameters=self._executed_volumes, start=start, stop=stop
+        )
+
+    def get_executed_total_prices_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get executed total prices as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of total prices.
+        """
+        return self._get_array_view(
+            parameters=self._executed_total_prices, start=start, stop=stop
+        )
+
+    def get_n_buy_orders_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get the number of buy orders as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of the number of buy orders.
+        """
+        return self._get_array_view(
+            parameters=self._n_buy_orders, start=start, stop=stop
+        )
+
+    def get_n_sell_orders_array(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> np.ndarray:
+        """get the number of sell orders as a read-only array without copying.
+
+        Args:
+            start (int): first time step (default 0).
+            stop (int, Optional): time step to stop before (exclusive). If it is None, the current time step is included.
+
+        Returns:
+            np.ndarray: read-only view of the number of sell orders.
+        """
+        return self._get_array_view(
+            parameters=self._n_sell_orders, start=start, stop=stop
+        )
+
     def get_time(self) -> int:
         """get time step."""
         return self.time
@@ -285,9 +745,7 @@ class Market:
         """
         return cast(
             List[int],
-            self._extract_sequential_data_by_time(
-                times, cast(List[Optional[int]], self._executed_volumes)
-            ),
+            self._extract_sequential_data_by_time(times, self._executed_volumes),
         )
 
     def get_executed_volume(self, time: Union[int, None] = None) -> int:
@@ -299,12 +757,7 @@ class Market:
         Returns:
             int: volume.
         """
-        return cast(
-            int,
-            self._extract_data_by_time(
-                time, cast(List[Optional[int]], self._executed_volumes)
-            ),
-        )
+        return cast(int, self._extract_data_by_time(time, self._executed_volumes))
 
     def get_executed_total_prices(
         self, times: Union[Iterable[int], None] = None
@@ -319,9 +772,7 @@ class Market:
         """
         return cast(
             List[float],
-            self._extract_sequential_data_by_time(
-                times, cast(List[Optional[int]], self._executed_total_prices)
-            ),
+            self._extract_sequential_data_by_time(times, self._executed_total_prices),
         )
 
     def get_executed_total_price(self, time: Union[int, None] = None) -> float:
@@ -334,10 +785,7 @@ class Market:
             float: total price.
         """
         return cast(
-            float,
-            self._extract_data_by_time(
-                time, cast(List[Optional[int]], self._executed_total_prices)
-            ),
+            float, self._extract_data_by_time(time, self._executed_total_prices)
         )
 
     def get_n_buy_orders(self, times: Union[Iterable[int], None] = None) -> List[int]:
@@ -350,10 +798,7 @@ class Market:
             List[int]: number of buy orders.
         """
         return cast(
-            List[int],
-            self._extract_sequential_data_by_time(
-                times, cast(List[Optional[int]], self._n_buy_orders)
-            ),
+            List[int], self._extract_sequential_data_by_time(times, self._n_buy_orders)
         )
 
     def get_n_buy_order(self, time: Union[int, None] = None) -> int:
@@ -365,12 +810,7 @@ class Market:
         Returns:
             int: number of buy order.
         """
-        return cast(
-            int,
-            self._extract_data_by_time(
-                time, cast(List[Optional[int]], self._n_buy_orders)
-            ),
-        )
+        return cast(int, self._extract_data_by_time(time, self._n_buy_orders))
 
     def get_n_sell_orders(self, times: Union[Iterable[int], None] = None) -> List[int]:
         """get the number of sell orders.
@@ -382,10 +822,7 @@ class Market:
             List[int]: number of sell orders.
         """
         return cast(
-            List[int],
-            self._extract_sequential_data_by_time(
-                times, cast(List[Optional[int]], self._n_sell_orders)
-            ),
+            List[int], self._extract_sequential_data_by_time(times, self._n_sell_orders)
         )
 
     def get_n_sell_order(self, time: Union[int, None] = None) -> int:
@@ -397,59 +834,481 @@ class Market:
         Returns:
             int: number of sell order.
         """
-        return cast(
-            int,
-            self._extract_data_by_time(
-                time, cast(List[Optional[int]], self._n_sell_orders)
+        return cast(int, self._extract_data_by_time(time, self._n_sell_orders))
+
+    def _fill_until(self, time: int) -> None:
+        """extend the histories so that the time step can be stored. (Internal method)
+        The capacity grows geometrically (at least :attr:`chunk_size`), so that the amortized cost per time step is O(1).
+        If old time steps can be evicted, the histories are compacted instead when the capacity reaches twice the window.
+
+        Args:
+            time (int): time step.
+
+        Returns:
+            None
+        """
+        self._release_histories(time=time)
+        index: int = time - self._history_offset
+        if len(self._mid_prices) >= index + 1:
+            return
+        if self.history_window is None:
+            self._extend_histories(
+                length=max(index + 1, 2 * len(self._mid_prices), self.chunk_size)
+            )
+            return
+        max_length: int = 2 * (self.history_window + 1)
+        if len(self._mid_prices) >= max_length:
+            self._evict_until(time=time - self.history_window)
+            index = time - self._history_offset
+            if len(self._mid_prices) >= index + 1:
+                return
+        self._extend_histories(
+            length=max(
+                index + 1,
+                min(max(2 * len(self._mid_prices), self.chunk_size), max_length),
+            )
+        )
+
+    def _evict_until(self, time: int) -> None:
+        """evict the time steps before the time step from the histories. (Internal method)
+        Time steps still required for the cumulative sums and the last known prices are kept.
+        With the "summary" retention, the evicted time steps are compacted into summaries.
+
+        Args:
+            time (int): first time step to be kept.
+
+        Returns:
+            None
+        """
+        required_times: List[int] = [time]
+        if self._n_closed_steps > 0:
+            required_times.append(self._n_closed_steps - 1)
+        required_times.extend(t for t in self._last_known_times.values() if t >= 0)
+        time = min(required_times)
+        shift: int = time - self._history_offset
+        if shift <= 0:
+            return
+        # statistics must catch up before their inputs are evicted
+        self.stats._sync_closed_steps()
+        if self.history_retention == "summary":
+            self._summarize(start=self._history_offset, stop=time)
+        for name, fill_value in _HISTORIES:
+            values: np.ndarray = getattr(self, name)
+            if shift >= len(values):
+                values[:] = fill_value
+            else:
+                values[: len(values) - shift] = values[shift:]
+                values[len(values) - shift :] = fill_value
+        self._history_offset = time
+
+    def _summarize(self, start: int, stop: int) -> None:
+        """compact time steps into per-interval summaries. (Internal method)
+        Summaries are aligned to multiples of :attr:`history_summary_interval` time steps.
+        A summary partially compacted is updated when the rest of its time steps are evicted.
+
+        Args:
+            start (int): first time step.
+            stop (int): time step to stop before (exclusive).
+
+        Returns:
+            None
+        """
+        interval: int = cast(int, self.history_summary_interval)
+        first: int = start // interval
+        last: int = (stop - 1) // interval
+        if last + 1 > len(self._summaries["open"]):
+            length: int = max(last + 1, 2 * len(self._summaries["open"]))
+            for name, dtype, fill_value in _SUMMARY_FIELDS:
+                self._summaries[name] = _extend_array(
+                    values=self._summaries[name],
+                    length=length,
+                    fill_value=fill_value,
+                    dtype=dtype,
+                )
+        for summary_index in range(first, last + 1):
+            begin: int = max(summary_index * interval, start) - self._history_offset
+            end: int = min((summary_index + 1) * interval, stop) - self._history_offset
+            prices: np.ndarray = self._market_prices[begin:end]
+            prices = prices[~np.isnan(prices)]
+            if len(prices) > 0:
+                if np.isnan(self._summaries["open"][summary_index]):
+                    self._summaries["open"][summary_index] = prices[0]
+                self._summaries["high"][summary_index] = np.fmax(
+                    self._summaries["high"][summary_index], prices.max()
+                )
+                self._summaries["low"][summary_index] = np.fmin(
+                    self._summaries["low"][summary_index], prices.min()
+                )
+                self._summaries["close"][summary_index] = prices[-1]
+            self._summaries["volume"][summary_index] += self._executed_volumes[
+                begin:end
+            ].sum()
+            self._summaries["total_price"][
+                summary_index
+            ] += self._executed_total_prices[begin:end].sum()
+            self._summaries["n_buy_orders"][summary_index] += self._n_buy_orders[
+                begin:end
+            ].sum()
+            self._summaries["n_sell_orders"][summary_index] += self._n_sell_orders[
+                begin:end
+            ].sum()
+        self._n_summaries = last + 1
+
+    def get_history_summaries(self) -> Dict[str, np.ndarray]:
+        """get the summaries of the time steps evicted from the histories.
+        This is available with the "summary" retention. The i-th summary covers the time steps
+        from i * :attr:`history_summary_interval` (inclusive) to (i + 1) * :attr:`history_summary_interval` (exclusive).
+        The last summary only covers the evicted time steps if the rest of the interval is still retained.
+
+        Returns:
+            Dict[str, np.ndarray]: copies of the summaries. The keys are "time" (the first time step of each summary),
+            "open", "high", "low" and "close" (of market prices, nan if unknown), "volume", "total_price", "vwap"
+            (nan if no order is executed), "n_buy_orders" and "n_sell_orders".
+        """
+        if self.history_retention != "summary":
+            raise AssertionError("summaries are only available with summary retention")
+        n: int = self._n_summaries
+        summaries: Dict[str, np.ndarray] = {
+            name: self._summaries[name][:n].copy() for name, _, _ in _SUMMARY_FIELDS
+        }
+        summaries["time"] = np.arange(n) * cast(int, self.history_summary_interval)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            summaries["vwap"] = np.where(
+                summaries["volume"] > 0,
+                summaries["total_price"] / summaries["volume"],
+                np.nan,
+            )
+        return summaries
+
+    def _reserve(self, length: int) -> None:
+        """preallocate the histories for the number of time steps. (Usually, only triggered by runner)
+        If old time steps can be evicted, the length is limited to twice the window.
+
+        Args:
+            length (int): the number of time steps to be stored.
+
+        Returns:
+            None
+        """
+        if self.history_window is not None:
+            length = min(length, 2 * (self.history_window + 1))
+        self._extend_histories(length=length)
+
+    def _extend_histories(self, length: int) -> None:
+        """extend the histories to the length. (Internal method)
+        If :attr:`history_directory` is set, the histories are moved to or extended in memory-mapped files.
+
+        Args:
+            length (int): length of the histories.
+
+        Returns:
+            None
+        """
+        for name, fill_value in _HISTORIES:
+            values: np.ndarray = getattr(self, name)
+            if self.history_directory is None:
+                setattr(
+                    self,
+                    name,
+                    _extend_array(values=values, length=length, fill_value=fill_value),
+                )
+            else:
+                setattr(
+                    self,
+                    name,
+                    extend_memmap(
+                        path=os.path.join(
+                            self.history_directory, name.lstrip("_") + ".npy"
+                        ),
+                        values=values,
+                        length=max(length, len(values)),
+                        fill_value=fill_value,
+                    ),
+                )
+
+    def _release_histories(self, time: int) -> None:
+        """flush and unmap the histories if they may exceed the resident-memory ceiling. (Internal method)
+        The pages of the completed time steps are released and mapped again only when they are referred.
+
+        Args:
+            time (int): current time step.
+
+        Returns:
+            None
+        """
+        if self.history_memory_limit is None or self.history_directory is None:
+            return
+        bytes_per_step: int = sum(
+            getattr(self, name).itemsize for name, _ in _HISTORIES
+        )
+        if (
+            abs(time - self._resident_from) * bytes_per_step
+            <= self.history_memory_limit
+        ):
+            return
+        for name, _ in _HISTORIES:
+            setattr(self, name, remap_memmap(values=getattr(self, name)))
+        self._resident_from = time
+
+    def flush_histories(self) -> None:
+        """write the histories back to the memory-mapped files.
+        This does nothing if :attr:`history_directory` is not set.
+
+        Returns:
+            None
+        """
+        if self.history_directory is None:
+            return
+        for name, _ in _HISTORIES:
+            values: np.ndarray = getattr(self, name)
+            if isinstance(values, np.memmap):
+                values.flush()
+
+    def snapshot(self, memo: Optional[Dict[int, Any]] = None) -> Dict[str, Any]:
+        """take a snapshot of the market state.
+        The snapshot contains the order books, the histories until the current time step, the PRNG state and the counters.
+        Only the used part of the histories is copied, and the copies are read-only so that a snapshot can be restored many times.
+
+        Args:
+            memo (Dict[int, Any], Optional): memo dictionary for :func:`copy.deepcopy`.
+                                             It is shared to keep the identity of orders referred from other objects.
+
+        Returns:
+            Dict[str, Any]: snapshot. This should be passed to :func:`pams.market.Market.restore`.
+        """
+        if memo is None:
+            memo = {}
+        self._refresh_prices()
+        length: int = max(self.time + 1, self._n_closed_steps, 1) - self._history_offset
+        histories: Dict[str, np.ndarray] = {}
+        for name, _ in _HISTORIES:
+            values: np.ndarray = np.array(getattr(self, name)[:length])
+            values.flags.writeable = False
+            histories[name] = values
+        return {
+            "time": self.time,
+            "is_running": self._is_running,
+            "next_order_id": self._next_order_id,
+            "n_rounded_prices": self.n_rounded_prices,
+            "n_closed_steps": self._n_closed_steps,
+            "last_known_times": dict(self._last_known_times),
+            "prng_state": self._prng.getstate(),
+            "history_offset": self._history_offset,
+            "histories": histories,
+            "summaries": {
+                name: values[: self._n_summaries].copy()
+                for name, values in self._summaries.items()
+            },
+            "order_books": copy.deepcopy(
+                (self.buy_order_book, self.sell_order_book), memo
             ),
+        }
+
+    def restore(
+        self, snapshot: Dict[str, Any], memo: Optional[Dict[int, Any]] = None
+    ) -> None:
+        """restore the market state from a snapshot.
+        The histories are overwritten in place, and the order books are copied from the snapshot.
+
+        Args:
+            snapshot (Dict[str, Any]): snapshot taken by :func:`pams.market.Market.snapshot`.
+            memo (Dict[int, Any], Optional): memo dictionary for :func:`copy.deepcopy`.
+                                             It is shared to keep the identity of orders referred from other objects.
+
+        Returns:
+            None
+        """
+        if memo is None:
+            memo = {}
+        for name, fill_value in _HISTORIES:
+            values: np.ndarray = snapshot["histories"][name]
+            if len(getattr(self, name)) < len(values):
+                self._extend_histories(length=len(values))
+            current: np.ndarray = getattr(self, name)
+            current[: len(values)] = values
+            current[len(values) :] = fill_value
+        self.time = snapshot["time"]
+        self._is_price_stale = False
+        self._running = snapshot["is_running"]
+        self._next_order_id = snapshot["next_order_id"]
+        self.n_rounded_prices = snapshot["n_rounded_prices"]
+        self._n_closed_steps = snapshot["n_closed_steps"]
+        self._last_known_times = dict(snapshot["last_known_times"])
+        self._prng.setstate(snapshot["prng_state"])
+        self._history_offset = snapshot["history_offset"]
+        self._summaries = {
+            name: values.copy() for name, values in snapshot["summaries"].items()
+        }
+        self._n_summaries = len(self._summaries["open"])
+        self.buy_order_book, self.sell_order_book = copy.deepcopy(
+            snapshot["order_books"], memo
         )
+        self.stats = MarketStatistics(market=self)
 
-    def _fill_until(self, time: int) -> None:
-        if len(self._mid_prices) >= time + 1:
+    def _close_steps(self, time: int) -> None:
+        """close the time steps before the next time step and update the cumulative sums. (Internal method)
+        When the time step goes back, the time steps after the next time step are reopened.
+
+        Args:
+            time (int): next time step.
+
+        Returns:
+            None
+        """
+        closed: int = self._n_closed_steps
+        if time <= closed:
+            self._n_closed_steps = max(time, 0)
             return
-        length = (time // self.chunk_size + 1) * self.chunk_size
-        self._market_prices = self._market_prices + [
-            None for _ in range(length - len(self._market_prices))
-        ]
-        self._mid_prices = self._mid_prices + [
-            None for _ in range(length - len(self._mid_prices))
-        ]
-        self._last_executed_prices = self._last_executed_prices + [
-            None for _ in range(length - len(self._last_executed_prices))
-        ]
-        self._fundamental_prices = self._fundamental_prices + [
-            None for _ in range(length - len(self._fundamental_prices))
-        ]
-        self._executed_volumes = self._executed_volumes + [
-            0 for _ in range(length - len(self._executed_volumes))
-        ]
-        self._executed_total_prices = self._executed_total_prices + [
-            0 for _ in range(length - len(self._executed_total_prices))
-        ]
-        self._n_buy_orders = self._n_buy_orders + [
-            0 for _ in range(length - len(self._n_buy_orders))
-        ]
-        self._n_sell_orders = self._n_sell_orders + [
-            0 for _ in range(length - len(self._n_sell_orders))
-        ]
+        self._fill_until(time=time)
+        begin: int = closed - self._history_offset
+        end: int = time - self._history_offset
+        for cumulative, values in [
+            (self._cumulative_executed_volumes, self._executed_volumes),
+            (self._cumulative_executed_total_prices, self._executed_total_prices),
+            (self._cumulative_n_buy_orders, self._n_buy_orders),
+            (self._cumulative_n_sell_orders, self._n_sell_orders),
+        ]:
+            base = cumulative[begin - 1] if closed > 0 else 0
+            if time == closed + 1:
+                cumulative[begin] = base + values[begin]
+            else:
+                cumulative[begin:end] = base + np.cumsum(values[begin:end])
+        self._n_closed_steps = time
 
-    def get_vwap(self, time: Optional[int] = None) -> float:
-        """get VWAP.
+    def _get_range_sum(
+        self, cumulative: np.ndarray, values: np.ndarray, start: int, end: Optional[int]
+    ) -> Any:
+        """get the sum of a history in a range of time steps in O(1). (Internal method)
 
         Args:
-            time (int, Optional): time step.
+            cumulative (np.ndarray): cumulative sums of the history.
+            values (np.ndarray): history.
+            start (int): first time step.
+            end (int, Optional): last time step (inclusive). If it is None, the current time step is used.
 
         Returns:
-            float: VWAP.
+            Any: the sum.
         """
-        if time is None:
-            time = self.time
-        if time > self.time:
+        if end is None:
+            end = self.time
+        if end > self.time:
             raise AssertionError("Cannot refer the future parameters")
-        if sum(self._executed_volumes[: time + 1]) == 0:
+        start = max(start, 0)
+        if start > end:
+            return values.dtype.type(0)
+        offset: int = self._history_offset
+        if start > 0:
+            self._check_evicted(time=start - 1)
+
+        def _prefix_sum(time: int) -> Any:
+            if time < 0:
+                return values.dtype.type(0)
+            if time < self._n_closed_steps:
+                return cumulative[time - offset]
+            result = (
+                cumulative[self._n_closed_steps - 1 - offset]
+                if self._n_closed_steps > 0
+                else 0
+            )
+            return (
+                result + values[self._n_closed_steps - offset : time + 1 - offset].sum()
+            )
+
+        return _prefix_sum(end) - _prefix_sum(start - 1)
+
+    def get_executed_volume_sum(self, start: int = 0, end: Optional[int] = None) -> int:
+        """get the sum of executed volumes in a range of time steps.
+
+        Args:
+            start (int): first time step (default 0).
+            end (int, Optional): last time step (inclusive). If it is None, the current time step is used.
+
+        Returns:
+            int: the sum of executed volumes.
+        """
+        return int(
+            self._get_range_sum(
+                cumulative=self._cumulative_executed_volumes,
+                values=self._executed_volumes,
+                start=start,
+                end=end,
+            )
+        )
+
+    def get_executed_total_price_sum(
+        self, start: int = 0, end: Optional[int] = None
+    ) -> float:
+        """get the sum of executed total prices (turnover) in a range of time steps.
+
+        Args:
+            start (int): first time step (default 0).
+            end (int, Optional): last time step (inclusive). If it is None, the current time step is used.
+
+        Returns:
+            float: the sum of executed total prices.
+        """
+        return float(
+            self._get_range_sum(
+                cumulative=self._cumulative_executed_total_prices,
+                values=self._executed_total_prices,
+                start=start,
+                end=end,
+            )
+        )
+
+    def get_n_buy_order_sum(self, start: int = 0, end: Optional[int] = None) -> int:
+        """get the total number of buy orders in a range of time steps.
+
+        Args:
+            start (int): first time step (default 0).
+            end (int, Optional): last time step (inclusive). If it is None, the current time step is used.
+
+        Returns:
+            int: the total number of buy orders.
+        """
+        return int(
+            self._get_range_sum(
+                cumulative=self._cumulative_n_buy_orders,
+                values=self._n_buy_orders,
+                start=start,
+                end=end,
+            )
+        )
+
+    def get_n_sell_order_sum(self, start: int = 0, end: Optional[int] = None) -> int:
+        """get the total number of sell orders in a range of time steps.
+
+        Args:
+            start (int): first time step (default 0).
+            end (int, Optional): last time step (inclusive). If it is None, the current time step is used.
+
+        Returns:
+            int: the total number of sell orders.
+        """
+        return int(
+            self._get_range_sum(
+                cumulative=self._cumulative_n_sell_orders,
+                values=self._n_sell_orders,
+                start=start,
+                end=end,
+            )
+        )
+
+    def get_vwap(self, time: Optional[int] = None, start: int = 0) -> float:
+        """get VWAP.
+
+        Args:
+            time (int, Optional): last time step (inclusive). If it is None, the current time step is used.
+            start (int): first time step (default 0).
+
+        Returns:
+            float: VWAP between the time steps. nan if no order is executed.
+        """
+        executed_volume: int = self.get_executed_volume_sum(start=start, end=time)
+        if executed_volume == 0:
             return float("nan")
-        return sum(self._executed_total_prices[: time + 1]) / sum(
-            self._executed_volumes[: time + 1]
+        return (
+            self.get_executed_total_price_sum(start=start, end=time) / executed_volume
         )
 
     @property
@@ -461,6 +1320,18 @@ class Market:
         """
         return self._is_running
 
+    @property
+    def _is_running(self) -> bool:
+        """whether this market is running or not. (Internal property)
+        Stale prices are recomputed before this is changed because this affects the market price.
+        """
+        return self._running
+
+    @_is_running.setter
+    def _is_running(self, is_running: bool) -> None:
+        self._refresh_prices()
+        self._running = is_running
+
     def get_best_buy_price(self) -> Optional[float]:
         """get the best buy price.
 
@@ -493,6 +1364,61 @@ class Market:
         """
         return self.buy_order_book.get_price_volume()
 
+    def get_depth(
+        self, levels: int, is_buy: bool, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """get prices and volumes of the best price levels on one side.
+        Market orders are not included.
+
+        Args:
+            levels (int): the number of price levels.
+            is_buy (bool): buy side or not.
+            out (np.ndarray, Optional): preallocated array with the shape of (2, levels) to store the result.
+
+        Returns:
+            np.ndarray: array with the shape of (2, levels). The first row is prices from the best one
+                        and the second row is their volumes. Missing levels are filled with nan prices and zero volumes.
+        """
+        return (self.buy_order_book if is_buy else self.sell_order_book).get_depth(
+            levels=levels, out=out
+        )
+
+    def get_l2_snapshot(
+        self, levels: int, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """get prices and volumes of the best price levels on both sides.
+        Market orders are not included.
+
+        Args:
+            levels (int): the number of price levels.
+            out (np.ndarray, Optional): preallocated array with the shape of (2, 2, levels) to store the result.
+
+        Returns:
+            np.ndarray: array with the shape of (2, 2, levels). The first axis is buy side and sell side,
+                        and the rest is the same as :func:`pams.market.Market.get_depth`.
+        """
+        if out is None:
+            out = np.empty((2, 2, levels), dtype=np.float64)
+        elif out.shape != (2, 2, levels):
+            raise ValueError(f"out must have the shape of (2, 2, {levels})")
+        self.buy_order_book.get_depth(levels=levels, out=out[0])
+        self.sell_order_book.get_depth(levels=levels, out=out[1])
+        return out
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        """get an order remaining in the order books by order ID.
+
+        Args:
+            order_id (int): order ID.
+
+        Returns:
+            :class:`pams.order.Order`, Optional: the order if it remains in the order books.
+        """
+        order: Optional[Order] = self.buy_order_book.get_order(order_id=order_id)
+        if order is None:
+            order = self.sell_order_book.get_order(order_id=order_id)
+        return order
+
     def convert_to_tick_level_rounded_lower(self, price: float) -> int:
         """convert price to tick level rounded lower.
 
@@ -541,8 +1467,126 @@ class Market:
         """
         return self.tick_size * tick_level
 
+    def _round_to_tick(self, price: float, is_buy: bool) -> float:
+        """round an order price to the tick size. (Internal method)
+        Prices on the tick grid (up to floating point errors) are snapped to the nearest tick level.
+        The other prices are rounded by :func:`pams.market.Market.convert_to_tick_level` and counted in :attr:`n_rounded_prices`.
+
+        Args:
+            price (float): order price.
+            is_buy (bool): buy order or not.
+
+        Returns:
+            float: price on the tick grid.
+        """
+        tick_level_float: float = price / self.tick_size
+        tick_level: int = round(tick_level_float)
+        if not math.isclose(tick_level_float, tick_level, rel_tol=1e-12, abs_tol=1e-9):
+            tick_level = self.convert_to_tick_level(price=price, is_buy=is_buy)
+            self.n_rounded_prices += 1
+            if self.warn_price_rounding:
+                warnings.warn(
+                    "order price does not accord to the tick size. price will be modified"
+                )
+        return self.convert_to_price(tick_level=tick_level)
+
+    def _set_time_on_order_books(self, time: int) -> None:
+        """set time step on order books and write expiration logs. (Internal method)
+        Expiration logs are only created when a logger is attached.
+
+        Args:
+            time (int): time step.
+
+        Returns:
+            None
+        """
+        with_logs: bool = self.logger is not None
+        logs: List[ExpirationLog] = self.buy_order_book._set_time(
+            time, with_logs=with_logs
+        )
+        logs.extend(self.sell_order_book._set_time(time, with_logs=with_logs))
+        if self.logger is not None:
+            for log in logs:
+                log.read_and_write(logger=self.logger)
+
+    def _update_last_known_times(self, time: int) -> None:
+        """update the last time steps whose prices are known before the next time step. (Internal method)
+        When the time step advances, only the time steps skipped are checked.
+        Otherwise, the histories are searched backward from the next time step.
+
+        Args:
+            time (int): next time step.
+
+        Returns:
+            None
+        """
+        offset: int = self._history_offset
+        for name, last_known_time in self._last_known_times.items():
+            prices: np.ndarray = getattr(self, name)
+            if time == self.time + 1:
+                if self.time >= 0 and not math.isnan(prices[self.time - offset]):
+                    last_known_time = self.time
+            elif time > self.time:
+                known_times: np.ndarray = np.flatnonzero(
+                    ~np.isnan(prices[max(self.time, 0) - offset : time - offset])
+                )
+                if len(known_times) > 0:
+                    last_known_time = max(self.time, 0) + int(known_times[-1])
+            else:
+                last_known_time = _find_last_known_time(
+                    prices=prices, end=time - offset
+                )
+                if last_known_time >= 0:
+                    last_known_time += offset
+            self._last_known_times[name] = last_known_time
+
+    def _get_last_known_price(self, name: str) -> float:
+        """get the last known price before the current time step. (Internal method)
+
+        Args:
+            name (str): attribute name of the price history.
+
+        Returns:
+            float: the last known price. nan if no price is known.
+        """
+        last_known_time: int = self._last_known_times[name]
+        if last_known_time < 0:
+            return np.nan
+        return getattr(self, name)[last_known_time - self._history_offset]
+
+    def _write_order_book_feed(self) -> None:
+        """write the order book feed of the current time step. (Internal method)
+        The changes of price levels during the time step are written as :class:`pams.logs.OrderBookDeltaLog`
+        and the whole order books are written as :class:`pams.logs.OrderBookSnapshotLog` every keyframe interval.
+
+        Returns:
+            None
+        """
+        if not self.order_book_feed or self.logger is None or self.time < 0:
+            return
+        changes: List[Tuple[bool, Optional[float], int]] = [
+            (True, price, volume)
+            for price, volume in self.buy_order_book._pop_level_changes()
+        ]
+        changes.extend(
+            (False, price, volume)
+            for price, volume in self.sell_order_book._pop_level_changes()
+        )
+        if len(changes) > 0:
+            OrderBookDeltaLog(
+                market_id=self.market_id, time=self.time, changes=changes
+            ).read_and_write(logger=self.logger)
+        if self.time % self.order_book_keyframe_interval == 0:
+            OrderBookSnapshotLog(
+                market_id=self.market_id,
+                time=self.time,
+                buy_price_volume=self.buy_order_book.get_price_volume(),
+                sell_price_volume=self.sell_order_book.get_price_volume(),
+            ).read_and_write(logger=self.logger)
+
     def _set_time(self, time: int, next_fundamental_price: float) -> None:
         """set time step. (Usually, only triggered by simulator)
+        The last known prices are carried forward in O(1) for the time step jumping forward.
 
         Args:
             time (int): time step.
@@ -551,50 +1595,31 @@ class Market:
         Returns:
             None
         """
+        if time < self.time and time > 0:
+            # the time step before the new time step is required to carry prices forward
+            self._check_evicted(time=time - 1)
+        self._refresh_prices()
+        self._write_order_book_feed()
+        self._update_last_known_times(time=time)
+        self._close_steps(time=time)
         self.time = time
-        logs: List[ExpirationLog] = self.buy_order_book._set_time(time)
-        if self.logger is not None:
-            for log in logs:
-                log.read_and_write(logger=self.logger)
-        logs_: List[ExpirationLog] = self.sell_order_book._set_time(time)
-        if self.logger is not None:
-            for log_ in logs_:
-                log_.read_and_write(logger=self.logger)
+        self._set_time_on_order_books(time=time)
         self._fill_until(time=time)
-        self._fundamental_prices[self.time] = next_fundamental_price
+        index: int = self.time - self._history_offset
+        self._fundamental_prices[index] = next_fundamental_price
         if self.time > 0:
-            executed_prices: List[float] = cast(
-                List[float],
-                list(
-                    filter(
-                        lambda x: x is not None, self._last_executed_prices[: self.time]
-                    )
-                ),
-            )
-            self._last_executed_prices[self.time] = (
-                executed_prices[-1] if sum(executed_prices) > 0 else None
-            )
-            mid_prices: List[float] = cast(
-                List[float],
-                list(filter(lambda x: x is not None, self._mid_prices[: self.time])),
-            )
-            self._mid_prices[self.time] = (
-                mid_prices[-1] if sum(mid_prices) > 0 else None
+            self._last_executed_prices[index] = self._get_last_known_price(
+                name="_last_executed_prices"
             )
-            market_prices: List[float] = cast(
-                List[float],
-                list(filter(lambda x: x is not None, self._market_prices[: self.time])),
-            )
-            self._market_prices[self.time] = (
-                market_prices[-1] if sum(market_prices) > 0 else None
+            self._mid_prices[index] = self._get_last_known_price(name="_mid_prices")
+            self._market_prices[index] = self._get_last_known_price(
+                name="_market_prices"
             )
             if self.is_running:
-                if self._last_executed_prices[self.time - 1] is not None:
-                    self._market_prices[self.time] = self._last_executed_prices[
-                        self.time
-                    ]
-                elif self._mid_prices[self.time - 1] is not None:
-                    self._market_prices[self.time] = self._mid_prices[self.time]
+                if not math.isnan(self._last_executed_prices[index - 1]):
+                    self._market_prices[index] = self._last_executed_prices[index]
+                elif not math.isnan(self._mid_prices[index - 1]):
+                    self._market_prices[index] = self._mid_prices[index]
 
     def _update_time(self, next_fundamental_price: float) -> None:
         """update time. (Usually, only triggered by simulator)
@@ -605,33 +1630,27 @@ class Market:
         Returns:
             None
         """
+        self._refresh_prices()
+        self._write_order_book_feed()
+        self._update_last_known_times(time=self.time + 1)
+        self._close_steps(time=self.time + 1)
         self.time += 1
-        logs: List[ExpirationLog] = self.buy_order_book._set_time(self.time)
-        if self.logger is not None:
-            for log in logs:
-                log.read_and_write(logger=self.logger)
-        logs_: List[ExpirationLog] = self.sell_order_book._set_time(self.time)
-        if self.logger is not None:
-            for log_ in logs_:
-                log_.read_and_write(logger=self.logger)
+        self._set_time_on_order_books(time=self.time)
         self._fill_until(time=self.time)
-        self._fundamental_prices[self.time] = next_fundamental_price
+        index: int = self.time - self._history_offset
+        self._fundamental_prices[index] = next_fundamental_price
         if self.time > 0:
-            self._last_executed_prices[self.time] = self._last_executed_prices[
-                self.time - 1
-            ]
-            self._mid_prices[self.time] = self._mid_prices[self.time - 1]
-            self._market_prices[self.time] = self._market_prices[self.time - 1]
+            self._last_executed_prices[index] = self._last_executed_prices[index - 1]
+            self._mid_prices[index] = self._mid_prices[index - 1]
+            self._market_prices[index] = self._market_prices[index - 1]
             if self.is_running:
-                if self._last_executed_prices[self.time - 1] is not None:
-                    self._market_prices[self.time] = self._last_executed_prices[
-                        self.time - 1
-                    ]
-                elif self._mid_prices[self.time - 1] is not None:
-                    self._market_prices[self.time] = self._mid_prices[self.time - 1]
+                if not math.isnan(self._last_executed_prices[index - 1]):
+                    self._market_prices[index] = self._last_executed_prices[index - 1]
+                elif not math.isnan(self._mid_prices[index - 1]):
+                    self._market_prices[index] = self._mid_prices[index - 1]
         else:
-            if self._market_prices[self.time] is None:
-                self._market_prices[self.time] = next_fundamental_price
+            if math.isnan(self._market_prices[index]):
+                self._market_prices[index] = next_fundamental_price
 
     def _cancel_order(self, cancel: Cancel) -> CancelLog:
         """cancel order. (Usually, only triggered by simulator)
@@ -646,12 +1665,16 @@ class Market:
             raise ValueError("this cancel order is for a different market")
         if cancel.order.order_id is None or cancel.order.placed_at is None:
             raise ValueError("the order is not submitted before")
-        (self.buy_order_book if cancel.order.is_buy else self.sell_order_book).cancel(
-            cancel=cancel
+        order_book: OrderBook = (
+            self.buy_order_book if cancel.order.is_buy else self.sell_order_book
         )
+        if len(order_book) <= 1:
+            # the market price keeps the last mid price before a side of the order books becomes empty
+            self._refresh_prices()
+        order_book.cancel(cancel=cancel)
         if cancel.placed_at is None:
             raise AssertionError
-        self._update_market_price()
+        self._is_price_stale = True
 
         log: CancelLog = CancelLog(
             order_id=cancel.order.order_id,
@@ -669,23 +1692,31 @@ class Market:
             log.read_and_write(logger=self.logger)
         return log
 
+    def _refresh_prices(self) -> None:
+        """recompute the mid price and the market price of the current time step if they are stale. (Internal method)
+        This is called before the prices are read and before the time step changes.
+
+        Returns:
+            None
+        """
+        if self._is_price_stale:
+            self._is_price_stale = False
+            self._update_market_price()
+
     def _update_market_price(self) -> None:
         """update market price. (Internal method)"""
         best_buy_price: Optional[float] = self.get_best_buy_price()
         best_sell_price: Optional[float] = self.get_best_sell_price()
+        index: int = self.time - self._history_offset
         if best_buy_price is None or best_sell_price is None:
-            self._mid_prices[self.time] = None
+            self._mid_prices[index] = np.nan
         else:
-            self._mid_prices[self.time] = (
-                (best_sell_price + best_buy_price) / 2.0
-                if best_sell_price is not None and best_buy_price is not None
-                else None
-            )
+            self._mid_prices[index] = (best_sell_price + best_buy_price) / 2.0
         if self.is_running:
-            if self._last_executed_prices[self.time] is not None:
-                self._market_prices[self.time] = self._last_executed_prices[self.time]
-            elif self._mid_prices[self.time] is not None:
-                self._market_prices[self.time] = self._mid_prices[self.time]
+            if not math.isnan(self._last_executed_prices[index]):
+                self._market_prices[index] = self._last_executed_prices[index]
+            elif not math.isnan(self._mid_prices[index]):
+                self._market_prices[index] = self._mid_prices[index]
 
     def _execute_orders(
         self, price: float, volume: int, buy_order: Order, sell_order: Order
@@ -730,10 +1761,11 @@ class Market:
         self.buy_order_book.change_order_volume(order=buy_order, delta=-volume)
         self.sell_order_book.change_order_volume(order=sell_order, delta=-volume)
 
-        self._last_executed_prices[self.time] = price
-        self._executed_volumes[self.time] += volume
-        self._executed_total_prices[self.time] += volume * price
-        self._update_market_price()
+        index: int = self.time - self._history_offset
+        self._last_executed_prices[index] = price
+        self._executed_volumes[index] += volume
+        self._executed_total_prices[index] += volume * price
+        self._is_price_stale = True
 
         # ToDo: Agent modification will be handled in simulator
         if self.logger is not None:
@@ -755,24 +1787,18 @@ class Market:
             raise ValueError("the order is already submitted")
         if order.order_id is not None:
             raise ValueError("the order is already submitted")
-        if order.price is not None and order.price % self.tick_size != 0:
-            warnings.warn(
-                "order price does not accord to the tick size. price will be modified"
-            )
-            order.price = (
-                self.convert_to_tick_level(price=order.price, is_buy=order.is_buy)
-                * self.tick_size
-            )
+        if order.price is not None:
+            order.price = self._round_to_tick(price=order.price, is_buy=order.is_buy)
         order.order_id = self._next_order_id
         self._next_order_id += 1
         (self.buy_order_book if order.is_buy else self.sell_order_book).add(order=order)
         if order.placed_at != self.time:
             raise AssertionError
-        self._update_market_price()
+        self._is_price_stale = True
         if order.is_buy:
-            self._n_buy_orders[self.time] += 1
+            self._n_buy_orders[self.time - self._history_offset] += 1
         else:
-            self._n_sell_orders[self.time] += 1
+            self._n_sell_orders[self.time - self._history_offset] += 1
 
         log: OrderLog = OrderLog(
             order_id=order.order_id,
@@ -789,6 +1815,78 @@ class Market:
             log.read_and_write(logger=self.logger)
         return log
 
+    def _add_orders(self, batch: OrderBatch) -> List[Order]:
+        """add a batch of orders at once. (Usually, only triggered by runner)
+        Order prices are rounded to the tick size by vectorized operations.
+        Order IDs are set to :attr:`pams.order.OrderBatch.order_ids`.
+
+        Args:
+            batch (:class:`pams.order.OrderBatch`): batch of orders.
+
+        Returns:
+            List[:class:`pams.order.Order`]: orders added to the order books.
+        """
+        if batch.market_id != self.market_id:
+            raise ValueError("order is not for this market")
+        if batch.order_ids is not None or batch.placed_at is not None:
+            raise ValueError("the order is already submitted")
+        is_limit_order: np.ndarray = ~np.isnan(batch.price)
+        tick_level_float: np.ndarray = batch.price[is_limit_order] / self.tick_size
+        tick_levels: np.ndarray = np.round(tick_level_float)
+        # the same condition as math.isclose(rel_tol=1e-12, abs_tol=1e-9)
+        is_off_grid: np.ndarray = np.abs(tick_level_float - tick_levels) > np.maximum(
+            1e-12 * np.maximum(np.abs(tick_level_float), np.abs(tick_levels)), 1e-9
+        )
+        n_rounded_prices: int = int(np.count_nonzero(is_off_grid))
+        if n_rounded_prices > 0:
+            is_buy: np.ndarray = batch.is_buy[is_limit_order]
+            tick_levels[is_off_grid] = np.where(
+                is_buy[is_off_grid],
+                np.floor(tick_level_float[is_off_grid]),
+                np.ceil(tick_level_float[is_off_grid]),
+            )
+            self.n_rounded_prices += n_rounded_prices
+            if self.warn_price_rounding:
+                warnings.warn(
+                    "order price does not accord to the tick size. price will be modified"
+                )
+        batch.price[is_limit_order] = self.tick_size * tick_levels
+        orders: List[Order] = batch.to_orders()
+        batch.order_ids = np.arange(
+            self._next_order_id, self._next_order_id + len(orders), dtype=np.int64
+        )
+        for order, order_id in zip(orders, batch.order_ids.tolist()):
+            order.order_id = order_id
+            (self.buy_order_book if order.is_buy else self.sell_order_book).add(
+                order=order
+            )
+        self._next_order_id += len(orders)
+        batch.placed_at = self.time
+        self._is_price_stale = True
+        n_buy_orders: int = int(np.count_nonzero(batch.is_buy))
+        index: int = self.time - self._history_offset
+        self._n_buy_orders[index] += n_buy_orders
+        self._n_sell_orders[index] += len(orders) - n_buy_orders
+
+        if self.logger is not None:
+            self.logger.bulk_write(
+                logs=[
+                    OrderLog(
+                        order_id=cast(int, order.order_id),
+                        market_id=order.market_id,
+                        time=self.time,
+                        agent_id=order.agent_id,
+                        is_buy=order.is_buy,
+                        kind=order.kind,
+                        volume=order.volume,
+                        price=order.price,
+                        ttl=order.ttl,
+                    )
+                    for order in orders
+                ]
+            )
+        return orders
+
     def remain_executable_orders(self) -> bool:
         """check if there are remain executable orders in this market.
 
@@ -807,31 +1905,30 @@ class Market:
             else:
                 return True
         else:
-            sell_book: Dict[
-                Optional[float], int
-            ] = self.sell_order_book.get_price_volume()
-            buy_book: Dict[
-                Optional[float], int
-            ] = self.buy_order_book.get_price_volume()
-            if None not in sell_book or None not in buy_book:
+            # both best orders are market orders
+            sell_market_volume: int = self.sell_order_book.get_market_order_volume()
+            buy_market_volume: int = self.buy_order_book.get_market_order_volume()
+            if sell_market_volume == 0 or buy_market_volume == 0:
                 raise AssertionError
-            if sell_book[None] != buy_book[None]:
-                if sell_book[None] < buy_book[None]:
-                    additional_required_orders = buy_book[None] - sell_book[None]
-                    sell_book.pop(None)
-                    return len(sell_book) >= additional_required_orders
+            if sell_market_volume != buy_market_volume:
+                if sell_market_volume < buy_market_volume:
+                    additional_required_orders = buy_market_volume - sell_market_volume
+                    return (
+                        self.sell_order_book.get_n_price_levels()
+                        >= additional_required_orders
+                    )
                 else:
-                    additional_required_orders = sell_book[None] - buy_book[None]
-                    buy_book.pop(None)
-                    return len(buy_book) >= additional_required_orders
+                    additional_required_orders = sell_market_volume - buy_market_volume
+                    return (
+                        self.buy_order_book.get_n_price_levels()
+                        >= additional_required_orders
+                    )
             else:
-                sell_book.pop(None)
-                buy_book.pop(None)
-                if len(sell_book) == 0 or len(buy_book) == 0:
+                sell_best_price = self.sell_order_book.get_best_limit_price()
+                buy_best_price = self.buy_order_book.get_best_limit_price()
+                if sell_best_price is None or buy_best_price is None:
                     return False
-                return min(list(cast(Dict[float, int], sell_book).keys())) <= max(
-                    list(cast(Dict[float, int], buy_book).keys())
-                )
+                return sell_best_price <= buy_best_price
 
     def _execution(self) -> List[ExecutionLog]:
         """execute for market. (Usually, only triggered by runner)
@@ -843,11 +1940,12 @@ class Market:
             return []
         pending: List[Tuple[int, Order, Order]] = []
 
-        popped_buy_orders: List[Order] = []
-        popped_sell_orders: List[Order] = []
+        # orders are visited in the order of priority without modifying the order books.
+        # Fills are applied after the execution price is determined.
+        buy_orders: Iterator[Order] = self.buy_order_book._iter_orders()
+        sell_orders: Iterator[Order] = self.sell_order_book._iter_orders()
 
-        buy_order: Order = heapq.heappop(self.buy_order_book.priority_queue)
-        popped_buy_orders.append(buy_order)
+        buy_order: Order = next(buy_orders)
         sell_order: Order
         buy_order_volume_tmp: int = buy_order.volume
         sell_order_volume_tmp: int = 0
@@ -856,18 +1954,18 @@ class Market:
             if buy_order_volume_tmp != 0 and sell_order_volume_tmp != 0:
                 raise AssertionError
             if buy_order_volume_tmp == 0:
-                if len(self.buy_order_book.priority_queue) == 0:
+                next_buy_order: Optional[Order] = next(buy_orders, None)
+                if next_buy_order is None:
                     break
-                buy_order = heapq.heappop(self.buy_order_book.priority_queue)
-                popped_buy_orders.append(buy_order)
+                buy_order = next_buy_order
                 buy_order_volume_tmp = buy_order.volume
                 if buy_order_volume_tmp == 0:
                     raise AssertionError
             if sell_order_volume_tmp == 0:
-                if len(self.sell_order_book.priority_queue) == 0:
+                next_sell_order: Optional[Order] = next(sell_orders, None)
+                if next_sell_order is None:
                     break
-                sell_order = heapq.heappop(self.sell_order_book.priority_queue)
-                popped_sell_orders.append(sell_order)
+                sell_order = next_sell_order
                 sell_order_volume_tmp = sell_order.volume
                 if sell_order_volume_tmp == 0:
                     raise AssertionError
@@ -916,17 +2014,8 @@ class Market:
                 pending.append((volume, buy_order, sell_order))
         if price is None:
             raise AssertionError
-        # TODO: faster impl
-        self.buy_order_book.priority_queue = [
-            *popped_buy_orders,
-            *self.buy_order_book.priority_queue,
-        ]
-        self.sell_order_book.priority_queue = [
-            *popped_sell_orders,
-            *self.sell_order_book.priority_queue,
-        ]
-        heapq.heapify(self.buy_order_book.priority_queue)
-        heapq.heapify(self.sell_order_book.priority_queue)
+        # fully filled orders are at the top of the order books and removed there.
+        # partially filled ones are left in place.
         logs: List[ExecutionLog] = list(
             map(
                 lambda x: self._execute_orders(
@@ -946,6 +2035,8 @@ class Market:
 
     def change_fundamental_price(self, scale: float) -> None:
         """change fundamental price.
+        The fundamental prices from the current time step onward are rescaled without regenerating them
+        (see :func:`pams.fundamentals.Fundamentals.rescale_prices`).
 
         Args:
             scale (float): scale.
@@ -956,6 +2047,7 @@ class Market:
         time: int = self.time
         current_fundamental: float = self.get_fundamental_price(time=time)
         new_fundamental: float = current_fundamental * scale
-        self._fundamental_prices[time] = new_fundamental
-        self.simulator.fundamentals.prices[self.market_id][time] = new_fundamental
-        self.simulator.fundamentals._generated_until = time
+        self._fundamental_prices[time - self._history_offset] = new_fundamental
+        self.simulator.fundamentals.rescale_prices(
+            market_id=self.market_id, scale=scale, time=time
+        )
@@ -0,0 +1,240 @@
+import math
+from typing import Dict
+from typing import Tuple
+
+import numpy as np
+
+
+class MarketStatistics:
+    """Rolling statistics of a market.
+
+    Statistics are computed at the current time step of the market and shared by all agents referring to the market.
+    Log prices and the cumulative sums of squared log returns are maintained incrementally for closed time steps,
+    and results are memoized until the time step or the current market price changes.
+    Time steps whose market prices are unknown are ignored in the realized volatility and the EMA.
+    When the market evicts old time steps, the statistics catch up before the eviction so that the results are unchanged,
+    but windows reaching evicted time steps are rejected.
+
+    This class is usually accessed via :attr:`pams.market.Market.stats`.
+    """
+
+    def __init__(self, market: "Market") -> None:  # type: ignore  # NOQA
+        """initialization.
+
+        Args:
+            market (:class:`pams.market.Market`): market.
+
+        Returns:
+            None
+        """
+        self.market: "Market" = market  # type: ignore  # NOQA
+        # log market prices and cumulative sums of squared log returns for the time steps from _offset to _n_steps
+        self._log_prices: np.ndarray = np.empty(0, dtype=np.float64)
+        self._cumulative_squared_returns: np.ndarray = np.empty(0, dtype=np.float64)
+        self._offset: int = 0
+        self._n_steps: int = 0
+        # EMA of market prices for the time steps before _n_steps for each span
+        self._emas: Dict[int, Tuple[int, float]] = {}
+        self._cache: Dict[Tuple[str, int], float] = {}
+        self._cache_key: Tuple[int, float, float] = (-1, math.nan, math.nan)
+
+    def _sync_closed_steps(self) -> None:
+        """catch up with the closed time steps of the market. (Internal method)"""
+        market = self.market
+        n_closed_steps: int = market._n_closed_steps
+        if n_closed_steps < self._n_steps:
+            # the time step went back
+            self._n_steps = n_closed_steps
+            self._emas = {}
+            return
+        if n_closed_steps == self._n_steps:
+            return
+        history_offset: int = market._history_offset
+        if self._n_steps < history_offset:
+            # the time steps to catch up are already evicted
+            self._offset = history_offset
+            self._n_steps = history_offset
+        elif self._offset < history_offset:
+            shift: int = history_offset - self._offset
+            self._log_prices = self._log_prices[shift:]
+            self._cumulative_squared_returns = self._cumulative_squared_returns[shift:]
+            self._offset = history_offset
+        start: int = self._n_steps - self._offset
+        stop: int = n_closed_steps - self._offset
+        if len(self._log_prices) < stop:
+            length: int = max(stop, 2 * len(self._log_prices))
+            log_prices = np.full(length, np.nan)
+            log_prices[:start] = self._log_prices[:start]
+            self._log_prices = log_prices
+            cumulative = np.zeros(length)
+            cumulative[:start] = self._cumulative_squared_returns[:start]
+            self._cumulative_squared_returns = cumulative
+        self._log_prices[start:stop] = np.log(
+            market._market_prices[
+                self._n_steps - history_offset : n_closed_steps - history_offset
+            ]
+        )
+        returns: np.ndarray = np.diff(self._log_prices[max(start - 1, 0) : stop])
+        if start == 0:
+            returns = np.concatenate([[0.0], returns])
+        base: float = self._cumulative_squared_returns[start - 1] if start > 0 else 0.0
+        self._cumulative_squared_returns[start:stop] = base + np.cumsum(
+            np.nan_to_num(returns**2)
+        )
+        for span, (n_steps, value) in list(self._emas.items()):
+            alpha: float = 2.0 / (span + 1)
+            for price in market._market_prices[
+                max(n_steps, history_offset)
+                - history_offset : n_closed_steps
+                - history_offset
+            ].tolist():
+                value = _update_ema(value=value, price=price, alpha=alpha)
+            self._emas[span] = (n_closed_steps, value)
+        self._n_steps = n_closed_steps
+
+    def _sync(self) -> None:
+        """catch up with the closed time steps of the market and invalidate memoized results. (Internal method)"""
+        self.market._refresh_prices()
+        self._sync_closed_steps()
+        index: int = self.market.time - self.market._history_offset
+        cache_key: Tuple[int, float, float] = (
+            self.market.time,
+            self.market._market_prices[index],
+            self.market._fundamental_prices[index],
+        )
+        if cache_key != self._cache_key:
+            self._cache = {}
+            self._cache_key = cache_key
+
+    def _check_window(self, window: int) -> None:
+        """check the window size. (Internal method)
+
+        Args:
+            window (int): window size.
+
+        Returns:
+            None
+        """
+        if window < 0:
+            raise ValueError("window must be non-negative")
+        if window > self.market.time:
+            raise ValueError("window must not exceed the current time step")
+        self.market._check_evicted(time=self.market.time - window)
+
+    def log_return(self, window: int) -> float:
+        """get the log return of market prices over the window.
+
+        Args:
+            window (int): window size.
+
+        Returns:
+            float: :math:`\\log(p_t / p_{t - window})`. nan if the past market price is unknown.
+        """
+        self._check_window(window=window)
+        self._sync()
+        key: Tuple[str, int] = ("log_return", window)
+        if key not in self._cache:
+            market_prices: np.ndarray = self.market._market_prices
+            index: int = self.market.time - self.market._history_offset
+            self._cache[key] = math.log(
+                float(market_prices[index]) / float(market_prices[index - window])
+            )
+        return self._cache[key]
+
+    def mean_log_return(self, window: int) -> float:
+        """get the mean log return per time step of market prices over the window.
+
+        Args:
+            window (int): window size.
+
+        Returns:
+            float: the log return divided by max(window, 1).
+        """
+        return (1.0 / max(window, 1)) * self.log_return(window=window)
+
+    def fundamental_gap(self) -> float:
+        """get the log gap between the fundamental price and the market price.
+
+        Returns:
+            float: :math:`\\log(p^f_t / p_t)`.
+        """
+        self._sync()
+        key: Tuple[str, int] = ("fundamental_gap", 0)
+        if key not in self._cache:
+            self._cache[key] = math.log(self._cache_key[2] / self._cache_key[1])
+        return self._cache[key]
+
+    def realized_vol(self, window: int) -> float:
+        """get the realized volatility of market prices over the window.
+
+        Args:
+            window (int): window size.
+
+        Returns:
+            float: the square root of the sum of squared one-step log returns in the last window time steps.
+        """
+        self._check_window(window=window)
+        self._sync()
+        key: Tuple[str, int] = ("realized_vol", window)
+        if key not in self._cache:
+            if window == 0:
+                self._cache[key] = 0.0
+            else:
+                index: int = self.market.time - self._offset
+                current_return: float = math.log(self._cache_key[1]) - float(
+                    self._log_prices[index - 1]
+                )
+                squared_sum: float = float(
+                    self._cumulative_squared_returns[index - 1]
+                    - self._cumulative_squared_returns[index - window]
+                ) + (0.0 if math.isnan(current_return) else current_return ** 2)
+                self._cache[key] = math.sqrt(max(squared_sum, 0.0))
+        return self._cache[key]
+
+    def ema(self, span: int) -> float:
+        """get the exponential moving average of market prices.
+
+        Args:
+            span (int): span. The smoothing factor is 2 / (span + 1).
+
+        Returns:
+            float: the exponential moving average including the current market price.
+        """
+        if span < 1:
+            raise ValueError("span must be positive")
+        self._sync()
+        key: Tuple[str, int] = ("ema", span)
+        if key not in self._cache:
+            alpha: float = 2.0 / (span + 1)
+            if span not in self._emas:
+                # EMAs requested for the first time average the retained market prices
+                history_offset: int = self.market._history_offset
+                value: float = math.nan
+                for price in self.market._market_prices[
+                    : self._n_steps - history_offset
+                ].tolist():
+                    value = _update_ema(value=value, price=price, alpha=alpha)
+                self._emas[span] = (self._n_steps, value)
+            value = self._emas[span][1]
+            self._cache[key] = _update_ema(
+                value=value, price=self._cache_key[1], alpha=alpha
+            )
+        return self._cache[key]
+
+
+def _update_ema(value: float, price: float, alpha: float) -> float:
+    """update an exponential moving average. (Internal function)
+
+    Args:
+        value (float): current average. nan if no price is averaged yet.
+        price (float): new price. nan is ignored.
+        alpha (float): smoothing factor.
+
+    Returns:
+        float: updated average.
+    """
+    if math.isnan(price):
+        return value
+    if math.isnan(value):
+        return price
+    return alpha * price + (1.0 - alpha) * value
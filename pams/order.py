@@ -1,8 +1,14 @@
 import warnings
 from dataclasses import dataclass
+from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
 from typing import cast
 
+import numpy as np
+
 
 @dataclass(frozen=True)
 class OrderKind:
@@ -62,9 +68,30 @@ class OrderKind:
 MARKET_ORDER = OrderKind(kind_id=0, name="MARKET_ORDER")
 LIMIT_ORDER = OrderKind(kind_id=1, name="LIMIT_ORDER")
 
+PriorityKey = Tuple[int, float, int, Optional[int]]
+
 
 class Order:
-    """Order class."""
+    """Order class.
+
+    When an order is placed, its priority key is set by the order book.
+    The priority key is a tuple of (0 for market orders or 1 for limit orders, signed price, placed_at, order_id),
+    and the smaller key has the higher priority. Order books compare orders by their priority keys instead of the comparison methods of this class.
+    """
+
+    __slots__ = (
+        "agent_id",
+        "market_id",
+        "is_buy",
+        "kind",
+        "volume",
+        "placed_at",
+        "price",
+        "order_id",
+        "ttl",
+        "is_canceled",
+        "priority_key",
+    )
 
     def __init__(
         self,
@@ -112,6 +139,7 @@ class Order:
         self.order_id: Optional[int] = order_id
         self.ttl: Optional[int] = ttl
         self.is_canceled: bool = False
+        self.priority_key: Optional[PriorityKey] = None
 
     def check_system_acceptable(self, agent_id: int) -> None:
         """check system acceptable. (Usually, markets automatically check it.)
@@ -300,3 +328,113 @@ class Cancel:
             )
         if self.order.is_canceled is True:
             raise AttributeError("this order is already canceled")
+
+
+class OrderBatch:
+    """Columnar batch of orders for a market.
+
+    Orders are held in NumPy arrays instead of :class:`pams.order.Order` instances
+    and validated by vectorized checks. A batch is added to a market at once by :func:`pams.market.Market._add_orders`,
+    and order IDs are set to :attr:`order_ids` by the market.
+    """
+
+    def __init__(
+        self,
+        agent_id: Union[int, Sequence[int], np.ndarray],
+        market_id: int,
+        is_buy: Union[bool, Sequence[bool], np.ndarray],
+        kind: Union[OrderKind, Sequence[int], np.ndarray],
+        volume: Union[int, Sequence[int], np.ndarray],
+        price: Optional[Union[float, Sequence[float], np.ndarray]] = None,
+        ttl: Optional[Union[int, Sequence[int], np.ndarray]] = None,
+    ):
+        """initialization. Scalar arguments are broadcast to the other arguments.
+
+        Args:
+            agent_id (Union[int, Sequence[int], np.ndarray]): agent IDs.
+            market_id (int): market ID.
+            is_buy (Union[bool, Sequence[bool], np.ndarray]): whether orders are buy orders or not.
+            kind (Union[:class:`pams.order.OrderKind`, Sequence[int], np.ndarray]): kind of orders or their kind IDs.
+            volume (Union[int, Sequence[int], np.ndarray]): order volumes.
+            price (Union[float, Sequence[float], np.ndarray], Optional): order prices. nan for market orders.
+            ttl (Union[int, Sequence[int], np.ndarray], Optional): time to order expiration. 0 for no expiration.
+        """
+        columns: List[np.ndarray] = list(
+            np.broadcast_arrays(
+                np.asarray(agent_id, dtype=np.int64),
+                np.asarray(is_buy, dtype=np.bool_),
+                np.asarray(
+                    kind.kind_id if isinstance(kind, OrderKind) else kind, dtype=np.int8
+                ),
+                np.asarray(volume, dtype=np.int64),
+                np.asarray(np.nan if price is None else price, dtype=np.float64),
+                np.asarray(0 if ttl is None else ttl, dtype=np.int64),
+            )
+        )
+        columns = [np.array(column, ndmin=1) for column in columns]
+        self.agent_id: np.ndarray = columns[0]
+        self.market_id: int = market_id
+        self.is_buy: np.ndarray = columns[1]
+        self.kind_id: np.ndarray = columns[2]
+        self.volume: np.ndarray = columns[3]
+        self.price: np.ndarray = columns[4]
+        self.ttl: np.ndarray = columns[5]
+        self.order_ids: Optional[np.ndarray] = None
+        self.placed_at: Optional[int] = None
+
+        if len(self.agent_id) == 0:
+            raise ValueError("batch have to contain at least one order")
+        is_market_order = self.kind_id == MARKET_ORDER.kind_id
+        is_limit_order = self.kind_id == LIMIT_ORDER.kind_id
+        if not np.all(is_market_order | is_limit_order):
+            raise NotImplementedError("only MARKET_ORDER and LIMIT_ORDER are supported")
+        if np.any(is_market_order & ~np.isnan(self.price)):
+            raise ValueError("price have to be nan when kind is MARKET_ORDER")
+        if np.any(is_limit_order & ~np.isfinite(self.price)):
+            raise ValueError("price have to be set when kind is LIMIT_ORDER")
+        if np.any(self.price[is_limit_order] <= 0):
+            warnings.warn("price should be positive")
+        if np.any(self.volume <= 0):
+            raise ValueError("volume have to be positive")
+        if np.any(self.ttl < 0):
+            raise ValueError("ttl have to be positive or 0 (no expiration)")
+
+    def __len__(self) -> int:
+        """get the number of orders.
+
+        Returns:
+            int: the number of orders.
+        """
+        return len(self.agent_id)
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__module__}.{self.__class__.__name__} | market={self.market_id}, "
+            f"n_orders={len(self)}, placed_at={self.placed_at}>"
+        )
+
+    def to_orders(self) -> List[Order]:
+        """convert this batch to orders not yet submitted.
+
+        Returns:
+            List[:class:`pams.order.Order`]: orders.
+        """
+        return [
+            Order(
+                agent_id=agent_id,
+                market_id=self.market_id,
+                is_buy=is_buy,
+                kind=MARKET_ORDER if kind_id == MARKET_ORDER.kind_id else LIMIT_ORDER,
+                volume=volume,
+                price=None if kind_id == MARKET_ORDER.kind_id else price,
+                ttl=None if ttl == 0 else ttl,
+            )
+            for agent_id, is_buy, kind_id, volume, price, ttl in zip(
+                self.agent_id.tolist(),
+                self.is_buy.tolist(),
+                self.kind_id.tolist(),
+                self.volume.tolist(),
+                self.price.tolist(),
+                self.ttl.tolist(),
+            )
+        ]
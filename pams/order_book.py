@@ -1,34 +1,96 @@
 import heapq
+from bisect import bisect_left
+from bisect import insort
+from collections import OrderedDict
+from typing import Any
 from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import cast
+
+import numpy as np
 
 from .logs.base import ExpirationLog
 from .order import Cancel
 from .order import Order
+from .order import PriorityKey
 
 
 class OrderBook:
-    """Order book class."""
+    """Order book class.
+
+    Removed orders are not deleted from the priority queue immediately but only marked as removed (lazy deletion).
+    They are skipped when they reach the top of the queue, and the queue is compacted
+    when the ratio of removed entries exceeds :attr:`compaction_threshold`.
+
+    The priority queue holds pairs of the priority key of an order and the order.
+    Therefore, orders are compared by plain tuple comparison of their priority keys.
+
+    The total volume and the number of orders for each price are maintained incrementally
+    when orders are added, canceled, executed, or expired.
+
+    If the tick size is given, price levels are handled as integer tick levels internally
+    and prices are converted to floats only when they are returned.
+    Prices of orders in this book must be on the tick grid (markets round order prices before adding orders).
+    """
+
+    compaction_threshold: float = 0.5
 
-    def __init__(self, is_buy: bool) -> None:
+    def __init__(self, is_buy: bool, tick_size: Optional[float] = None) -> None:
         """initialization.
 
         Args:
             is_buy (bool): whether it is a buy order or not.
+            tick_size (float, Optional): tick size. If it is None, prices are used as price levels as they are.
 
         Returns:
             None
         """
-        self.priority_queue: List[Order] = []
+        self.tick_size: Optional[float] = tick_size
+        self.priority_queue: List[Tuple[PriorityKey, Order]] = []
         heapq.heapify(self.priority_queue)
         self.time: int = 0
         self.is_buy = is_buy
         self.expire_time_list: Dict[int, List[Order]] = {}
+        # min-heap of the keys of expire_time_list
+        self._expiration_times: List[int] = []
+        # live orders in this book. Keys are object ids, so that orders without order ID can be handled.
+        self._entries: Dict[int, Order] = {}
+        self._order_ids: Dict[int, Order] = {}
+        # aggregated volumes for each price level. Keys of price levels are sorted so that the best one is the last element.
+        self._level_keys: List[float] = []
+        self._level_volumes: Dict[float, int] = {}
+        self._level_counts: Dict[float, int] = {}
+        self._level_prices: Dict[float, float] = {}
+        self._market_order_volume: int = 0
+        self._n_market_orders: int = 0
+        # prices and volumes before the changes of price levels (None for market orders) if the changes are tracked
+        self._level_changes: Optional[
+            Dict[Optional[float], Tuple[Optional[float], int]]
+        ] = None
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__module__}.{self.__class__.__name__} | is_buy={self.is_buy}>"
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """set the state when this book is copied or unpickled.
+        Indexes keyed by object IDs of orders are rebuilt because the orders are new objects.
+
+        Args:
+            state (Dict[str, Any]): state.
+
+        Returns:
+            None
+        """
+        self.__dict__.update(state)
+        self._rebuild_object_id_indexes()
+
+    def _rebuild_object_id_indexes(self) -> None:
+        """rebuild indexes keyed by object IDs of orders. (Internal method)"""
+        self._entries = {id(order): order for order in self._entries.values()}
+
     def add(self, order: Order) -> None:
         """add the book of order.
 
@@ -41,11 +103,21 @@ class OrderBook:
         if order.is_buy != self.is_buy:
             raise ValueError("buy/sell is incorrect")
         order.placed_at = self.time
-        heapq.heappush(self.priority_queue, order)
+        order.priority_key = (
+            (0, 0.0, self.time, order.order_id)
+            if order.price is None
+            else (1, -self._level_key(price=order.price), self.time, order.order_id)
+        )
+        self._entries[id(order)] = order
+        if order.order_id is not None:
+            self._order_ids[order.order_id] = order
+        self._add_to_level(order=order)
+        self._push(order=order)
         if order.ttl is not None:
             expiration_time = order.placed_at + order.ttl
             if expiration_time not in self.expire_time_list:
                 self.expire_time_list[expiration_time] = []
+                heapq.heappush(self._expiration_times, expiration_time)
             self.expire_time_list[expiration_time].append(order)
 
     def _remove(self, order: Order) -> None:
@@ -57,17 +129,271 @@ class OrderBook:
         Returns:
             None
         """
-        if order == self.priority_queue[0]:
-            x = heapq.heappop(self.priority_queue)
-            assert x == order
-        else:
-            self.priority_queue.remove(order)
-            heapq.heapify(self.priority_queue)
         if order.placed_at is None:
             raise AssertionError("the order is not yet placed")
-        if order.ttl is not None:
-            expiration_time = order.placed_at + order.ttl
-            self.expire_time_list[expiration_time].remove(order)
+        self._unregister(order=order)
+        self._pop(order=order)
+
+    def _unregister(self, order: Order) -> None:
+        """unregister an order from the live orders. (Internal method)
+        The order is left in the expiration list and skipped when it expires.
+
+        Args:
+            order (:class:`pams.order.Order`): order.
+
+        Returns:
+            None
+        """
+        if self._entries.pop(id(order), None) is None:
+            raise ValueError("the order is not in this order book")
+        if order.order_id is not None and self._order_ids.get(order.order_id) is order:
+            self._order_ids.pop(order.order_id)
+        self._remove_from_level(order=order)
+
+    def _level_key(self, price: float) -> float:
+        """get the sorting key of a price level. (Internal method)
+
+        Args:
+            price (float): price.
+
+        Returns:
+            float: sorting key. The larger key has the higher priority.
+                   If the tick size is given, it is the signed integer tick level.
+        """
+        level: float = (
+            price if self.tick_size is None else round(price / self.tick_size)
+        )
+        return level if self.is_buy else -level
+
+    def _order_level_key(self, order: Order) -> float:
+        """get the sorting key of the price level of a placed limit order. (Internal method)
+
+        Args:
+            order (:class:`pams.order.Order`): placed limit order.
+
+        Returns:
+            float: sorting key. The larger key has the higher priority.
+        """
+        return -cast(PriorityKey, order.priority_key)[1]
+
+    def _track_level_changes(self) -> None:
+        """start tracking changes of the aggregated volumes of price levels. (Internal method)
+
+        Returns:
+            None
+        """
+        if self._level_changes is None:
+            self._level_changes = {}
+
+    def _record_level_change(
+        self, key: Optional[float], price: Optional[float]
+    ) -> None:
+        """record the volume of a price level before it is changed. (Internal method)
+
+        Args:
+            key (float, Optional): sorting key of the price level. None for market orders.
+            price (float, Optional): price of the price level. None for market orders.
+
+        Returns:
+            None
+        """
+        level_changes = cast(
+            Dict[Optional[float], Tuple[Optional[float], int]], self._level_changes
+        )
+        if key not in level_changes:
+            level_changes[key] = (price, self._get_level_volume(key=key))
+
+    def _get_level_volume(self, key: Optional[float]) -> int:
+        """get the aggregated volume of a price level. (Internal method)
+
+        Args:
+            key (float, Optional): sorting key of the price level. None for market orders.
+
+        Returns:
+            int: aggregated volume. 0 if the price level is empty.
+        """
+        if key is None:
+            return self._market_order_volume
+        return self._level_volumes.get(key, 0)
+
+    def _pop_level_changes(self) -> List[Tuple[Optional[float], int]]:
+        """get the price levels changed since the last call and reset the tracking. (Internal method)
+        Price levels whose volumes are the same as before are omitted.
+
+        Returns:
+            List[Tuple[Optional[float], int]]: pairs of prices (None for market orders) and new aggregated volumes.
+        """
+        if self._level_changes is None:
+            raise AssertionError("changes of price levels are not tracked")
+        changes: List[Tuple[Optional[float], int]] = []
+        for key, (price, volume) in self._level_changes.items():
+            new_volume: int = self._get_level_volume(key=key)
+            if new_volume != volume:
+                if key is not None:
+                    price = self._level_prices.get(key, price)
+                changes.append((price, new_volume))
+        self._level_changes = {}
+        return changes
+
+    def _add_to_level(self, order: Order) -> None:
+        """add an order to the aggregated volumes. (Internal method)
+
+        Args:
+            order (:class:`pams.order.Order`): order.
+
+        Returns:
+            None
+        """
+        if order.price is None:
+            if self._level_changes is not None:
+                self._record_level_change(key=None, price=None)
+            self._market_order_volume += order.volume
+            self._n_market_orders += 1
+            return
+        key = self._order_level_key(order=order)
+        if self._level_changes is not None:
+            self._record_level_change(
+                key=key, price=self._level_prices.get(key, order.price)
+            )
+        if key in self._level_counts:
+            self._level_volumes[key] += order.volume
+            self._level_counts[key] += 1
+        else:
+            self._level_volumes[key] = order.volume
+            self._level_counts[key] = 1
+            self._level_prices[key] = order.price
+            insort(self._level_keys, key)
+
+    def _remove_from_level(self, order: Order) -> None:
+        """remove an order from the aggregated volumes. (Internal method)
+
+        Args:
+            order (:class:`pams.order.Order`): order.
+
+        Returns:
+            None
+        """
+        if order.price is None:
+            if self._level_changes is not None:
+                self._record_level_change(key=None, price=None)
+            self._market_order_volume -= order.volume
+            self._n_market_orders -= 1
+            return
+        key = self._order_level_key(order=order)
+        if self._level_changes is not None:
+            self._record_level_change(key=key, price=self._level_prices[key])
+        if self._level_counts[key] > 1:
+            self._level_volumes[key] -= order.volume
+            self._level_counts[key] -= 1
+        else:
+            self._level_volumes.pop(key)
+            self._level_counts.pop(key)
+            self._level_prices.pop(key)
+            if self._level_keys[-1] == key:
+                self._level_keys.pop()
+            else:
+                del self._level_keys[bisect_left(self._level_keys, key)]
+
+    def _push(self, order: Order) -> None:
+        """push an order into the queue. (Internal method)
+
+        Args:
+            order (:class:`pams.order.Order`): order.
+
+        Returns:
+            None
+        """
+        heapq.heappush(
+            self.priority_queue, (cast(PriorityKey, order.priority_key), order)
+        )
+
+    def _pop(self, order: Order) -> None:
+        """pop an unregistered order from the queue. (Internal method)
+        The order is just left as a removed entry unless it is at the top of the queue.
+
+        Args:
+            order (:class:`pams.order.Order`): order.
+
+        Returns:
+            None
+        """
+        if self.priority_queue[0][1] is order:
+            heapq.heappop(self.priority_queue)
+            self._discard_removed_top()
+        else:
+            self._compact_if_needed()
+
+    def _pop_orders(self, orders: List[Order]) -> None:
+        """pop unregistered orders from the queue at once. (Internal method)
+
+        Args:
+            orders (List[:class:`pams.order.Order`]): orders.
+
+        Returns:
+            None
+        """
+        self._discard_removed_top()
+        self._compact_if_needed()
+
+    def _discard_removed_top(self) -> None:
+        """discard removed entries at the top of the queue. (Internal method)"""
+        while (
+            len(self.priority_queue) > 0
+            and id(self.priority_queue[0][1]) not in self._entries
+        ):
+            heapq.heappop(self.priority_queue)
+
+    def _compact_if_needed(self) -> None:
+        """compact the queue if the ratio of removed entries exceeds the threshold. (Internal method)"""
+        n_removed = len(self.priority_queue) - len(self._entries)
+        if n_removed > self.compaction_threshold * len(self.priority_queue):
+            self.priority_queue = [
+                entry for entry in self.priority_queue if id(entry[1]) in self._entries
+            ]
+            heapq.heapify(self.priority_queue)
+
+    def _contains(self, order: Order) -> bool:
+        """get whether the order is in this book or not. (Internal method)
+
+        Args:
+            order (:class:`pams.order.Order`): order.
+
+        Returns:
+            bool: whether the order is in this book or not.
+        """
+        return id(order) in self._entries
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        """get an order in this book by order ID.
+
+        Args:
+            order_id (int): order ID.
+
+        Returns:
+            :class:`pams.order.Order`, Optional: the order if it is in this book.
+        """
+        return self._order_ids.get(order_id)
+
+    def _iter_orders(self) -> Iterator[Order]:
+        """iterate live orders in the order of priority without modifying this book. (Internal method)
+        The heap is walked from the top with an auxiliary heap of the frontier, so that
+        visiting the best k orders takes O(k log k). This book must not be modified during the iteration.
+
+        Returns:
+            Iterator[:class:`pams.order.Order`]: iterator of orders from the highest priority.
+        """
+        queue = self.priority_queue
+        frontier: List[Tuple[PriorityKey, int]] = []
+        if len(queue) > 0:
+            frontier.append((queue[0][0], 0))
+        while len(frontier) > 0:
+            i: int = heapq.heappop(frontier)[1]
+            order: Order = queue[i][1]
+            if id(order) in self._entries:
+                yield order
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(queue):
+                    heapq.heappush(frontier, (queue[child][0], child))
 
     def cancel(self, cancel: Cancel) -> None:
         """cancel the book of order.
@@ -80,7 +406,7 @@ class OrderBook:
         """
         cancel.order.is_canceled = True
         cancel.placed_at = self.time
-        if cancel.order in self.priority_queue:
+        if self._contains(order=cancel.order):
             # in case that order is executed before canceling.
             self._remove(cancel.order)
 
@@ -91,7 +417,7 @@ class OrderBook:
             :class:`pams.order.Order`, Optional: the order with the highest priority.
         """
         if len(self.priority_queue) > 0:
-            return self.priority_queue[0]
+            return self.priority_queue[0][1]
         else:
             return None
 
@@ -102,7 +428,7 @@ class OrderBook:
             float, Optional: the order price with the highest priority.
         """
         if len(self.priority_queue) > 0:
-            return self.priority_queue[0].price
+            return self.priority_queue[0][1].price
         else:
             return None
 
@@ -117,60 +443,74 @@ class OrderBook:
             None
         """
         order.volume += delta
+        if self._contains(order=order):
+            if order.price is None:
+                if self._level_changes is not None:
+                    self._record_level_change(key=None, price=None)
+                self._market_order_volume += delta
+            else:
+                key = self._order_level_key(order=order)
+                if self._level_changes is not None:
+                    self._record_level_change(key=key, price=self._level_prices[key])
+                self._level_volumes[key] += delta
         # ToDo: check if volume is non-negative
         if order.volume == 0:
             self._remove(order=order)
         if order.volume < 0:
             raise AssertionError
 
-    def _check_expired_orders(self) -> List[ExpirationLog]:
+    def _check_expired_orders(self, with_logs: bool = True) -> List[ExpirationLog]:
         """check and delete expired orders. (Internal Method)
+        Only the orders whose expiration time has come are checked.
+
+        Args:
+            with_logs (bool): whether expiration logs are created or not (default True).
 
         Returns:
             List[ExpirationLog]: the list of expiration logs.
         """
-        delete_orders: List[Order] = sum(
-            [value for key, value in self.expire_time_list.items() if key < self.time],
-            [],
-        )
-        delete_keys: List[int] = [
-            key for key, value in self.expire_time_list.items() if key < self.time
-        ]
+        delete_orders: List[Order] = []
+        while len(self._expiration_times) > 0 and self._expiration_times[0] < self.time:
+            expiration_time: int = heapq.heappop(self._expiration_times)
+            delete_orders.extend(
+                order
+                for order in self.expire_time_list.pop(expiration_time)
+                if self._contains(order=order)
+            )
         logs: List[ExpirationLog] = []
         if len(delete_orders) == 0:
             return logs
-        # TODO: think better sorting in the following 3 lines
         for delete_order in delete_orders:
-            log: ExpirationLog = ExpirationLog(
-                order_id=delete_order.order_id,
-                market_id=delete_order.market_id,
-                time=self.time,
-                order_time=delete_order.placed_at,
-                agent_id=delete_order.agent_id,
-                is_buy=delete_order.is_buy,
-                kind=delete_order.kind,
-                volume=delete_order.volume,
-                price=delete_order.price,
-                ttl=delete_order.ttl,
-            )
-            logs.append(log)
-            self.priority_queue.remove(delete_order)
-        heapq.heapify(self.priority_queue)
-        for key in delete_keys:
-            self.expire_time_list.pop(key)
+            if with_logs:
+                log: ExpirationLog = ExpirationLog(
+                    order_id=delete_order.order_id,
+                    market_id=delete_order.market_id,
+                    time=self.time,
+                    order_time=delete_order.placed_at,
+                    agent_id=delete_order.agent_id,
+                    is_buy=delete_order.is_buy,
+                    kind=delete_order.kind,
+                    volume=delete_order.volume,
+                    price=delete_order.price,
+                    ttl=delete_order.ttl,
+                )
+                logs.append(log)
+            self._unregister(order=delete_order)
+        self._pop_orders(orders=delete_orders)
         return logs
 
-    def _set_time(self, time: int) -> List[ExpirationLog]:
+    def _set_time(self, time: int, with_logs: bool = True) -> List[ExpirationLog]:
         """set time step. (Usually, it is called from market.)
 
         Args:
             time (int): time step.
+            with_logs (bool): whether expiration logs are created or not (default True).
 
         Returns:
             List[ExpirationLog]: the list of expiration logs.
         """
         self.time = time
-        logs: List[ExpirationLog] = self._check_expired_orders()
+        logs: List[ExpirationLog] = self._check_expired_orders(with_logs=with_logs)
         return logs
 
     def _update_time(self) -> None:
@@ -178,7 +518,7 @@ class OrderBook:
         Advance the time step and check expired orders.
         """
         self.time += 1
-        self._check_expired_orders()
+        self._check_expired_orders(with_logs=False)
 
     def __len__(self) -> int:
         """get length of the order queue.
@@ -186,7 +526,7 @@ class OrderBook:
         Returns:
             int: length of the order queue.
         """
-        return len(self.priority_queue)
+        return len(self._entries)
 
     def get_price_volume(self) -> Dict[Optional[float], int]:
         """get price and volume (order book).
@@ -194,28 +534,177 @@ class OrderBook:
         Returns:
             Dict[Optional[float], int]: order book dict. Dict key is order price and the value is volumes.
         """
-        keys: List[Optional[float]] = list(
-            set(map(lambda x: x.price, self.priority_queue))
-        )
-        has_market_order: bool = None in keys
-        if has_market_order:
-            keys.remove(None)
-        keys.sort(reverse=self.is_buy)
-        if has_market_order:
-            keys.insert(0, None)
-        result: Dict[Optional[float], int] = dict(
-            [
-                (
-                    key,
-                    sum(
-                        [
-                            order.volume
-                            for order in self.priority_queue
-                            if order.price == key
-                        ]
-                    ),
-                )
-                for key in keys
-            ]
-        )
+        result: Dict[Optional[float], int] = {}
+        if self._n_market_orders > 0:
+            result[None] = self._market_order_volume
+        for key in reversed(self._level_keys):
+            result[self._level_prices[key]] = self._level_volumes[key]
         return result
+
+    def get_price_n_orders(self) -> Dict[Optional[float], int]:
+        """get price and the number of orders.
+
+        Returns:
+            Dict[Optional[float], int]: dict whose key is order price and the value is the number of orders.
+        """
+        result: Dict[Optional[float], int] = {}
+        if self._n_market_orders > 0:
+            result[None] = self._n_market_orders
+        for key in reversed(self._level_keys):
+            result[self._level_prices[key]] = self._level_counts[key]
+        return result
+
+    def get_depth(self, levels: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """get prices and volumes of the best price levels.
+        Market orders are not included.
+
+        Args:
+            levels (int): the number of price levels.
+            out (np.ndarray, Optional): preallocated array with the shape of (2, levels) to store the result.
+
+        Returns:
+            np.ndarray: array with the shape of (2, levels). The first row is prices from the best one
+                        and the second row is their volumes. Missing levels are filled with nan prices and zero volumes.
+        """
+        if out is None:
+            out = np.empty((2, levels), dtype=np.float64)
+        elif out.shape != (2, levels):
+            raise ValueError(f"out must have the shape of (2, {levels})")
+        n_levels: int = min(levels, len(self._level_keys))
+        for i in range(n_levels):
+            key: float = self._level_keys[-1 - i]
+            out[0, i] = self._level_prices[key]
+            out[1, i] = self._level_volumes[key]
+        out[0, n_levels:] = np.nan
+        out[1, n_levels:] = 0
+        return out
+
+    def get_market_order_volume(self) -> int:
+        """get the total volume of market orders.
+
+        Returns:
+            int: the total volume of market orders.
+        """
+        return self._market_order_volume
+
+    def get_best_limit_price(self) -> Optional[float]:
+        """get the best price of limit orders. Market orders are ignored.
+
+        Returns:
+            float, Optional: the best price of limit orders. None if no limit order is in this book.
+        """
+        if len(self._level_keys) == 0:
+            return None
+        return self._level_prices[self._level_keys[-1]]
+
+    def get_n_price_levels(self) -> int:
+        """get the number of price levels of limit orders.
+
+        Returns:
+            int: the number of price levels.
+        """
+        return len(self._level_keys)
+
+
+class PriceLevelOrderBook(OrderBook):
+    """Order book class based on price levels.
+
+    Resting limit orders are grouped into FIFO queues by price, and the prices are kept sorted.
+    Market orders are kept in another FIFO queue, which always has higher priority than any price level.
+    The priority of orders is the same as :class:`pams.order_book.OrderBook`, but
+    getting the best order takes O(1), adding an order to a new price level takes O(log L) for L price levels,
+    and removing a known order takes O(1).
+
+    This order book can be used by setting "orderBookClass" in market settings (See :func:`pams.market.Market.setup`).
+    """
+
+    def __init__(self, is_buy: bool, tick_size: Optional[float] = None) -> None:
+        """initialization.
+
+        Args:
+            is_buy (bool): whether it is a buy order or not.
+            tick_size (float, Optional): tick size. If it is None, prices are used as price levels as they are.
+
+        Returns:
+            None
+        """
+        super().__init__(is_buy=is_buy, tick_size=tick_size)
+        self._market_orders: "OrderedDict[int, Order]" = OrderedDict()
+        self._levels: Dict[float, "OrderedDict[int, Order]"] = {}
+
+    def _rebuild_object_id_indexes(self) -> None:
+        super()._rebuild_object_id_indexes()
+        self._market_orders = OrderedDict(
+            (id(order), order) for order in self._market_orders.values()
+        )
+        self._levels = {
+            key: OrderedDict((id(order), order) for order in queue.values())
+            for key, queue in self._levels.items()
+        }
+
+    def _get_queue(self, order: Order) -> Optional["OrderedDict[int, Order]"]:
+        """get the FIFO queue that the order belongs to. (Internal method)
+
+        Args:
+            order (:class:`pams.order.Order`): order.
+
+        Returns:
+            OrderedDict[int, :class:`pams.order.Order`], Optional: the FIFO queue if exists.
+        """
+        if order.price is None:
+            return self._market_orders
+        return self._levels.get(self._order_level_key(order=order))
+
+    def _push(self, order: Order) -> None:
+        if order.price is None:
+            queue = self._market_orders
+        else:
+            key = self._order_level_key(order=order)
+            queue_ = self._levels.get(key)
+            if queue_ is None:
+                queue_ = OrderedDict()
+                self._levels[key] = queue_
+            queue = queue_
+        queue[id(order)] = order
+
+    def _pop(self, order: Order) -> None:
+        queue = self._get_queue(order=order)
+        if queue is None:
+            # the price level is already removed together with this order
+            return
+        del queue[id(order)]
+        # price levels are removed only when no live order remains
+        if order.price is not None:
+            key = self._order_level_key(order=order)
+            if key not in self._level_counts:
+                self._levels.pop(key)
+
+    def _pop_orders(self, orders: List[Order]) -> None:
+        for order in orders:
+            self._pop(order=order)
+
+    def _iter_orders(self) -> Iterator[Order]:
+        yield from self._market_orders.values()
+        for key in reversed(self._level_keys):
+            yield from self._levels[key].values()
+
+    def get_best_order(self) -> Optional[Order]:
+        if len(self._market_orders) > 0:
+            return next(iter(self._market_orders.values()))
+        if len(self._level_keys) > 0:
+            queue = self._levels[self._level_keys[-1]]
+            return next(iter(queue.values()))
+        return None
+
+    def get_best_price(self) -> Optional[float]:
+        if len(self._market_orders) > 0:
+            return None
+        return self.get_best_limit_price()
+
+
+PriceLevelOrderBook._rebuild_object_id_indexes.__doc__ = (
+    OrderBook._rebuild_object_id_indexes.__doc__
+)
+PriceLevelOrderBook._iter_orders.__doc__ = OrderBook._iter_orders.__doc__
+PriceLevelOrderBook.get_best_order.__doc__ = OrderBook.get_best_order.__doc__
+PriceLevelOrderBook.get_best_price.__doc__ = OrderBook.get_best_price.__doc__
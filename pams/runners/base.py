@@ -6,15 +6,18 @@ from abc import ABC
 from abc import abstractmethod
 from io import TextIOBase
 from io import TextIOWrapper
+from multiprocessing.shared_memory import SharedMemory
 from typing import Dict
 from typing import List
 from typing import Optional
 from typing import TextIO
 from typing import Type
 from typing import Union
+from typing import cast
 
 from ..agents import Agent
 from ..agents import HighFrequencyAgent
+from ..fundamentals import Fundamentals
 from ..logs.base import Logger
 from ..simulator import Simulator
 
@@ -32,6 +35,7 @@ class Runner(ABC):
         prng: Optional[random.Random] = None,
         logger: Optional[Logger] = None,
         simulator_class: Type[Simulator] = Simulator,
+        fundamental_class: Optional[Type[Fundamentals]] = None,
     ):
         """initialize.
 
@@ -41,6 +45,8 @@ class Runner(ABC):
             prng (random.Random, Optional): pseudo random number generator for this runner.
             logger (Logger, Optional): logger instance.
             simulator_class (Type[Simulator]): type of simulator.
+            fundamental_class (Type[Fundamentals], Optional): type of fundamentals passed to the simulator
+                                                              (default :class:`pams.fundamentals.Fundamentals`).
 
         Returns:
             None
@@ -58,9 +64,15 @@ class Runner(ABC):
             self.settings = json.load(fp=open(settings, mode="r"))
         self._prng: random.Random = prng if prng is not None else random.Random()
         self.logger = logger
-        self.simulator: Simulator = simulator_class(
-            prng=random.Random(self._prng.randint(0, 2**31))
-        )
+        if fundamental_class is None:
+            self.simulator: Simulator = simulator_class(
+                prng=random.Random(self._prng.randint(0, 2**31))
+            )
+        else:
+            self.simulator = simulator_class(
+                prng=random.Random(self._prng.randint(0, 2**31)),
+                fundamental_class=fundamental_class,
+            )
         self.registered_classes: List[Type] = []
 
     def main(self) -> None:
@@ -75,6 +87,32 @@ class Runner(ABC):
         )
         print("# EXECUTION TIME " + str((end_time_ns - start_time_ns) / 1e9))
 
+    def precompute_fundamentals(
+        self, path: Optional[str] = None, shared_memory_name: Optional[str] = None
+    ) -> Optional[SharedMemory]:
+        """set up the simulation and precompute the fundamental prices for all the time steps of the run.
+        The prices can be attached by :class:`pams.fundamentals.PrecomputedFundamentals` in other runs of the same settings.
+        This runner should not be run after this.
+
+        Args:
+            path (str, Optional): path of the .npy file to save the prices.
+            shared_memory_name (str, Optional): name of the shared memory block to create.
+
+        Returns:
+            SharedMemory, Optional: the shared memory block if shared_memory_name is given.
+            The caller must unlink it after all the runs finish.
+        """
+        if (path is None) == (shared_memory_name is None):
+            raise ValueError("either path or shared_memory_name is required")
+        self._setup()
+        until: int = sum(session.iteration_steps for session in self.simulator.sessions)
+        if path is not None:
+            self.simulator.fundamentals.save_prices(path=path, until=until)
+            return None
+        return self.simulator.fundamentals.share_prices(
+            name=cast(str, shared_memory_name), until=until
+        )
+
     def class_register(self, cls: Type) -> None:
         """register class. This method is used for user-defined classes.
 
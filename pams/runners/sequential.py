@@ -6,13 +6,17 @@ from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
 from typing import Type
 from typing import Union
 
+import numpy as np
+
 from ..agents.base import Agent
 from ..events import EventABC
 from ..events import EventHook
+from ..fundamentals import Fundamentals
 from ..index_market import IndexMarket
 from ..logs.base import CancelLog
 from ..logs.base import ExecutionLog
@@ -28,6 +32,7 @@ from ..logs.base import SimulationEndLog
 from ..market import Market
 from ..order import Cancel
 from ..order import Order
+from ..order import OrderBatch
 from ..session import Session
 from ..simulator import Simulator
 from ..utils.class_finder import find_class
@@ -44,6 +49,7 @@ class SequentialRunner(Runner):
         prng: Optional[random.Random] = None,
         logger: Optional[Logger] = None,
         simulator_class: Type[Simulator] = Simulator,
+        fundamental_class: Optional[Type[Fundamentals]] = None,
     ):
         """initialize.
 
@@ -52,11 +58,12 @@ class SequentialRunner(Runner):
             prng (random.Random, Optional): pseudo random number generator for this runner.
             logger (Logger, Optional): logger instance.
             simulator_class (Type[Simulator]): type of simulator.
+            fundamental_class (Type[Fundamentals], Optional): type of fundamentals passed to the simulator.
 
         Returns:
             None
         """
-        super().__init__(settings, prng, logger, simulator_class)
+        super().__init__(settings, prng, logger, simulator_class, fundamental_class)
         self._pending_setups: List[Tuple[Callable, Dict]] = []
 
     def _generate_markets(self, market_type_names: List[str]) -> None:
@@ -80,6 +87,14 @@ class SequentialRunner(Runner):
                 excludes_fields=["from", "to"],
             )
             # TODO: warn "from" and "to" is included in parent setting and not set to this setting.
+            simulation_settings: Dict = self.settings.get("simulation", {})
+            if (
+                "historyDirectory" in simulation_settings
+                and "historyDirectory" not in market_settings
+            ):
+                market_settings["historyDirectory"] = simulation_settings[
+                    "historyDirectory"
+                ]
             n_markets = 1
             id_from = 0
             id_to = 0
@@ -281,6 +296,27 @@ class SequentialRunner(Runner):
                             market_id2=market2.market_id,
                             corr=float(corr),
                         )
+                elif key == "factors":
+                    if not isinstance(value, dict) or sum(
+                        [
+                            not isinstance(x, list)
+                            or sum([not isinstance(y, (int, float)) for y in x]) > 0
+                            for x in value.values()
+                        ]
+                    ):
+                        raise ValueError(
+                            "simulation.fundamentalCorrelations.factors has invalid format data"
+                        )
+                    for market_name, loadings in value.items():
+                        m = self.simulator.name2market[market_name]
+                        if self.simulator.fundamentals.volatilities[m.market_id] == 0.0:
+                            raise ValueError(
+                                f"For applying fundamental correlation fo {m.name}, "
+                                f"fundamentalVolatility for {m.name} is required"
+                            )
+                        self.simulator.fundamentals.set_factor_loadings(
+                            market_id=m.market_id, loadings=[float(x) for x in loadings]
+                        )
                 else:
                     raise NotImplementedError(
                         f"{key} for simulation.fundamentalCorrelations is not supported"
@@ -366,6 +402,32 @@ class SequentialRunner(Runner):
             or sum([not isinstance(m, str) for m in market_type_names]) > 0
         ):
             raise ValueError("simulation.markets in json file have to be list[str]")
+        if "historyDirectory" in self.settings["simulation"]:
+            self.simulator.fundamentals.set_history_directory(
+                directory=os.path.join(
+                    self.settings["simulation"]["historyDirectory"], "fundamentals"
+                )
+            )
+        if (
+            "fundamentalSeed" in self.settings["simulation"]
+            or "fundamentalAntithetic" in self.settings["simulation"]
+        ):
+            fundamental_seed: Optional[int] = self.settings["simulation"].get(
+                "fundamentalSeed"
+            )
+            if fundamental_seed is not None and (
+                not isinstance(fundamental_seed, int)
+                or isinstance(fundamental_seed, bool)
+            ):
+                raise ValueError("simulation.fundamentalSeed must be int")
+            fundamental_antithetic = self.settings["simulation"].get(
+                "fundamentalAntithetic", False
+            )
+            if not isinstance(fundamental_antithetic, bool):
+                raise ValueError("simulation.fundamentalAntithetic must be bool")
+            self.simulator.fundamentals.set_random_numbers(
+                seed=fundamental_seed, antithetic=fundamental_antithetic
+            )
         self._generate_markets(market_type_names=market_type_names)
         self._set_fundamental_correlation()
 
@@ -393,7 +455,7 @@ class SequentialRunner(Runner):
 
     def _collect_orders_from_normal_agents(
         self, session: Session
-    ) -> List[List[Union[Order, Cancel]]]:
+    ) -> List[Sequence[Union[Order, Cancel, OrderBatch]]]:
         """collect orders from normal_agents. (Internal method)
         orders are corrected until the total number of orders reaches max_normal_orders
 
@@ -401,12 +463,12 @@ class SequentialRunner(Runner):
             session (Session): session.
 
         Returns:
-            List[List[Union[Order, Cancel]]]: orders lists.
+            List[Sequence[Union[Order, Cancel, OrderBatch]]]: orders lists.
         """
         agents = self.simulator.normal_frequency_agents
         agents = self._prng.sample(agents, len(agents))
         n_orders = 0
-        all_orders: List[List[Union[Order, Cancel]]] = []
+        all_orders: List[Sequence[Union[Order, Cancel, OrderBatch]]] = []
         for agent in agents:
             if n_orders >= session.max_normal_orders:
                 break
@@ -414,7 +476,10 @@ class SequentialRunner(Runner):
             if len(orders) > 0:
                 if not session.with_order_placement:
                     raise AssertionError("currently order is not accepted")
-                if sum([order.agent_id != agent.agent_id for order in orders]) > 0:
+                if (
+                    sum([_is_spoofing(order=order, agent=agent) for order in orders])
+                    > 0
+                ):
                     raise ValueError(
                         "spoofing order is not allowed. please check agent_id in order"
                     )
@@ -424,21 +489,59 @@ class SequentialRunner(Runner):
                 n_orders += 1
         return all_orders
 
+    def _handle_order_batch(self, market: Market, batch: OrderBatch) -> None:
+        """handle an order batch. (Internal method)
+        If some order events are registered, orders in the batch are added one by one so that the events can hook each order.
+
+        Args:
+            market (Market): market.
+            batch (OrderBatch): order batch.
+
+        Returns:
+            None
+        """
+        if (
+            len(self.simulator.events_dict["order_before"]) > 0
+            or len(self.simulator.events_dict["order_after"]) > 0
+        ):
+            if batch.order_ids is not None or batch.placed_at is not None:
+                raise ValueError("the order is already submitted")
+            logs: List[OrderLog] = []
+            for order in batch.to_orders():
+                self.simulator._trigger_event_before_order(order=order)
+                log: OrderLog = market._add_order(order=order)
+                self.simulator._trigger_event_after_order(order_log=log)
+                logs.append(log)
+            batch.order_ids = np.array([log.order_id for log in logs], dtype=np.int64)
+            batch.price = np.array(
+                [np.nan if log.price is None else log.price for log in logs],
+                dtype=np.float64,
+            )
+            batch.placed_at = market.get_time()
+        else:
+            market._add_orders(batch=batch)
+        agent: Agent = self.simulator.id2agent[int(batch.agent_id[0])]
+        agent.submitted_order_batch(batch=batch)
+
     def _handle_orders(
-        self, session: Session, local_orders: List[List[Union[Order, Cancel]]]
-    ) -> List[List[Union[Order, Cancel]]]:
+        self,
+        session: Session,
+        local_orders: List[Sequence[Union[Order, Cancel, OrderBatch]]],
+    ) -> List[Sequence[Union[Order, Cancel, OrderBatch]]]:
         """handle orders. (Internal method)
         processing local orders and correct and process the orders from high frequency agents.
 
         Args:
             session (Session): session.
-            local_orders (List[List[Union[Order, Cancel]]]): local orders.
+            local_orders (List[Sequence[Union[Order, Cancel, OrderBatch]]]): local orders.
 
         Returns:
-            List[List[Union[Order, Cancel]]]: order lists.
+            List[Sequence[Union[Order, Cancel, OrderBatch]]]: order lists.
         """
         sequential_orders = self._prng.sample(local_orders, len(local_orders))
-        all_orders: List[List[Union[Order, Cancel]]] = [*sequential_orders]
+        all_orders: List[Sequence[Union[Order, Cancel, OrderBatch]]] = [
+            *sequential_orders
+        ]
         for orders in sequential_orders:
             for order in orders:
                 if not session.with_order_placement:
@@ -456,6 +559,8 @@ class SequentialRunner(Runner):
                     agent = self.simulator.id2agent[order.order.agent_id]
                     agent.canceled_order(log=log_)
                     self.simulator._trigger_event_after_cancel(cancel_log=log_)
+                elif isinstance(order, OrderBatch):
+                    self._handle_order_batch(market=market, batch=order)
                 else:
                     raise NotImplementedError
                 if session.with_order_execution:
@@ -480,16 +585,16 @@ class SequentialRunner(Runner):
                 if n_high_freq_orders >= session.max_high_frequency_orders:
                     break
 
-                high_freq_orders: List[Union[Order, Cancel]] = agent.submit_orders(
-                    markets=self.simulator.markets
-                )
+                high_freq_orders: Sequence[
+                    Union[Order, Cancel, OrderBatch]
+                ] = agent.submit_orders(markets=self.simulator.markets)
                 if len(high_freq_orders) > 0:
                     if not session.with_order_placement:
                         raise AssertionError("currently order is not accepted")
                     if (
                         sum(
                             [
-                                order.agent_id != agent.agent_id
+                                _is_spoofing(order=order, agent=agent)
                                 for order in high_freq_orders
                             ]
                         )
@@ -516,6 +621,8 @@ class SequentialRunner(Runner):
                             agent = self.simulator.id2agent[order.order.agent_id]
                             agent.canceled_order(log=log_)
                             self.simulator._trigger_event_after_cancel(cancel_log=log_)
+                        elif isinstance(order, OrderBatch):
+                            self._handle_order_batch(market=market, batch=order)
                         else:
                             raise NotImplementedError
                         if session.with_order_execution:
@@ -547,7 +654,7 @@ class SequentialRunner(Runner):
             None
         """
         local_orders: List[
-            List[Union[Order, Cancel]]
+            Sequence[Union[Order, Cancel, OrderBatch]]
         ] = self._collect_orders_from_normal_agents(session=session)
         self._handle_orders(session=session, local_orders=local_orders)
 
@@ -589,6 +696,11 @@ class SequentialRunner(Runner):
             log: Log = SimulationBeginLog(simulator=self.simulator)  # must be blocking
             log.read_and_write(logger=self.logger)
             self.logger._process()
+        n_steps: int = sum(
+            session.iteration_steps for session in self.simulator.sessions
+        )
+        for market in self.simulator.markets:
+            market._reserve(length=n_steps + 1)
         self.simulator._update_times_on_markets(self.simulator.markets)  # t: -1 -> 0
 
         for session in self.simulator.sessions:
@@ -608,7 +720,23 @@ class SequentialRunner(Runner):
                 )  # must be blocking
                 log.read_and_write(logger=self.logger)
                 self.logger._process()
+        self.simulator.flush_histories()
         if self.logger is not None:
             log = SimulationEndLog(simulator=self.simulator)  # must be blocking
             log.read_and_write(logger=self.logger)
             self.logger._process()
+
+
+def _is_spoofing(order: Union[Order, Cancel, OrderBatch], agent: Agent) -> bool:
+    """check whether an order is submitted by another agent. (Internal function)
+
+    Args:
+        order (Union[Order, Cancel, OrderBatch]): order.
+        agent (Agent): agent submitting the order.
+
+    Returns:
+        bool: whether the order is spoofing or not.
+    """
+    if isinstance(order, OrderBatch):
+        return bool(np.any(order.agent_id != agent.agent_id))
+    return order.agent_id != agent.agent_id
@@ -1,4 +1,6 @@
+import copy
 import random
+from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -231,6 +233,40 @@ class Simulator:
             self._update_time_on_market(market=market)
         for market in filter(lambda x: isinstance(x, IndexMarket), markets):
             self._update_time_on_market(market=market)
+        self._drop_fundamental_prices(markets=markets)
+
+    def flush_histories(self) -> None:
+        """write the histories of markets and fundamentals to their memory-mapped files if they are configured.
+
+        Returns:
+            None
+        """
+        for market in self.markets:
+            market.flush_histories()
+        self.fundamentals.flush_histories()
+
+    def _drop_fundamental_prices(self, markets: List[Market]) -> None:
+        """drop fundamental prices older than the longest lookback declared by agents. (Internal method)
+        If the fundamentals have a history directory, prices are dropped regardless of lookbacks
+        because dropped prices are written to the files and remain readable.
+
+        Args:
+            markets (List[:class:`pams.market.Market`]): list of markets.
+
+        Returns:
+            None
+        """
+        if len(markets) == 0 or len(self.agents) == 0:
+            return
+        lookback: int = 0
+        if self.fundamentals.history_directory is None:
+            for agent in self.agents:
+                if agent.fundamental_lookback is None:
+                    return
+                lookback = max(lookback, agent.fundamental_lookback)
+        self.fundamentals.drop_prices_before(
+            time=min(market.get_time() for market in markets) - lookback
+        )
 
     def _update_agents_for_execution(
         self, execution_logs: List["ExecutionLog"]  # type: ignore  # NOQA
@@ -465,4 +501,114 @@ class Simulator:
                     simulator=self, market=market
                 )
 
+    def _get_shared_objects_memo(self) -> Dict[int, Any]:
+        """get a memo dictionary for :func:`copy.deepcopy` which keeps the objects registered in this simulator. (Internal method)
+
+        Returns:
+            Dict[int, Any]: memo dictionary mapping the objects to themselves.
+        """
+        shared_objects: List[Any] = [
+            self,
+            self.fundamentals,
+            *self.markets,
+            *self.agents,
+            *self.sessions,
+            *self.events,
+            *self.event_hooks,
+        ]
+        if self.logger is not None:
+            shared_objects.append(self.logger)
+        return {id(shared_object): shared_object for shared_object in shared_objects}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """take a snapshot of the simulation state.
+        The snapshot contains the states of markets, agents, events and fundamentals, and PRNG states.
+        Orders referred from both agents and order books keep their identity.
+        Logs already written and the state of the runner are not included.
+
+        Returns:
+            Dict[str, Any]: snapshot. This should be passed to :func:`pams.simulator.Simulator.restore`.
+        """
+        memo: Dict[int, Any] = self._get_shared_objects_memo()
+        return {
+            "prng_state": self._prng.getstate(),
+            "current_session": self.current_session,
+            "fundamentals": self.fundamentals.snapshot(),
+            "markets": [market.snapshot(memo=memo) for market in self.markets],
+            "agents": [
+                _get_object_state(obj=agent, memo=memo) for agent in self.agents
+            ],
+            "events": [
+                _get_object_state(obj=event, memo=memo) for event in self.events
+            ],
+        }
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """restore the simulation state from a snapshot.
+        A snapshot can be restored many times to branch simulations from a shared state.
+        Markets, agents and events must be the same as those when the snapshot was taken.
+
+        Args:
+            snapshot (Dict[str, Any]): snapshot taken by :func:`pams.simulator.Simulator.snapshot`.
+
+        Returns:
+            None
+        """
+        if len(snapshot["markets"]) != len(self.markets):
+            raise ValueError("markets are changed after the snapshot")
+        if len(snapshot["agents"]) != len(self.agents):
+            raise ValueError("agents are changed after the snapshot")
+        if len(snapshot["events"]) > len(self.events):
+            raise ValueError("events are changed after the snapshot")
+        memo: Dict[int, Any] = self._get_shared_objects_memo()
+        self._prng.setstate(snapshot["prng_state"])
+        self.current_session = snapshot["current_session"]
+        self.fundamentals.restore(snapshot=snapshot["fundamentals"])
+        for market, market_snapshot in zip(self.markets, snapshot["markets"]):
+            market.restore(snapshot=market_snapshot, memo=memo)
+        for agent, state in zip(self.agents, snapshot["agents"]):
+            _set_object_state(obj=agent, state=state, memo=memo)
+        for event, state in zip(self.events, snapshot["events"]):
+            _set_object_state(obj=event, state=state, memo=memo)
+
     # ToDo get_xxx_by_name
+
+
+def _get_object_state(obj: Any, memo: Dict[int, Any]) -> Dict[str, Dict[str, Any]]:
+    """get a copy of the attributes of an object. (Internal function)
+    PRNGs are stored as their states.
+
+    Args:
+        obj (Any): object.
+        memo (Dict[int, Any]): memo dictionary for :func:`copy.deepcopy`.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: attributes and PRNG states.
+    """
+    attributes: Dict[str, Any] = {}
+    prng_states: Dict[str, Any] = {}
+    for key, value in vars(obj).items():
+        if isinstance(value, random.Random):
+            prng_states[key] = value.getstate()
+        else:
+            attributes[key] = copy.deepcopy(value, memo)
+    return {"attributes": attributes, "prng_states": prng_states}
+
+
+def _set_object_state(
+    obj: Any, state: Dict[str, Dict[str, Any]], memo: Dict[int, Any]
+) -> None:
+    """set a copy of attributes got by :func:`pams.simulator._get_object_state` to an object. (Internal function)
+
+    Args:
+        obj (Any): object.
+        state (Dict[str, Dict[str, Any]]): attributes and PRNG states.
+        memo (Dict[int, Any]): memo dictionary for :func:`copy.deepcopy`.
+
+    Returns:
+        None
+    """
+    for key, value in state["attributes"].items():
+        setattr(obj, key, copy.deepcopy(value, memo))
+    for key, prng_state in state["prng_states"].items():
+        getattr(obj, key).setstate(prng_state)
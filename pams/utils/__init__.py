@@ -2,3 +2,6 @@ from .class_finder import find_class
 from .json_extends import json_extends
 from .json_random import JsonRandom
 from .json_random import JsonValue
+from .memmap import load_histories
+from .variance_reduction import antithetic_pairs
+from .variance_reduction import common_random_number_sets
@@ -0,0 +1,86 @@
+import os
+from typing import Any
+from typing import Dict
+
+import numpy as np
+
+
+def extend_memmap(
+    path: str, values: np.ndarray, length: int, fill_value: Any
+) -> np.memmap:
+    """extend an array to the length in a memory-mapped .npy file.
+
+    The values are written to a new file which replaces the file at the path, so that the file always holds a valid .npy array.
+    Files can be read by ``numpy.load(path, mmap_mode="r")`` without parsing or copying.
+
+    Args:
+        path (str): path of the .npy file.
+        values (np.ndarray): original values. This can be an in-memory array or a memory-mapped array.
+        length (int): length after the extension.
+        fill_value (Any): value for the extended elements.
+
+    Returns:
+        np.memmap: the original array if it is a memory-mapped array of the file and long enough,
+        or a memory-mapped array of the extended file.
+    """
+    if (
+        isinstance(values, np.memmap)
+        and values.filename is not None
+        and os.path.abspath(values.filename) == os.path.abspath(path)
+        and len(values) >= length
+    ):
+        return values
+    temporary_path: str = path + ".tmp.npy"
+    result: np.memmap = np.lib.format.open_memmap(
+        temporary_path, mode="w+", dtype=values.dtype, shape=(length,)
+    )
+    n_values: int = min(len(values), length)
+    result[:n_values] = values[:n_values]
+    result[n_values:] = fill_value
+    result.flush()
+    del result
+    if isinstance(values, np.memmap):
+        values.flush()
+    os.replace(temporary_path, path)
+    return np.lib.format.open_memmap(path, mode="r+")
+
+
+def remap_memmap(values: np.ndarray) -> np.memmap:
+    """flush a memory-mapped array and map the file again.
+
+    Pages of the old mapping are written back and released, so that they no longer count toward the resident memory
+    until they are accessed again.
+
+    Args:
+        values (np.ndarray): memory-mapped array of a .npy file.
+
+    Returns:
+        np.memmap: a new memory-mapped array of the same file.
+    """
+    if not isinstance(values, np.memmap) or values.filename is None:
+        raise ValueError("values must be a memory-mapped array of a file")
+    values.flush()
+    return np.lib.format.open_memmap(values.filename, mode="r+")
+
+
+def load_histories(directory: str) -> Dict[str, np.ndarray]:
+    """load histories written to a directory as read-only memory-mapped arrays.
+
+    Args:
+        directory (str): directory including .npy files, e.g., the history directory of a market.
+
+    Returns:
+        Dict[str, np.ndarray]: memory-mapped arrays keyed by the file names without the extension.
+
+    Examples:
+        >>> from pams.utils import load_histories
+        >>> histories = load_histories("run/Market")
+        >>> histories["market_prices"][:100]
+    """
+    return {
+        file_name[: -len(".npy")]: np.load(
+            os.path.join(directory, file_name), mmap_mode="r"
+        )
+        for file_name in sorted(os.listdir(directory))
+        if file_name.endswith(".npy") and not file_name.endswith(".tmp.npy")
+    }
@@ -0,0 +1,92 @@
+import copy
+import random
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+
+def _with_fundamental_random_numbers(
+    settings: Dict, seed: int, antithetic: bool
+) -> Dict:
+    """copy settings with the random numbers for fundamental prices. (Internal function)
+
+    Args:
+        settings (Dict): settings of a simulation.
+        seed (int): seed of the random numbers for fundamental prices.
+        antithetic (bool): whether the standard normal draws are negated or not.
+
+    Returns:
+        Dict: copied settings with simulation.fundamentalSeed and simulation.fundamentalAntithetic.
+    """
+    if "simulation" not in settings:
+        raise ValueError("simulation is required in json file")
+    result: Dict = copy.deepcopy(settings)
+    result["simulation"]["fundamentalSeed"] = seed
+    result["simulation"]["fundamentalAntithetic"] = antithetic
+    return result
+
+
+def antithetic_pairs(
+    settings: Dict, n_pairs: int, prng: random.Random
+) -> List[Tuple[Dict, Dict]]:
+    """make pairs of settings whose fundamental price shocks are mirrored (antithetic variates).
+
+    Each pair shares a seed of the random numbers for fundamental prices, and the second one negates the standard normal draws.
+    Averaging statistics within each pair cancels the odd-order effects of the shocks.
+    Seeds of different pairs are independent.
+
+    Args:
+        settings (Dict): settings of a simulation.
+        n_pairs (int): number of pairs.
+        prng (random.Random): pseudo random number generator for the seeds.
+
+    Returns:
+        List[Tuple[Dict, Dict]]: pairs of the original and the mirrored settings.
+    """
+    result: List[Tuple[Dict, Dict]] = []
+    for _ in range(n_pairs):
+        seed: int = prng.randint(0, 2**31)
+        result.append(
+            (
+                _with_fundamental_random_numbers(
+                    settings=settings, seed=seed, antithetic=False
+                ),
+                _with_fundamental_random_numbers(
+                    settings=settings, seed=seed, antithetic=True
+                ),
+            )
+        )
+    return result
+
+
+def common_random_number_sets(
+    settings_list: List[Dict], n_sets: int, prng: random.Random
+) -> List[List[Dict]]:
+    """make sets of settings consuming identical fundamental price shocks (common random numbers).
+
+    Each set has a copy of every settings in settings_list sharing a seed of the random numbers for fundamental prices,
+    e.g., settings with and without a price limit rule.
+    Differences of statistics within each set are not affected by the fundamental shocks
+    as long as the settings of fundamentals in settings_list are the same.
+    Seeds of different sets are independent.
+
+    Args:
+        settings_list (List[Dict]): settings of the compared simulations.
+        n_sets (int): number of sets.
+        prng (random.Random): pseudo random number generator for the seeds.
+
+    Returns:
+        List[List[Dict]]: sets of settings in the order of settings_list.
+    """
+    result: List[List[Dict]] = []
+    for _ in range(n_sets):
+        seed: int = prng.randint(0, 2**31)
+        result.append(
+            [
+                _with_fundamental_random_numbers(
+                    settings=settings, seed=seed, antithetic=False
+                )
+                for settings in settings_list
+            ]
+        )
+    return result
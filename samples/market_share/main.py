@@ -4,6 +4,8 @@ from typing import Any
 from typing import Dict
 from typing import Optional
 
+import numpy as np
+
 from pams import Market
 from pams.logs.market_step_loggers import MarketStepPrintLogger
 from pams.runners.sequential import SequentialRunner
@@ -15,7 +17,9 @@ class ExtendedMarket(Market):
         if "tradeVolume" in settings:
             if not isinstance(settings["tradeVolume"], int):
                 raise ValueError("tradeVolume must be int")
-            self._executed_volumes = [int(settings["tradeVolume"])]
+            self._executed_volumes = np.array(
+                [int(settings["tradeVolume"])], dtype=np.int64
+            )
 
 
 def main() -> None:
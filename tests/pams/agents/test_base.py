@@ -62,6 +62,22 @@ class TestAgent:
         assert agent.get_asset_volume(1) == 50
         assert agent.get_asset_volume(2) == 50
         assert agent.get_cash_amount() == 10000
+        assert agent.fundamental_lookback is None
+        for fundamental_lookback in [10, -1]:
+            agent = DummyAgent(
+                agent_id=1,
+                prng=random.Random(42),
+                simulator=sim,
+                name="test_agent",
+                logger=logger,
+            )
+            settings = {**settings1, "fundamentalLookback": fundamental_lookback}
+            if fundamental_lookback < 0:
+                with pytest.raises(ValueError):
+                    agent.setup(settings=settings, accessible_markets_ids=[0])
+            else:
+                agent.setup(settings=settings, accessible_markets_ids=[0])
+                assert agent.fundamental_lookback == fundamental_lookback
 
         agent = DummyAgent(
             agent_id=1,
@@ -15,6 +15,8 @@ from pams.logs import Log
 from pams.logs import Logger
 from pams.logs import MarketStepBeginLog
 from pams.logs import MarketStepEndLog
+from pams.logs import OrderBookDeltaLog
+from pams.logs import OrderBookSnapshotLog
 from pams.logs import OrderLog
 from pams.logs import SessionBeginLog
 from pams.logs import SessionEndLog
@@ -210,6 +212,30 @@ class TestExecutionLog:
         assert log.volume == 2
 
 
+class TestOrderBookDeltaLog:
+    def test__init__(self) -> None:
+        log = OrderBookDeltaLog(
+            market_id=2, time=20, changes=[(True, 101.0, 3), (False, None, 0)]
+        )
+        assert log.market_id == 2
+        assert log.time == 20
+        assert log.changes == [(True, 101.0, 3), (False, None, 0)]
+
+
+class TestOrderBookSnapshotLog:
+    def test__init__(self) -> None:
+        log = OrderBookSnapshotLog(
+            market_id=2,
+            time=20,
+            buy_price_volume={101.0: 3},
+            sell_price_volume={None: 1, 102.0: 2},
+        )
+        assert log.market_id == 2
+        assert log.time == 20
+        assert log.buy_price_volume == {101.0: 3}
+        assert log.sell_price_volume == {None: 1, 102.0: 2}
+
+
 class TestSimulationBeginLog:
     def test__init__(self) -> None:
         sim = Simulator(prng=random.Random(42))
@@ -379,6 +405,8 @@ class TestLogger:
                 self.n_cancel_log = 0
                 self.n_expiration_log = 0
                 self.n_execution_log = 0
+                self.n_order_book_delta_log = 0
+                self.n_order_book_snapshot_log = 0
                 self.n_simulation_begin_log = 0
                 self.n_simulation_end_log = 0
                 self.n_session_begin_log = 0
@@ -398,6 +426,14 @@ class TestLogger:
             def process_execution_log(self, log: ExecutionLog) -> None:
                 self.n_execution_log += 1
 
+            def process_order_book_delta_log(self, log: OrderBookDeltaLog) -> None:
+                self.n_order_book_delta_log += 1
+
+            def process_order_book_snapshot_log(
+                self, log: OrderBookSnapshotLog
+            ) -> None:
+                self.n_order_book_snapshot_log += 1
+
             def process_simulation_begin_log(self, log: SimulationBeginLog) -> None:
                 self.n_simulation_begin_log += 1
 
@@ -476,6 +512,12 @@ class TestLogger:
             volume=8,
         )
         logger.write(log=execution_log)
+        logger.write(log=OrderBookDeltaLog(market_id=2, time=3, changes=[]))
+        logger.write(
+            log=OrderBookSnapshotLog(
+                market_id=2, time=3, buy_price_volume={}, sell_price_volume={}
+            )
+        )
         simulation_begin_log = SimulationBeginLog(simulator=sim)
         logger.write(log=simulation_begin_log)
         simulation_end_log = SimulationEndLog(simulator=sim)
@@ -502,6 +544,8 @@ class TestLogger:
         assert logger.n_cancel_log == 1
         assert logger.n_expiration_log == 1
         assert logger.n_execution_log == 1
+        assert logger.n_order_book_delta_log == 1
+        assert logger.n_order_book_snapshot_log == 1
         assert logger.n_simulation_begin_log == 1
         assert logger.n_simulation_end_log == 1
         assert logger.n_session_begin_log == 1
@@ -0,0 +1,127 @@
+import random
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from pams.logs import MarketStepEndLog
+from pams.logs import OrderBookDeltaLog
+from pams.logs import OrderBookFeedSaver
+from pams.logs import OrderBookSnapshotLog
+from pams.runners import SequentialRunner
+
+
+class TestOrderBookFeedSaver:
+    def test__init__(self) -> None:
+        logger = OrderBookFeedSaver()
+        assert logger.snapshot_logs == {}
+        assert logger.delta_logs == {}
+
+    def test_get_price_volume(self) -> None:
+        logger = OrderBookFeedSaver()
+        logs = [
+            OrderBookDeltaLog(
+                market_id=0, time=0, changes=[(True, 1.0, 1), (False, 1.2, 2)]
+            ),
+            OrderBookDeltaLog(
+                market_id=0, time=1, changes=[(True, 1.1, 3), (True, None, 1)]
+            ),
+            OrderBookSnapshotLog(
+                market_id=0,
+                time=1,
+                buy_price_volume={None: 1, 1.1: 3, 1.0: 1},
+                sell_price_volume={1.2: 2},
+            ),
+            OrderBookDeltaLog(
+                market_id=0, time=3, changes=[(True, 1.0, 0), (False, 1.15, 4)]
+            ),
+            OrderBookDeltaLog(market_id=1, time=3, changes=[(True, 2.0, 5)]),
+        ]
+        for log in logs:
+            logger.write(log=log)
+        logger._process()
+        assert logger.get_price_volume(market_id=0, time=-1, is_buy=True) == {}
+        assert logger.get_price_volume(market_id=0, time=0, is_buy=True) == {1.0: 1}
+        assert list(
+            logger.get_price_volume(market_id=0, time=2, is_buy=True).items()
+        ) == [(None, 1), (1.1, 3), (1.0, 1)]
+        assert list(
+            logger.get_price_volume(market_id=0, time=3, is_buy=True).items()
+        ) == [(None, 1), (1.1, 3)]
+        assert list(
+            logger.get_price_volume(market_id=0, time=3, is_buy=False).items()
+        ) == [(1.15, 4), (1.2, 2)]
+        assert logger.get_price_volume(market_id=1, time=3, is_buy=True) == {2.0: 5}
+        assert logger.get_price_volume(market_id=2, time=3, is_buy=True) == {}
+
+    def test_rebuild(self) -> None:
+        class Saver(OrderBookFeedSaver):
+            def __init__(self) -> None:
+                super().__init__()
+                self.expected: List[
+                    Tuple[Dict[Optional[float], int], Dict[Optional[float], int]]
+                ] = []
+
+            def process_market_step_end_log(self, log: MarketStepEndLog) -> None:
+                self.expected.append(
+                    (
+                        log.market.buy_order_book.get_price_volume(),
+                        log.market.sell_order_book.get_price_volume(),
+                    )
+                )
+
+        settings = {
+            "simulation": {
+                "markets": ["Market"],
+                "agents": ["FCNAgents"],
+                "sessions": [
+                    {
+                        "sessionName": 0,
+                        "iterationSteps": 150,
+                        "withOrderPlacement": True,
+                        "withOrderExecution": True,
+                        "withPrint": False,
+                    }
+                ],
+            },
+            "Market": {
+                "class": "Market",
+                "tickSize": 0.01,
+                "marketPrice": 300.0,
+                "orderBookFeed": True,
+                "orderBookKeyframeInterval": 40,
+            },
+            "FCNAgents": {
+                "class": "FCNAgent",
+                "numAgents": 30,
+                "markets": ["Market"],
+                "assetVolume": 50,
+                "cashAmount": 10000,
+                "fundamentalWeight": {"expon": [1.0]},
+                "chartWeight": {"expon": [0.0]},
+                "noiseWeight": {"expon": [1.0]},
+                "meanReversionTime": {"uniform": [50, 100]},
+                "noiseScale": 0.001,
+                "timeWindowSize": [10, 20],
+                "orderMargin": [0.0, 0.1],
+            },
+        }
+        logger = Saver()
+        runner = SequentialRunner(
+            settings=settings, prng=random.Random(42), logger=logger
+        )
+        runner.main()
+        market_id = runner.simulator.markets[0].market_id
+        assert [log.time for log in logger.snapshot_logs[market_id]] == [0, 40, 80, 120]
+        assert len(logger.expected) == 150
+        for time, (buy_price_volume, sell_price_volume) in enumerate(logger.expected):
+            assert list(
+                logger.get_price_volume(
+                    market_id=market_id, time=time, is_buy=True
+                ).items()
+            ) == list(buy_price_volume.items())
+            assert list(
+                logger.get_price_volume(
+                    market_id=market_id, time=time, is_buy=False
+                ).items()
+            ) == list(sell_price_volume.items())
@@ -1,6 +1,7 @@
 import copy
 import os.path
 import random
+import tempfile
 import time
 from typing import Dict
 from typing import List
@@ -9,6 +10,7 @@ from typing import Union
 from typing import cast
 from unittest import mock
 
+import numpy as np
 import pytest
 from numpy.linalg import LinAlgError
 
@@ -16,6 +18,8 @@ from pams import LIMIT_ORDER
 from pams import Cancel
 from pams import Market
 from pams import Order
+from pams import OrderBatch
+from pams import PrecomputedFundamentals
 from pams.agents import Agent
 from pams.logs import CancelLog
 from pams.logs import ExecutionLog
@@ -737,6 +741,47 @@ class TestSequentialRunner(TestRunner):
         with pytest.raises(LinAlgError):
             runner.simulator.fundamentals._generate_next()
 
+        for factors, error in [
+            ({"Market-0": [0.5, 0.1], "Market-1": [0.3, -0.2]}, None),
+            ({"Market-0": 0.5}, ValueError),
+            ({"Market-0": [0.5, "a"]}, ValueError),
+            ({"Market-0": [0.5, 0.1], "Market-1": [0.3]}, ValueError),
+            ({"Market-0": [0.9, 0.9]}, ValueError),
+        ]:
+            setting = {
+                "simulation": {
+                    "markets": ["Market"],
+                    "fundamentalCorrelations": {"factors": factors},
+                },
+                "Market": {
+                    "class": "Market",
+                    "numMarkets": 3,
+                    "tickSize": 0.01,
+                    "marketPrice": 300.0,
+                    "outstandingShares": 2000,
+                    "fundamentalVolatility": 0.1,
+                },
+            }
+            runner = cast(
+                SequentialRunner,
+                self.test__init__(
+                    setting_mode="dict",
+                    logger=None,
+                    simulator_class=None,
+                    setting=setting,
+                ),
+            )
+            runner._generate_markets(market_type_names=["Market"])
+            if error is None:
+                runner._set_fundamental_correlation()
+                assert runner.simulator.fundamentals.factor_loadings == {
+                    0: [0.5, 0.1],
+                    1: [0.3, -0.2],
+                }
+            else:
+                with pytest.raises(error):
+                    runner._set_fundamental_correlation()
+
     def test_generate_sessions(self) -> None:
         setting = {
             "simulation": {
@@ -1618,6 +1663,70 @@ class TestSequentialRunner(TestRunner):
                     session=runner.simulator.sessions[0], local_orders=local_orders
                 )
 
+    def test_handle_order_batch(self) -> None:
+        setting = copy.deepcopy(self.default_setting)
+        del setting["simulation"]["sessions"][0]["events"]
+        for with_events in [False, True]:
+            runner = cast(
+                SequentialRunner,
+                self.test__init__(
+                    setting_mode="dict",
+                    logger=None,
+                    simulator_class=None,
+                    setting=setting,
+                ),
+            )
+            runner._setup()
+            market = runner.simulator.markets[0]
+            market._update_time(next_fundamental_price=300.0)
+            market._is_running = True
+            event_hook = mock.MagicMock()
+            if with_events:
+                runner.simulator.events_dict["order_before"][None] = [event_hook]
+            agent = runner.simulator.agents[0]
+            agent.submitted_order_batch = mock.MagicMock()  # type: ignore
+            agent.executed_order = mock.MagicMock()  # type: ignore
+            batch = OrderBatch(
+                agent_id=agent.agent_id,
+                market_id=market.market_id,
+                is_buy=[True, False, False],
+                kind=LIMIT_ORDER,
+                volume=[2, 1, 1],
+                price=[300.0, 300.0, 301.0],
+            )
+            runner._handle_orders(
+                session=runner.simulator.sessions[0], local_orders=[[batch]]
+            )
+            assert batch.order_ids is not None
+            assert batch.order_ids.tolist() == [0, 1, 2]
+            assert batch.placed_at == 0
+            np.testing.assert_array_equal(batch.price, [300.0, 300.0, 301.0])
+            agent.submitted_order_batch.assert_called_once_with(batch=batch)
+            assert agent.executed_order.call_count == 2
+            assert market.get_executed_volume() == 1
+            assert event_hook.event.hooked_before_order.call_count == (
+                3 if with_events else 0
+            )
+            with pytest.raises(ValueError):
+                runner._handle_orders(
+                    session=runner.simulator.sessions[0], local_orders=[[batch]]
+                )
+
+        for agent in runner.simulator.normal_frequency_agents:
+            batch = OrderBatch(
+                agent_id=[agent.agent_id, -1],
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=300.0,
+            )
+            agent.submit_orders = mock.MagicMock(return_value=[batch])  # type: ignore
+        with pytest.raises(ValueError):
+            runner._collect_orders_from_normal_agents(
+                session=runner.simulator.sessions[0]
+            )
+
     def test_iterate_market_update(self) -> None:
         class DummyLogger(Logger):
             def __init__(self) -> None:
@@ -1702,3 +1811,54 @@ class TestSequentialRunner(TestRunner):
         assert logger.n_market_step_end == sum(
             [session.iteration_steps for session in runner.simulator.sessions]
         )
+
+    def test_fundamental_random_numbers(self) -> None:
+        setting = copy.deepcopy(self.default_setting)
+        setting["Market"]["fundamentalVolatility"] = 0.01
+        setting["simulation"]["fundamentalSeed"] = 42
+        runners = []
+        for seed, antithetic in [(1, False), (2, False), (3, True)]:
+            setting["simulation"]["fundamentalAntithetic"] = antithetic
+            runner = SequentialRunner(settings=setting, prng=random.Random(seed))
+            runner.main()
+            runners.append(runner)
+        log_returns = [
+            np.diff(np.log(runner.simulator.markets[0].get_fundamental_prices()))
+            for runner in runners
+        ]
+        assert np.array_equal(log_returns[0], log_returns[1])
+        assert not np.allclose(log_returns[0], log_returns[2])
+        assert np.allclose(log_returns[0], -log_returns[2])
+        assert runners[2].simulator.fundamentals.antithetic
+        for key, value in [("fundamentalSeed", 1.0), ("fundamentalAntithetic", 1)]:
+            setting = copy.deepcopy(self.default_setting)
+            setting["simulation"][key] = value
+            runner = SequentialRunner(settings=setting, prng=random.Random(1))
+            with pytest.raises(ValueError):
+                runner.main()
+
+    def test_precompute_fundamentals(self) -> None:
+        setting = copy.deepcopy(self.default_setting)
+        setting["Market"]["fundamentalVolatility"] = 0.01
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "fundamentals.npy")
+            runner = SequentialRunner(settings=setting, prng=random.Random(1))
+            with pytest.raises(ValueError):
+                runner.precompute_fundamentals()
+            assert runner.precompute_fundamentals(path=path) is None
+            assert np.load(path).shape == (1, 11)
+            expected = SequentialRunner(settings=setting, prng=random.Random(1))
+            expected.main()
+            fundamental_class = PrecomputedFundamentals.attach(prices_path=path)
+            for seed in [2, 3]:
+                runner = SequentialRunner(
+                    settings=setting,
+                    prng=random.Random(seed),
+                    fundamental_class=fundamental_class,
+                )
+                runner.main()
+                assert isinstance(runner.simulator.fundamentals, fundamental_class)
+                assert (
+                    runner.simulator.markets[0].get_fundamental_prices()
+                    == expected.simulator.markets[0].get_fundamental_prices()
+                )
@@ -1,11 +1,17 @@
 import contextlib
+import os
 import random
+import tempfile
 from typing import Optional
+from unittest import mock
 
 import numpy as np
 import pytest
 
+from pams import fundamentals
 from pams.fundamentals import Fundamentals
+from pams.fundamentals import PrecomputedFundamentals
+from pams.utils import load_histories
 
 
 class TestFundamentals:
@@ -76,6 +82,255 @@ class TestFundamentals:
         f.remove_market(market_id=1)
         assert 1 not in f.market_ids
 
+    def test_snapshot(self) -> None:
+        f = Fundamentals(prng=random.Random(42))
+        f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+        f.add_market(market_id=1, initial=200, drift=0.0, volatility=0.02)
+        f.set_correlation(market_id1=0, market_id2=1, corr=0.5)
+        f.get_fundamental_price(market_id=0, time=50)
+        snapshot = f.snapshot()
+        expected = f.get_fundamental_prices(market_id=1, times=range(1000))
+        for _ in range(2):
+            f.restore(snapshot=snapshot)
+            assert f._generated_until == snapshot["generated_until"]
+            assert np.array_equal(
+                f.get_fundamental_prices(market_id=1, times=range(1000)), expected
+            )
+        f.restore(snapshot=snapshot)
+        f.change_volatility(market_id=1, volatility=0.1, time=100)
+        prices = f.get_fundamental_prices(market_id=1, times=range(1000))
+        assert np.array_equal(prices[:101], expected[:101])
+        assert not np.array_equal(prices[101:], expected[101:])
+        f.restore(snapshot=snapshot)
+        assert f.volatilities[1] == 0.02
+        assert np.array_equal(
+            f.get_fundamental_prices(market_id=1, times=range(1000)), expected
+        )
+
+    def test_drop_prices_before(self) -> None:
+        f = Fundamentals(prng=random.Random(42))
+        f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+        f.add_market(market_id=1, initial=200, drift=0.0, volatility=0.02)
+        expected = f.get_fundamental_prices(market_id=1, times=range(500))
+        f.drop_prices_before(time=50)
+        assert f.prices_offset == 0
+        f.drop_prices_before(time=250)
+        assert f.prices_offset == 250
+        assert len(f.prices[0]) == f._generated_until - 250 + 1
+        assert np.array_equal(
+            f.get_fundamental_prices(market_id=1, times=range(250, 1000))[:250],
+            expected[250:],
+        )
+        for method in [
+            lambda: f.get_fundamental_price(market_id=0, time=249),
+            lambda: f.get_fundamental_prices(market_id=0, times=range(100, 300)),
+            lambda: f.change_drift(market_id=0, drift=0.1, time=100),
+            lambda: f.add_market(market_id=2, initial=100, drift=0.0, volatility=0.01),
+        ]:
+            with pytest.raises(ValueError):
+                method()
+        f.add_market(
+            market_id=2, initial=300, drift=0.0, volatility=0.01, start_at=2000
+        )
+        assert f.get_fundamental_price(market_id=2, time=2000) == 300
+        assert f.get_fundamental_price(market_id=2, time=2001) != 300
+        snapshot = f.snapshot()
+        f.drop_prices_before(time=1500)
+        f.restore(snapshot=snapshot)
+        assert f.prices_offset == 250
+
+    def test_set_history_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            f = Fundamentals(prng=random.Random(42))
+            f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+            f.add_market(market_id=1, initial=200, drift=0.0, volatility=0.02)
+            expected = f.get_fundamental_prices(market_id=1, times=range(1000))
+            f.set_history_directory(directory=tmp_dir)
+            f.drop_prices_before(time=500)
+            assert f.prices_offset == 500
+            assert f.get_fundamental_price(market_id=1, time=10) == expected[10]
+            assert np.array_equal(
+                f.get_fundamental_prices(market_id=1, times=range(1000)), expected
+            )
+            with pytest.raises(ValueError):
+                f.change_drift(market_id=0, drift=0.1, time=100)
+            with pytest.raises(AssertionError):
+                f.set_history_directory(directory=tmp_dir)
+            f.flush_histories()
+            histories = load_histories(directory=tmp_dir)
+            assert list(histories.keys()) == ["prices_0", "prices_1"]
+            assert np.array_equal(histories["prices_1"][:1000], expected)
+            f.remove_market(market_id=1)
+            with pytest.raises(ValueError):
+                f.get_fundamental_price(market_id=1, time=10)
+
+    def test_cholesky_cache(self) -> None:
+        f = Fundamentals(prng=random.Random(42))
+        f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+        f.add_market(market_id=1, initial=200, drift=0.0, volatility=0.02)
+        f.add_market(market_id=2, initial=300, drift=0.0, volatility=0.0)
+        f.set_correlation(market_id1=0, market_id2=1, corr=0.3)
+        with mock.patch(
+            "pams.fundamentals.cholesky", wraps=fundamentals.cholesky
+        ) as cholesky:
+            f.get_fundamental_price(market_id=0, time=1000)
+            assert cholesky.call_count == 1
+            f.change_drift(market_id=0, drift=0.1, time=500)
+            f.get_fundamental_price(market_id=0, time=1000)
+            assert cholesky.call_count == 1
+            f.set_correlation(market_id1=0, market_id2=1, corr=0.5, time=500)
+            f.get_fundamental_price(market_id=0, time=1000)
+            assert cholesky.call_count == 2
+            f.change_volatility(market_id=2, volatility=0.01, time=500)
+            f.get_fundamental_price(market_id=0, time=1000)
+            assert cholesky.call_count == 3
+            f.add_market(
+                market_id=3, initial=100, drift=0.0, volatility=0.01, start_at=1500
+            )
+            f.get_fundamental_price(market_id=0, time=2000)
+            assert cholesky.call_count == 5
+        assert f._prices.shape[0] == 4
+        assert f._prices.shape[1] >= 2001
+        prices = f.get_fundamental_prices(market_id=1, times=range(100, 200))
+        assert np.shares_memory(prices, f._prices)
+        assert not prices.flags.writeable
+        assert prices.tolist() == [
+            f.get_fundamental_price(1, t) for t in range(100, 200)
+        ]
+        assert f.get_fundamental_prices(market_id=1, times=[150, 120]).tolist() == [
+            prices[50],
+            prices[20],
+        ]
+
+    def test_correlation_components(self) -> None:
+        f = Fundamentals(prng=random.Random(42))
+        for market_id in range(6):
+            f.add_market(market_id=market_id, initial=100, drift=0.0, volatility=0.01)
+        f.set_correlation(market_id1=0, market_id2=3, corr=0.8)
+        f.set_correlation(market_id1=3, market_id2=5, corr=-0.5)
+        f.set_correlation(market_id1=1, market_id2=2, corr=0.3)
+        structure = f._get_cholesky(generate_target_ids=list(range(6)))
+        assert sorted(
+            [component for rows, _ in structure.blocks for component in rows.tolist()]
+        ) == [[0, 3, 5], [1, 2]]
+        assert structure.diagonal_rows.tolist() == [4]
+        prices = np.stack(
+            [
+                f.get_fundamental_prices(market_id=market_id, times=range(20000))
+                for market_id in range(6)
+            ]
+        )
+        coef = np.corrcoef(np.diff(np.log(prices), axis=-1))
+        assert abs(coef[0, 3] - 0.8) < 0.02
+        assert abs(coef[3, 5] + 0.5) < 0.02
+        assert abs(coef[1, 2] - 0.3) < 0.02
+        assert abs(coef[0, 1]) < 0.03
+        assert abs(coef[4, 5]) < 0.03
+
+    def test_set_factor_loadings(self) -> None:
+        f = Fundamentals(prng=random.Random(42))
+        f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+        f.add_market(market_id=1, initial=200, drift=0.001, volatility=0.02)
+        f.add_market(market_id=2, initial=300, drift=0.0, volatility=0.03)
+        f.add_market(market_id=3, initial=300, drift=0.0, volatility=0.01)
+        f.set_factor_loadings(market_id=0, loadings=[0.6, 0.3])
+        f.set_factor_loadings(market_id=1, loadings=[0.5, -0.6])
+        f.set_factor_loadings(market_id=2, loadings=[0.0, 0.8])
+        for method in [
+            lambda: f.set_factor_loadings(market_id=3, loadings=[0.1]),
+            lambda: f.set_factor_loadings(market_id=3, loadings=[]),
+            lambda: f.set_factor_loadings(market_id=3, loadings=[0.8, 0.8]),
+            lambda: f.set_correlation(market_id1=0, market_id2=3, corr=0.5),
+        ]:
+            with pytest.raises(ValueError):
+                method()
+        prices = np.stack(
+            [
+                f.get_fundamental_prices(market_id=market_id, times=range(20000))
+                for market_id in range(4)
+            ]
+        )
+        returns = np.diff(np.log(prices), axis=-1)
+        coef = np.corrcoef(returns)
+        assert abs(coef[0, 1] - (0.6 * 0.5 - 0.3 * 0.6)) < 0.02
+        assert abs(coef[0, 2] - 0.3 * 0.8) < 0.02
+        assert abs(coef[1, 2] + 0.6 * 0.8) < 0.02
+        assert abs(coef[0, 3]) < 0.03
+        assert abs(np.std(returns[1]) - 0.02) < 0.001
+        assert abs(np.mean(returns[1]) - 0.001) < 0.001
+        snapshot = f.snapshot()
+        f.remove_factor_loadings(market_id=0, time=100)
+        assert 0 not in f.factor_loadings
+        f.set_correlation(market_id1=0, market_id2=3, corr=0.5, time=100)
+        with pytest.raises(ValueError):
+            f.set_factor_loadings(market_id=3, loadings=[0.1, 0.1])
+        f.restore(snapshot=snapshot)
+        assert f.factor_loadings[0] == [0.6, 0.3]
+        assert np.array_equal(
+            f.get_fundamental_prices(market_id=1, times=range(20000)), prices[1]
+        )
+
+    def test_rescale_prices(self) -> None:
+        f = Fundamentals(prng=random.Random(42))
+        f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+        f.add_market(market_id=1, initial=200, drift=0.0, volatility=0.02)
+        f.set_correlation(market_id1=0, market_id2=1, corr=0.5)
+        expected0 = f.get_fundamental_prices(market_id=0, times=range(150)).copy()
+        expected1 = f.get_fundamental_prices(market_id=1, times=range(300)).copy()
+        np_prng_state = f._np_prng.bit_generator.state
+        generated_until = f._generated_until
+        for time in range(50, 100):
+            f.rescale_prices(market_id=0, scale=0.9, time=time)
+        assert f._generated_until == generated_until
+        assert f._np_prng.bit_generator.state == np_prng_state
+        prices = f.get_fundamental_prices(market_id=0, times=range(150))
+        assert np.array_equal(prices[:50], expected0[:50])
+        assert np.allclose(prices[50:100], expected0[50:100] * 0.9 ** np.arange(1, 51))
+        assert np.allclose(prices[100:], expected0[100:] * 0.9**50)
+        assert np.array_equal(
+            f.get_fundamental_prices(market_id=1, times=range(300)), expected1
+        )
+        f.rescale_prices(market_id=1, scale=1.1, time=1000)
+        assert f._generated_until > 1000
+        with pytest.raises(ValueError):
+            f.rescale_prices(market_id=1, scale=0.0, time=1000)
+
+    def test_set_random_numbers(self) -> None:
+        def make(seed: int) -> Fundamentals:
+            f = Fundamentals(prng=random.Random(seed))
+            f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+            f.add_market(market_id=1, initial=200, drift=0.0, volatility=0.02)
+            f.add_market(market_id=2, initial=300, drift=0.0, volatility=0.01)
+            f.set_correlation(market_id1=0, market_id2=1, corr=0.5)
+            f.set_factor_loadings(market_id=2, loadings=[0.6])
+            return f
+
+        f = make(seed=1)
+        f.get_fundamental_price(market_id=0, time=10)
+        f.set_random_numbers(seed=42)
+        assert f._generated_until == 0
+        g = make(seed=2)
+        g.set_random_numbers(seed=42)
+        h = make(seed=3)
+        h.set_random_numbers(seed=42, antithetic=True)
+        assert h.antithetic
+        for market_id, initial in [(0, 100), (1, 200), (2, 300)]:
+            prices = f.get_fundamental_prices(market_id=market_id, times=range(250))
+            assert np.array_equal(
+                prices, g.get_fundamental_prices(market_id=market_id, times=range(250))
+            )
+            mirrored = h.get_fundamental_prices(market_id=market_id, times=range(250))
+            assert not np.allclose(prices, mirrored)
+            assert np.allclose(np.log(prices / initial), -np.log(mirrored / initial))
+        snapshot = h.snapshot()
+        h.set_random_numbers(antithetic=False)
+        assert not h.antithetic
+        h.restore(snapshot)
+        assert h.antithetic
+        h.drop_prices_before(time=200)
+        with pytest.raises(ValueError):
+            h.set_random_numbers(seed=42)
+
     def test_change_volatility(self) -> None:
         f = Fundamentals(prng=random.Random(42))
         f.add_market(market_id=1, initial=100, drift=-1.0, volatility=1.0)
@@ -126,6 +381,7 @@ class TestFundamentals:
 
         # invalid operation
         f.correlation[(3, 3)] = 0.8
+        f._cholesky_cache = {}  # direct changes are not detected by the cache
         with pytest.raises(AssertionError):
             f.get_fundamental_prices(market_id=1, times=range(20000))
 
@@ -160,3 +416,105 @@ class TestFundamentals:
             f.set_correlation(market_id2=2, market_id1=2, corr=0.9)
         with pytest.raises(ValueError):
             f.remove_correlation(market_id1=2, market_id2=2)
+
+
+class TestPrecomputedFundamentals:
+    def _fundamentals(self) -> Fundamentals:
+        f = Fundamentals(prng=random.Random(42))
+        f.add_market(market_id=0, initial=100, drift=0.0, volatility=0.01)
+        f.add_market(market_id=1, initial=200, drift=0.0, volatility=0.02)
+        f.add_market(market_id=2, initial=300, drift=0.0, volatility=0.0, start_at=50)
+        f.set_correlation(market_id1=0, market_id2=1, corr=0.5)
+        return f
+
+    def test_attach(self) -> None:
+        with pytest.raises(ValueError):
+            PrecomputedFundamentals.attach()
+        with pytest.raises(ValueError):
+            PrecomputedFundamentals.attach(prices_path="a.npy", shared_memory_name="a")
+        with pytest.raises(AssertionError):
+            PrecomputedFundamentals(prng=random.Random(42))
+        fundamental_class = PrecomputedFundamentals.attach(prices_path="a.npy")
+        assert issubclass(fundamental_class, PrecomputedFundamentals)
+        assert fundamental_class.prices_path == "a.npy"
+        assert PrecomputedFundamentals.prices_path is None
+
+    def test_prices_path(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            expected = self._fundamentals()
+            path = os.path.join(tmp_dir, "fundamentals.npy")
+            expected.save_prices(path=path, until=300)
+            f = PrecomputedFundamentals.attach(prices_path=path)(prng=random.Random(1))
+            for market_id, initial, volatility, start_at in [
+                (0, 100, 0.01, 0),
+                (1, 200, 0.02, 0),
+                (2, 300, 0.0, 50),
+            ]:
+                f.add_market(
+                    market_id=market_id,
+                    initial=initial,
+                    drift=0.0,
+                    volatility=volatility,
+                    start_at=start_at,
+                )
+            f.set_correlation(market_id1=0, market_id2=1, corr=0.5)
+            for market_id in range(3):
+                assert np.array_equal(
+                    f.get_fundamental_prices(market_id=market_id, times=range(301)),
+                    expected.get_fundamental_prices(
+                        market_id=market_id, times=range(301)
+                    ),
+                )
+            assert isinstance(f._prices, np.memmap)
+            for method in [
+                lambda: f.get_fundamental_price(market_id=0, time=301),
+                lambda: f.change_volatility(market_id=0, volatility=0.1, time=10),
+                lambda: f.add_market(
+                    market_id=3, initial=100, drift=0.0, volatility=0.01
+                ),
+            ]:
+                with pytest.raises(ValueError):
+                    method()
+            snapshot = f.snapshot()
+            assert snapshot["prices"] is f._prices
+            f.drop_prices_before(time=250)
+            assert f.prices_offset == 0
+            f.rescale_prices(market_id=1, scale=2.0, time=100)
+            assert f.get_fundamental_price(
+                market_id=1, time=200
+            ) == 2.0 * expected.get_fundamental_price(market_id=1, time=200)
+            assert np.load(path)[1, 200] == expected.get_fundamental_price(
+                market_id=1, time=200
+            )
+            f.restore(snapshot=snapshot)
+            assert f.get_fundamental_price(
+                market_id=1, time=200
+            ) == expected.get_fundamental_price(market_id=1, time=200)
+            f.remove_market(market_id=0)
+            assert f.get_fundamental_price(
+                market_id=2, time=200
+            ) == expected.get_fundamental_price(market_id=2, time=200)
+
+            g = PrecomputedFundamentals.attach(prices_path=path)(prng=random.Random(1))
+            with pytest.raises(ValueError):
+                g.add_market(market_id=0, initial=101, drift=0.0, volatility=0.01)
+
+    def test_shared_memory_name(self) -> None:
+        expected = self._fundamentals()
+        name = f"pams_test_{os.getpid()}"
+        shared_memory = expected.share_prices(name=name, until=200)
+        try:
+            fundamental_class = PrecomputedFundamentals.attach(shared_memory_name=name)
+            for _ in range(2):
+                f = fundamental_class(prng=random.Random(1))
+                assert f._prices.shape == (3, 201)
+                assert not f._prices.flags.writeable
+                f.add_market(market_id=5, initial=100, drift=0.0, volatility=0.01)
+                f.add_market(market_id=6, initial=200, drift=0.0, volatility=0.02)
+                assert np.array_equal(
+                    f.get_fundamental_prices(market_id=6, times=range(201)),
+                    expected.get_fundamental_prices(market_id=1, times=range(201)),
+                )
+        finally:
+            shared_memory.close()
+            shared_memory.unlink()
@@ -1,11 +1,17 @@
 import copy
 import math
+import os
 import random
+import tempfile
 import time
+from typing import Any
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import cast
 from unittest import mock
 
+import numpy as np
 import pytest
 
 from pams import LIMIT_ORDER
@@ -13,9 +19,13 @@ from pams import MARKET_ORDER
 from pams import Cancel
 from pams import Market
 from pams import Order
+from pams import OrderBatch
+from pams import PriceLevelOrderBook
 from pams.logs.base import ExpirationLog
 from pams.logs.base import Logger
+from pams.logs.base import OrderLog
 from pams.simulator import Simulator
+from pams.utils import load_histories
 
 
 class TestMarket:
@@ -30,13 +40,25 @@ class TestMarket:
             name="test",
         )
         m._update_time(next_fundamental_price=1.0)
-        assert m._market_prices == [1.0] + [None for _ in range(m.chunk_size - 1)]
-        assert m._last_executed_prices == [None for _ in range(m.chunk_size)]
-        assert m._fundamental_prices == [1.0] + [None for _ in range(m.chunk_size - 1)]
-        assert m._executed_volumes == [0 for _ in range(m.chunk_size)]
-        assert m._executed_total_prices == [0.0 for _ in range(m.chunk_size)]
-        assert m._n_buy_orders == [0 for _ in range(m.chunk_size)]
-        assert m._n_sell_orders == [0 for _ in range(m.chunk_size)]
+        np.testing.assert_array_equal(
+            m._market_prices, [1.0] + [np.nan for _ in range(m.chunk_size - 1)]
+        )
+        np.testing.assert_array_equal(
+            m._last_executed_prices, [np.nan for _ in range(m.chunk_size)]
+        )
+        np.testing.assert_array_equal(
+            m._fundamental_prices, [1.0] + [np.nan for _ in range(m.chunk_size - 1)]
+        )
+        np.testing.assert_array_equal(
+            m._executed_volumes, [0 for _ in range(m.chunk_size)]
+        )
+        np.testing.assert_array_equal(
+            m._executed_total_prices, [0.0 for _ in range(m.chunk_size)]
+        )
+        np.testing.assert_array_equal(m._n_buy_orders, [0 for _ in range(m.chunk_size)])
+        np.testing.assert_array_equal(
+            m._n_sell_orders, [0 for _ in range(m.chunk_size)]
+        )
         assert m.get_market_price() == 1.0
         assert m.get_market_prices() == [1.0]
         assert m.get_last_executed_prices() == [None]
@@ -98,21 +120,31 @@ class TestMarket:
         m._execution()
         m._execution()
         m._update_time(next_fundamental_price=1.2)
-        assert m._market_prices == [1.0, 1.0, 1.0] + [
-            None for _ in range(m.chunk_size - 3)
-        ]
-        assert m._last_executed_prices == [None, 1.0, 1.0] + [
-            None for _ in range(m.chunk_size - 3)
-        ]
-        assert m._fundamental_prices == [1.0, 1.1, 1.2] + [
-            None for _ in range(m.chunk_size - 3)
-        ]
-        assert m._executed_volumes == [1 if i == 1 else 0 for i in range(m.chunk_size)]
-        assert m._executed_total_prices == [
-            1.0 if i == 1 else 0 for i in range(m.chunk_size)
-        ]
-        assert m._n_buy_orders == [1 if i == 0 else 0 for i in range(m.chunk_size)]
-        assert m._n_sell_orders == [1 if i == 1 else 0 for i in range(m.chunk_size)]
+        np.testing.assert_array_equal(
+            m._market_prices,
+            [1.0, 1.0, 1.0] + [np.nan for _ in range(m.chunk_size - 3)],
+        )
+        np.testing.assert_array_equal(
+            m._last_executed_prices,
+            [np.nan, 1.0, 1.0] + [np.nan for _ in range(m.chunk_size - 3)],
+        )
+        np.testing.assert_array_equal(
+            m._fundamental_prices,
+            [1.0, 1.1, 1.2] + [np.nan for _ in range(m.chunk_size - 3)],
+        )
+        np.testing.assert_array_equal(
+            m._executed_volumes, [1 if i == 1 else 0 for i in range(m.chunk_size)]
+        )
+        np.testing.assert_array_equal(
+            m._executed_total_prices,
+            [1.0 if i == 1 else 0 for i in range(m.chunk_size)],
+        )
+        np.testing.assert_array_equal(
+            m._n_buy_orders, [1 if i == 0 else 0 for i in range(m.chunk_size)]
+        )
+        np.testing.assert_array_equal(
+            m._n_sell_orders, [1 if i == 1 else 0 for i in range(m.chunk_size)]
+        )
         assert m.get_market_price() == 1.0
         assert m.get_market_prices() == [1.0, 1.0, 1.0]
         assert m.get_last_executed_prices() == [None, 1.0, 1.0]
@@ -245,6 +277,398 @@ class TestMarket:
         )
         m.setup(settings={"tickSize": 0.001, "fundamentalPrice": 500.0})
         m.setup(settings={"tickSize": 0.001, "marketPrice": 300.0})
+        with pytest.raises(ValueError):
+            m.setup(
+                settings={
+                    "tickSize": 0.001,
+                    "marketPrice": 300.0,
+                    "warnPriceRounding": 1,
+                }
+            )
+
+    def test_fill_until(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 0.001, "marketPrice": 300.0})
+        m._fill_until(time=0)
+        assert len(m._market_prices) == m.chunk_size
+        assert m._market_prices[0] == 300.0
+        m._fill_until(time=m.chunk_size)
+        assert len(m._market_prices) == 2 * m.chunk_size
+        m._fill_until(time=5 * m.chunk_size)
+        assert len(m._market_prices) == 5 * m.chunk_size + 1
+        m._reserve(length=10)
+        assert len(m._market_prices) == 5 * m.chunk_size + 1
+        m._reserve(length=1000)
+        assert len(m._executed_volumes) == 1000
+        assert m._executed_volumes.dtype == np.int64
+        assert m._market_prices[0] == 300.0
+        assert np.isnan(m._market_prices[1:]).all()
+
+    def test_set_time(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0})
+        m._update_time(next_fundamental_price=300.0)
+        m._is_running = True
+        for is_buy, price in [(True, 299.0), (False, 301.0)]:
+            m._add_order(
+                order=Order(
+                    agent_id=0,
+                    market_id=0,
+                    is_buy=is_buy,
+                    kind=LIMIT_ORDER,
+                    volume=1,
+                    price=price,
+                )
+            )
+        m._update_time(next_fundamental_price=300.0)
+        m._add_order(
+            order=Order(
+                agent_id=0, market_id=0, is_buy=True, kind=MARKET_ORDER, volume=1
+            )
+        )
+        m._execution()
+        m._set_time(time=1000, next_fundamental_price=300.0)
+        assert m._last_known_times == {
+            "_last_executed_prices": 1,
+            "_mid_prices": 0,
+            "_market_prices": 1,
+        }
+        assert m.get_last_executed_price() == 301.0
+        assert m.get_mid_price() == 300.0
+        assert m.get_market_price() == 301.0
+        assert np.isnan(m._market_prices[2:1000]).all()
+        m._set_time(time=1, next_fundamental_price=300.0)
+        assert m._last_known_times == {
+            "_last_executed_prices": -1,
+            "_mid_prices": 0,
+            "_market_prices": 0,
+        }
+        assert m.get_last_executed_price() is None
+        assert m.get_market_price() == 300.0
+
+    def test_range_sums(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0})
+        m._update_time(next_fundamental_price=300.0)
+        m._is_running = True
+        prng = random.Random(42)
+        for t in range(50):
+            for _ in range(prng.randint(0, 3)):
+                m._add_order(
+                    order=Order(
+                        agent_id=0,
+                        market_id=0,
+                        is_buy=prng.random() < 0.5,
+                        kind=LIMIT_ORDER,
+                        volume=prng.randint(1, 3),
+                        price=float(prng.randint(295, 305)),
+                    )
+                )
+                m._execution()
+            for start in range(0, m.time + 1, 7):
+                for end in range(start, m.time + 1, 5):
+                    volumes = m.get_executed_volumes(range(start, end + 1))
+                    total_prices = m.get_executed_total_prices(range(start, end + 1))
+                    assert m.get_executed_volume_sum(start=start, end=end) == sum(
+                        volumes
+                    )
+                    assert m.get_executed_total_price_sum(
+                        start=start, end=end
+                    ) == pytest.approx(sum(total_prices))
+                    assert m.get_n_buy_order_sum(start=start, end=end) == sum(
+                        m.get_n_buy_orders(range(start, end + 1))
+                    )
+                    assert m.get_n_sell_order_sum(start=start, end=end) == sum(
+                        m.get_n_sell_orders(range(start, end + 1))
+                    )
+                    if sum(volumes) > 0:
+                        assert m.get_vwap(time=end, start=start) == pytest.approx(
+                            sum(total_prices) / sum(volumes)
+                        )
+                    else:
+                        assert math.isnan(m.get_vwap(time=end, start=start))
+            if t == 30:
+                m._set_time(time=20, next_fundamental_price=300.0)
+            else:
+                m._update_time(next_fundamental_price=300.0)
+        assert m.get_executed_volume_sum(start=10, end=5) == 0
+        with pytest.raises(AssertionError):
+            m.get_executed_volume_sum(end=m.time + 1)
+
+    def test_get_arrays(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0})
+        for i in range(5):
+            m._update_time(next_fundamental_price=300.0 + i)
+        m._add_order(
+            order=Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=299.0,
+            )
+        )
+        prices = m.get_fundamental_prices_array()
+        np.testing.assert_array_equal(prices, [300.0, 301.0, 302.0, 303.0, 304.0])
+        assert np.shares_memory(prices, m._fundamental_prices)
+        with pytest.raises(ValueError):
+            prices[0] = 0.0
+        np.testing.assert_array_equal(
+            m.get_fundamental_prices_array(start=1, stop=3), [301.0, 302.0]
+        )
+        np.testing.assert_array_equal(m.get_market_prices_array(start=3), [300.0] * 2)
+        np.testing.assert_array_equal(
+            m.get_mid_prices_array(), m.get_last_executed_prices_array()
+        )
+        np.testing.assert_array_equal(m.get_n_buy_orders_array(), [0, 0, 0, 0, 1])
+        np.testing.assert_array_equal(m.get_n_sell_orders_array(), [0] * 5)
+        np.testing.assert_array_equal(m.get_executed_volumes_array(), [0] * 5)
+        np.testing.assert_array_equal(m.get_executed_total_prices_array(), [0.0] * 5)
+        assert m.get_market_prices(range(1, 4)) == [300.0] * 3
+        with pytest.raises(AssertionError):
+            m.get_market_prices_array(stop=6)
+        with pytest.raises(ValueError):
+            m.get_market_prices_array(start=3, stop=2)
+        with pytest.raises(ValueError):
+            m.get_market_prices_array(start=-1)
+
+    def test_history_retention(self) -> None:
+        markets: List[Market] = []
+        for settings in [
+            {},
+            {"historyRetention": "window", "historyWindow": 20},
+            {
+                "historyRetention": "summary",
+                "historyWindow": 20,
+                "historySummaryInterval": 7,
+            },
+        ]:
+            m = self.base_class(
+                market_id=0,
+                prng=random.Random(42),
+                logger=Logger(),
+                simulator=Simulator(prng=random.Random(42)),
+                name="test",
+            )
+            m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0, **settings})
+            m._reserve(length=1000)
+            m._update_time(next_fundamental_price=300.0)
+            m._is_running = True
+            markets.append(m)
+        full, window, summary = markets
+        assert window.history_retention == "window"
+        assert len(window._market_prices) == 42
+        prng = random.Random(42)
+        for t in range(200):
+            orders = [
+                Order(
+                    agent_id=0,
+                    market_id=0,
+                    is_buy=prng.random() < 0.5,
+                    kind=LIMIT_ORDER,
+                    volume=prng.randint(1, 3),
+                    price=float(prng.randint(295, 305)),
+                )
+                for _ in range(prng.randint(0, 3))
+            ]
+            for m in markets:
+                for order in orders:
+                    m._add_order(order=copy.copy(order))
+                    m._execution()
+                assert len(m._market_prices) <= 42 or m is full
+            if t >= 20 and t % 10 == 9:
+                for m in [window, summary]:
+                    assert m.stats.ema(span=5) == pytest.approx(full.stats.ema(span=5))
+                    assert m.stats.realized_vol(window=20) == pytest.approx(
+                        full.stats.realized_vol(window=20)
+                    )
+                    assert m.stats.log_return(window=20) == full.stats.log_return(
+                        window=20
+                    )
+                    start = full.time - 20
+                    assert m.get_market_prices(
+                        range(start, full.time + 1)
+                    ) == full.get_market_prices(range(start, full.time + 1))
+                    np.testing.assert_array_equal(
+                        m.get_executed_volumes_array(start=start),
+                        full.get_executed_volumes_array(start=start),
+                    )
+                    assert m.get_executed_volume_sum(
+                        start=start
+                    ) == full.get_executed_volume_sum(start=start)
+                    assert m.get_vwap(start=start) == pytest.approx(
+                        full.get_vwap(start=start), nan_ok=True
+                    )
+            for m in markets:
+                m._update_time(next_fundamental_price=300.0 + prng.random())
+        assert window._history_offset > 0
+        # sums from the first time step are still available from the cumulative sums
+        assert window.get_executed_volume_sum(start=0) == full.get_executed_volume_sum(
+            start=0
+        )
+        for method in [
+            lambda: window.get_market_price(time=0),
+            lambda: window.get_market_prices_array(),
+            lambda: window.get_executed_volume_sum(start=10),
+            lambda: window.stats.log_return(window=100),
+        ]:
+            with pytest.raises(ValueError):
+                method()
+        with pytest.raises(AssertionError):
+            window.get_history_summaries()
+        summaries = summary.get_history_summaries()
+        n_summaries = summary._history_offset // 7
+        for i in range(n_summaries):
+            assert summaries["time"][i] == i * 7
+            prices = full.get_market_prices(range(i * 7, (i + 1) * 7))
+            assert summaries["open"][i] == prices[0]
+            assert summaries["high"][i] == max(prices)
+            assert summaries["low"][i] == min(prices)
+            assert summaries["close"][i] == prices[-1]
+            volume = full.get_executed_volume_sum(start=i * 7, end=(i + 1) * 7 - 1)
+            assert summaries["volume"][i] == volume
+            assert summaries["n_buy_orders"][i] == full.get_n_buy_order_sum(
+                start=i * 7, end=(i + 1) * 7 - 1
+            )
+            if volume > 0:
+                assert summaries["vwap"][i] == pytest.approx(
+                    full.get_vwap(start=i * 7, time=(i + 1) * 7 - 1)
+                )
+        invalid_settings_list: List[Dict[str, Any]] = [
+            {"historyRetention": "ring"},
+            {"historyRetention": "window"},
+            {"historyRetention": "window", "historyWindow": 0},
+            {"historyRetention": "summary", "historyWindow": 10},
+            {
+                "historyRetention": "summary",
+                "historyWindow": 10,
+                "historySummaryInterval": 0,
+            },
+        ]
+        for invalid_settings in invalid_settings_list:
+            with pytest.raises(ValueError):
+                full.setup(
+                    settings={"tickSize": 1.0, "marketPrice": 300.0, **invalid_settings}
+                )
+
+    def test_history_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            markets: List[Market] = []
+            for settings in [
+                {},
+                {"historyDirectory": tmp_dir, "historyMemoryLimit": 2000},
+            ]:
+                m = self.base_class(
+                    market_id=0,
+                    prng=random.Random(42),
+                    logger=Logger(),
+                    simulator=Simulator(prng=random.Random(42)),
+                    name="test",
+                )
+                m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0, **settings})
+                m._update_time(next_fundamental_price=300.0)
+                m._is_running = True
+                markets.append(m)
+            memory, mapped = markets
+            assert mapped.history_directory == os.path.join(tmp_dir, "test")
+            assert isinstance(mapped._market_prices, np.memmap)
+            prng = random.Random(42)
+            snapshot = None
+            for t in range(300):
+                orders = [
+                    Order(
+                        agent_id=0,
+                        market_id=0,
+                        is_buy=prng.random() < 0.5,
+                        kind=LIMIT_ORDER,
+                        volume=prng.randint(1, 3),
+                        price=float(prng.randint(295, 305)),
+                    )
+                    for _ in range(prng.randint(0, 3))
+                ]
+                for m in markets:
+                    for order in orders:
+                        m._add_order(order=copy.copy(order))
+                        m._execution()
+                    m._update_time(next_fundamental_price=300.0 + t)
+                if t == 100:
+                    snapshot = mapped.snapshot()
+            assert mapped._resident_from > 0
+            for name in ["_executed_volumes", "_cumulative_executed_volumes"]:
+                assert isinstance(getattr(mapped, name), np.memmap)
+            assert mapped.get_market_prices() == memory.get_market_prices()
+            assert mapped.get_executed_volume_sum(
+                start=10
+            ) == memory.get_executed_volume_sum(start=10)
+            assert mapped.stats.realized_vol(window=50) == pytest.approx(
+                memory.stats.realized_vol(window=50)
+            )
+            mapped.flush_histories()
+            histories = load_histories(directory=os.path.join(tmp_dir, "test"))
+            assert len(histories) == 12
+            np.testing.assert_array_equal(
+                histories["market_prices"][: memory.time + 1],
+                memory.get_market_prices_array(),
+            )
+            np.testing.assert_array_equal(
+                histories["n_buy_orders"][: memory.time + 1],
+                memory.get_n_buy_orders_array(),
+            )
+            mapped.restore(snapshot=cast(Dict[str, Any], snapshot))
+            assert isinstance(mapped._market_prices, np.memmap)
+            assert mapped.get_time() == 101
+            assert mapped.get_market_prices() == memory.get_market_prices(range(102))
+            m = self.base_class(
+                market_id=0,
+                prng=random.Random(42),
+                logger=Logger(),
+                simulator=Simulator(prng=random.Random(42)),
+                name="test",
+            )
+            invalid_settings_list: List[Dict[str, Any]] = [
+                {"historyMemoryLimit": 100},
+                {"historyDirectory": tmp_dir, "historyMemoryLimit": 0},
+                {
+                    "historyDirectory": tmp_dir,
+                    "historyRetention": "window",
+                    "historyWindow": 10,
+                },
+            ]
+            for invalid_settings in invalid_settings_list:
+                with pytest.raises(ValueError):
+                    m.setup(
+                        settings={
+                            "tickSize": 1.0,
+                            "marketPrice": 300.0,
+                            **invalid_settings,
+                        }
+                    )
 
     def test_extract_sequential_data_by_time(self) -> None:
         m = self.base_class(
@@ -433,6 +857,301 @@ class TestMarket:
             )
             with pytest.raises(AssertionError):
                 m._add_order(order=order_sell)
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 0.1, "marketPrice": 100.0})
+        m._update_time(next_fundamental_price=100.0)
+        for is_buy, price in [(True, 100.3), (True, 100.25), (False, 100.25)]:
+            m._add_order(
+                order=Order(
+                    agent_id=0,
+                    market_id=0,
+                    is_buy=is_buy,
+                    kind=LIMIT_ORDER,
+                    volume=1,
+                    price=price,
+                )
+            )
+        assert m.n_rounded_prices == 2
+        assert m.buy_order_book._level_keys == [1002, 1003]
+        assert m.sell_order_book._level_keys == [-1003]
+        assert m.buy_order_book.get_price_volume() == {
+            m.convert_to_price(tick_level=1003): 1,
+            m.convert_to_price(tick_level=1002): 1,
+        }
+        m.setup(
+            settings={"tickSize": 0.1, "marketPrice": 100.0, "warnPriceRounding": True}
+        )
+        with pytest.warns(Warning):
+            m._add_order(
+                order=Order(
+                    agent_id=0,
+                    market_id=0,
+                    is_buy=True,
+                    kind=LIMIT_ORDER,
+                    volume=1,
+                    price=100.25,
+                )
+            )
+        assert m.n_rounded_prices == 3
+
+    def test_add_orders(self) -> None:
+        markets: List[Market] = []
+        for _ in range(2):
+            m = self.base_class(
+                market_id=0,
+                prng=random.Random(42),
+                logger=Logger(),
+                simulator=Simulator(prng=random.Random(42)),
+                name="test",
+            )
+            m.setup(settings={"tickSize": 0.1, "marketPrice": 100.0})
+            m._update_time(next_fundamental_price=100.0)
+            markets.append(m)
+        prng = random.Random(42)
+        n_orders = 50
+        is_buy = [prng.random() < 0.5 for _ in range(n_orders)]
+        is_market = [prng.random() < 0.1 for _ in range(n_orders)]
+        prices = [
+            math.nan if market else round(prng.uniform(99.0, 101.0), 2)
+            for market in is_market
+        ]
+        volumes = [prng.randint(1, 5) for _ in range(n_orders)]
+        ttls = [prng.choice([0, 3]) for _ in range(n_orders)]
+        batch = OrderBatch(
+            agent_id=1,
+            market_id=0,
+            is_buy=is_buy,
+            kind=[
+                MARKET_ORDER.kind_id if market else LIMIT_ORDER.kind_id
+                for market in is_market
+            ],
+            volume=volumes,
+            price=prices,
+            ttl=ttls,
+        )
+        for order in batch.to_orders():
+            markets[0]._add_order(order=order)
+        orders = markets[1]._add_orders(batch=batch)
+        assert batch.order_ids is not None
+        assert batch.order_ids.tolist() == list(range(n_orders))
+        assert batch.placed_at == 0
+        assert [order.order_id for order in orders] == list(range(n_orders))
+        assert markets[1]._next_order_id == n_orders
+        assert markets[1].n_rounded_prices == markets[0].n_rounded_prices
+        for attr in ["buy_order_book", "sell_order_book"]:
+            expected = getattr(markets[0], attr)
+            actual = getattr(markets[1], attr)
+            assert actual.get_price_volume() == expected.get_price_volume()
+            assert [
+                (order.order_id, order.price, order.volume, order.ttl)
+                for order in actual._iter_orders()
+            ] == [
+                (order.order_id, order.price, order.volume, order.ttl)
+                for order in expected._iter_orders()
+            ]
+        assert markets[1].get_mid_price() == markets[0].get_mid_price()
+        assert markets[1].get_n_buy_orders() == markets[0].get_n_buy_orders()
+        assert markets[1].get_n_sell_orders() == markets[0].get_n_sell_orders()
+        assert [
+            (log.order_id, log.price)
+            for log in cast(
+                List[OrderLog], cast(Logger, markets[1].logger).pending_logs
+            )
+        ] == [
+            (log.order_id, log.price)
+            for log in cast(
+                List[OrderLog], cast(Logger, markets[0].logger).pending_logs
+            )
+        ]
+        np.testing.assert_array_equal(
+            batch.price,
+            [math.nan if order.price is None else order.price for order in orders],
+        )
+        with pytest.raises(ValueError):
+            markets[1]._add_orders(batch=batch)
+        batch = OrderBatch(
+            agent_id=1, market_id=1, is_buy=True, kind=LIMIT_ORDER, volume=1, price=1.0
+        )
+        with pytest.raises(ValueError):
+            markets[1]._add_orders(batch=batch)
+        markets[1].setup(
+            settings={"tickSize": 0.1, "marketPrice": 100.0, "warnPriceRounding": True}
+        )
+        batch = OrderBatch(
+            agent_id=1,
+            market_id=0,
+            is_buy=[True, False],
+            kind=LIMIT_ORDER,
+            volume=1,
+            price=[100.25, 100.25],
+        )
+        n_rounded_prices = markets[1].n_rounded_prices
+        with pytest.warns(Warning):
+            orders = markets[1]._add_orders(batch=batch)
+        assert markets[1].n_rounded_prices == n_rounded_prices + 2
+        assert [order.price for order in orders] == [
+            markets[1].convert_to_price(tick_level=1002),
+            markets[1].convert_to_price(tick_level=1003),
+        ]
+
+    def test_snapshot(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=None,
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0})
+        m._is_running = True
+
+        def step(prng: random.Random) -> None:
+            m._update_time(next_fundamental_price=300.0 + prng.random())
+            for _ in range(prng.randint(0, 4)):
+                m._add_order(
+                    order=Order(
+                        agent_id=0,
+                        market_id=0,
+                        is_buy=prng.random() < 0.5,
+                        kind=LIMIT_ORDER,
+                        volume=prng.randint(1, 3),
+                        price=float(prng.randint(295, 305)),
+                        ttl=prng.randint(1, 20),
+                    )
+                )
+                m._execution()
+
+        prng = random.Random(42)
+        for _ in range(30):
+            step(prng=prng)
+        m.stats.ema(span=5)
+        snapshot = m.snapshot()
+        assert not snapshot["histories"]["_market_prices"].flags.writeable
+        state = prng.getstate()
+        for _ in range(50):
+            step(prng=prng)
+        expected = (
+            m.get_market_prices(),
+            m.get_executed_volumes(),
+            m.get_n_buy_order_sum(),
+            m.buy_order_book.get_price_volume(),
+            m.sell_order_book.get_price_volume(),
+            m._next_order_id,
+            m.stats.ema(span=5),
+            m.get_last_executed_price(),
+        )
+        for _ in range(2):
+            m.restore(snapshot=snapshot)
+            assert m.time == 29
+            assert len(m.get_market_prices()) == 30
+            assert m._executed_volumes[30:].sum() == 0
+            prng.setstate(state)
+            for _ in range(50):
+                step(prng=prng)
+            assert (
+                m.get_market_prices(),
+                m.get_executed_volumes(),
+                m.get_n_buy_order_sum(),
+                m.buy_order_book.get_price_volume(),
+                m.sell_order_book.get_price_volume(),
+                m._next_order_id,
+                m.stats.ema(span=5),
+                m.get_last_executed_price(),
+            ) == expected
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=None,
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0})
+        m.restore(snapshot=snapshot)
+        assert m.time == 29
+        assert m.get_market_price() == snapshot["histories"]["_market_prices"][29]
+
+    def test_refresh_prices(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0})
+        m._update_time(next_fundamental_price=300.0)
+        m._is_running = True
+        orders = [
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=is_buy,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=price,
+            )
+            for is_buy, price in [(True, 297.0), (False, 305.0), (True, 299.0)]
+        ]
+        for order in orders:
+            m._add_order(order=order)
+        assert m._is_price_stale
+        with mock.patch.object(
+            m, "_update_market_price", wraps=m._update_market_price
+        ) as update:
+            assert m.get_mid_price() == 302.0
+            assert m.get_market_price() == 302.0
+            assert m.get_mid_prices_array()[-1] == 302.0
+            assert update.call_count == 1
+        assert not m._is_price_stale
+        # the market price keeps the last mid price before the sell side becomes empty
+        m._add_order(
+            order=Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=False,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=303.0,
+            )
+        )
+        best_sell_order = cast(Order, m.sell_order_book.get_best_order())
+        assert best_sell_order.price == 303.0
+        m._cancel_order(cancel=Cancel(order=orders[1]))
+        m._cancel_order(cancel=Cancel(order=best_sell_order))
+        assert m.get_mid_price() is None
+        assert m.get_market_price() == 301.0
+        m._add_order(
+            order=Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=False,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=301.0,
+            )
+        )
+        m._is_running = False
+        assert not m._is_price_stale
+        assert m.get_market_price() == 300.0
+        m._add_order(
+            order=Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=False,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=300.0,
+            )
+        )
+        m._update_time(next_fundamental_price=300.0)
+        assert m.get_mid_price(time=1) == 299.5
+        assert m.get_market_price(time=1) == 300.0
 
     def test_execution(self) -> None:
         random.seed(42)
@@ -801,3 +1520,184 @@ class TestMarket:
             len([log for log in logger.pending_logs if isinstance(log, ExpirationLog)])
             == 2
         )
+
+    def test_order_book_class(self) -> None:
+        settings = {"tickSize": 0.01, "marketPrice": 300.0}
+        markets = []
+        for order_book_class in [None, "PriceLevelOrderBook"]:
+            market = self.base_class(
+                market_id=0,
+                prng=random.Random(42),
+                logger=Logger(),
+                simulator=Simulator(prng=random.Random(42)),
+                name="test",
+            )
+            if order_book_class is not None:
+                market.setup(settings={**settings, "orderBookClass": order_book_class})
+                assert isinstance(market.buy_order_book, PriceLevelOrderBook)
+                assert isinstance(market.sell_order_book, PriceLevelOrderBook)
+            else:
+                market.setup(settings=settings)
+            market._update_time(next_fundamental_price=300.0)
+            market._is_running = True
+            markets.append(market)
+        market = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        with pytest.raises(ValueError):
+            market.setup(settings={**settings, "orderBookClass": "Order"})
+        prng = random.Random(42)
+        for _ in range(2000):
+            kind = LIMIT_ORDER if prng.random() < 0.8 else MARKET_ORDER
+            price = (
+                290.0 + prng.randint(0, 2000) * 0.01 if kind == LIMIT_ORDER else None
+            )
+            ttl = prng.randint(1, 10) if prng.random() < 0.5 else None
+            is_buy = prng.random() < 0.5
+            volume = prng.randint(1, 5)
+            results = []
+            for market in markets:
+                order = Order(
+                    agent_id=0,
+                    market_id=0,
+                    is_buy=is_buy,
+                    kind=kind,
+                    volume=volume,
+                    price=price,
+                    ttl=ttl,
+                )
+                market._add_order(order=order)
+                logs = market._execution()
+                results.append(
+                    (
+                        [
+                            (log.buy_order_id, log.sell_order_id, log.price, log.volume)
+                            for log in logs
+                        ],
+                        market.get_buy_order_book(),
+                        market.get_sell_order_book(),
+                        market.get_mid_price(),
+                    )
+                )
+                market._update_time(next_fundamental_price=300.0)
+            assert results[0] == results[1]
+        with pytest.raises(AssertionError):
+            markets[1].setup(settings={**settings, "orderBookClass": "OrderBook"})
+
+    def test_get_order(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m._update_time(next_fundamental_price=1.0)
+        m._is_running = True
+        buy_order = Order(
+            agent_id=0, market_id=0, is_buy=True, kind=LIMIT_ORDER, volume=2, price=1.0
+        )
+        m._add_order(order=buy_order)
+        sell_order = Order(
+            agent_id=0, market_id=0, is_buy=False, kind=LIMIT_ORDER, volume=1, price=2.0
+        )
+        m._add_order(order=sell_order)
+        assert m.get_order(order_id=0) is buy_order
+        assert m.get_order(order_id=1) is sell_order
+        assert m.get_order(order_id=2) is None
+        m._cancel_order(cancel=Cancel(order=sell_order))
+        assert m.get_order(order_id=1) is None
+        sell_order = Order(
+            agent_id=0, market_id=0, is_buy=False, kind=MARKET_ORDER, volume=1
+        )
+        m._add_order(order=sell_order)
+        m._execution()
+        assert m.get_order(order_id=0) is buy_order
+        assert m.get_order(order_id=2) is None
+
+    def test_change_fundamental_price(self) -> None:
+        sim = Simulator(prng=random.Random(42))
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=sim,
+            name="test",
+        )
+        m.setup(settings={"tickSize": 0.01, "marketPrice": 300.0})
+        sim.fundamentals.add_market(
+            market_id=0, initial=300.0, drift=0.0, volatility=0.01
+        )
+        expected = sim.fundamentals.get_fundamental_prices(
+            market_id=0, times=range(200)
+        ).copy()
+        for t in range(20):
+            m._update_time(
+                next_fundamental_price=sim.fundamentals.get_fundamental_price(
+                    market_id=0, time=t
+                )
+            )
+            if t >= 10:
+                m.change_fundamental_price(scale=1.01)
+        generated_until = sim.fundamentals._generated_until
+        assert m.get_fundamental_prices()[:10] == expected[:10].tolist()
+        assert m.get_fundamental_prices()[10:] == pytest.approx(
+            (expected[10:20] * 1.01 ** np.arange(1, 11)).tolist()
+        )
+        assert sim.fundamentals.get_fundamental_prices(
+            market_id=0, times=range(20, 200)
+        ).tolist() == pytest.approx((expected[20:] * 1.01**10).tolist())
+        assert sim.fundamentals._generated_until == generated_until
+
+    def test_get_depth(self) -> None:
+        m = self.base_class(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m._update_time(next_fundamental_price=10.0)
+        for is_buy, price, volume in [
+            (True, 9.0, 1),
+            (True, 8.0, 2),
+            (True, 9.0, 3),
+            (False, 11.0, 4),
+        ]:
+            m._add_order(
+                order=Order(
+                    agent_id=0,
+                    market_id=0,
+                    is_buy=is_buy,
+                    kind=LIMIT_ORDER,
+                    volume=volume,
+                    price=price,
+                )
+            )
+        m._add_order(
+            order=Order(
+                agent_id=0, market_id=0, is_buy=True, kind=MARKET_ORDER, volume=5
+            )
+        )
+        np.testing.assert_array_equal(
+            m.get_depth(levels=3, is_buy=True), [[9.0, 8.0, np.nan], [4, 2, 0]]
+        )
+        out = np.zeros((2, 1))
+        result = m.get_depth(levels=1, is_buy=False, out=out)
+        assert result is out
+        np.testing.assert_array_equal(out, [[11.0], [4]])
+        with pytest.raises(ValueError):
+            m.get_depth(levels=2, is_buy=False, out=out)
+        snapshot = m.get_l2_snapshot(levels=2)
+        np.testing.assert_array_equal(
+            snapshot, [[[9.0, 8.0], [4, 2]], [[11.0, np.nan], [4, 0]]]
+        )
+        out = np.zeros((2, 2, 2))
+        assert m.get_l2_snapshot(levels=2, out=out) is out
+        np.testing.assert_array_equal(out, snapshot)
+        with pytest.raises(ValueError):
+            m.get_l2_snapshot(levels=3, out=out)
@@ -0,0 +1,96 @@
+import math
+import random
+
+import pytest
+
+from pams import LIMIT_ORDER
+from pams import Market
+from pams import MarketStatistics
+from pams import Order
+from pams import Simulator
+from pams.logs import Logger
+
+
+class TestMarketStatistics:
+    def _create_market(self) -> Market:
+        m = Market(
+            market_id=0,
+            prng=random.Random(42),
+            logger=Logger(),
+            simulator=Simulator(prng=random.Random(42)),
+            name="test",
+        )
+        m.setup(settings={"tickSize": 1.0, "marketPrice": 300.0})
+        m._update_time(next_fundamental_price=300.0)
+        m._is_running = True
+        return m
+
+    def test_init(self) -> None:
+        m = self._create_market()
+        assert isinstance(m.stats, MarketStatistics)
+        assert m.stats.market is m
+
+    def test_statistics(self) -> None:
+        m = self._create_market()
+        prng = random.Random(42)
+        for t in range(100):
+            for _ in range(prng.randint(0, 4)):
+                m._add_order(
+                    order=Order(
+                        agent_id=0,
+                        market_id=0,
+                        is_buy=prng.random() < 0.5,
+                        kind=LIMIT_ORDER,
+                        volume=1,
+                        price=float(prng.randint(290, 310)),
+                    )
+                )
+                m._execution()
+                prices = m.get_market_prices()
+                fundamental_price = m.get_fundamental_price()
+                assert m.stats.fundamental_gap() == math.log(
+                    fundamental_price / prices[-1]
+                )
+                for window in [0, 1, 5, 20]:
+                    if window > t:
+                        with pytest.raises(ValueError):
+                            m.stats.log_return(window=window)
+                        continue
+                    assert m.stats.log_return(window=window) == math.log(
+                        prices[-1] / prices[-1 - window]
+                    )
+                    assert m.stats.mean_log_return(window=window) == pytest.approx(
+                        math.log(prices[-1] / prices[-1 - window]) / max(window, 1)
+                    )
+                    returns = [
+                        math.log(prices[s] / prices[s - 1])
+                        for s in range(t - window + 1, t + 1)
+                    ]
+                    assert m.stats.realized_vol(window=window) == pytest.approx(
+                        math.sqrt(sum(r**2 for r in returns)), abs=1e-12
+                    )
+                for span in [1, 10]:
+                    expected = prices[0]
+                    alpha = 2.0 / (span + 1)
+                    for price in prices[1:]:
+                        expected = alpha * price + (1.0 - alpha) * expected
+                    assert m.stats.ema(span=span) == pytest.approx(expected)
+            m._update_time(next_fundamental_price=300.0 + prng.random())
+        with pytest.raises(ValueError):
+            m.stats.ema(span=0)
+        with pytest.raises(ValueError):
+            m.stats.log_return(window=-1)
+
+    def test_set_time(self) -> None:
+        m = self._create_market()
+        for _ in range(10):
+            m._update_time(next_fundamental_price=300.0)
+        ema = m.stats.ema(span=5)
+        m._set_time(time=50, next_fundamental_price=300.0)
+        assert m.stats.log_return(window=40) == 0.0
+        assert m.stats.realized_vol(window=50) == 0.0
+        assert m.stats.ema(span=5) == ema
+        assert math.isnan(m.stats.log_return(window=20))
+        m._set_time(time=5, next_fundamental_price=301.0)
+        assert m.stats.fundamental_gap() == math.log(301.0 / 300.0)
+        assert m.stats.ema(span=5) == ema
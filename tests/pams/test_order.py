@@ -1,9 +1,11 @@
+import numpy as np
 import pytest
 
 from pams.order import LIMIT_ORDER
 from pams.order import MARKET_ORDER
 from pams.order import Cancel
 from pams.order import Order
+from pams.order import OrderBatch
 from pams.order import OrderKind
 
 
@@ -78,6 +80,9 @@ class TestOrder:
         o.is_canceled = True
         with pytest.raises(AttributeError):
             o.check_system_acceptable(agent_id=0)
+        assert o.priority_key is None
+        with pytest.raises(AttributeError):
+            o.unknown_attribute = 1  # type: ignore
 
     def test_is_expired(self) -> None:
         o = Order(
@@ -326,3 +331,107 @@ class TestCancel:
         c = Cancel(order=o, placed_at=10)
         with pytest.raises(AttributeError):
             c.check_system_acceptable(agent_id=0)
+
+
+class TestOrderBatch:
+    def test__init__(self) -> None:
+        b = OrderBatch(
+            agent_id=1,
+            market_id=0,
+            is_buy=[True, False, True],
+            kind=LIMIT_ORDER,
+            volume=[1, 2, 3],
+            price=[1.0, 2.0, 3.0],
+        )
+        assert len(b) == 3
+        assert b.agent_id.tolist() == [1, 1, 1]
+        assert b.kind_id.tolist() == [LIMIT_ORDER.kind_id] * 3
+        assert b.ttl.tolist() == [0, 0, 0]
+        assert b.order_ids is None
+        assert b.placed_at is None
+        assert (
+            str(b) == "<pams.order.OrderBatch | market=0, n_orders=3, placed_at=None>"
+        )
+        b = OrderBatch(
+            agent_id=[0, 1],
+            market_id=0,
+            is_buy=True,
+            kind=[MARKET_ORDER.kind_id, LIMIT_ORDER.kind_id],
+            volume=1,
+            price=[np.nan, 1.5],
+            ttl=[0, 5],
+        )
+        orders = b.to_orders()
+        assert [order.kind for order in orders] == [MARKET_ORDER, LIMIT_ORDER]
+        assert [order.price for order in orders] == [None, 1.5]
+        assert [order.ttl for order in orders] == [None, 5]
+        assert [order.agent_id for order in orders] == [0, 1]
+        assert all(order.order_id is None for order in orders)
+        with pytest.raises(ValueError):
+            OrderBatch(
+                agent_id=0,
+                market_id=0,
+                is_buy=[],
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=1.0,
+            )
+        with pytest.raises(ValueError):
+            OrderBatch(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=MARKET_ORDER,
+                volume=1,
+                price=1.0,
+            )
+        with pytest.raises(ValueError):
+            OrderBatch(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=[1.0, np.nan],
+            )
+        with pytest.raises(ValueError):
+            OrderBatch(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=[1, 0],
+                price=1.0,
+            )
+        with pytest.raises(ValueError):
+            OrderBatch(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=1.0,
+                ttl=-1,
+            )
+        with pytest.raises(ValueError):
+            OrderBatch(
+                agent_id=0,
+                market_id=0,
+                is_buy=[True, False],
+                kind=LIMIT_ORDER,
+                volume=[1, 2, 3],
+                price=1.0,
+            )
+        with pytest.raises(NotImplementedError):
+            OrderBatch(
+                agent_id=0, market_id=0, is_buy=True, kind=[2], volume=1, price=1.0
+            )
+        with pytest.warns(Warning):
+            OrderBatch(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=-1.0,
+            )
@@ -1,3 +1,11 @@
+import copy
+import pickle
+import random
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import cast
+
 import pytest
 
 from pams import LIMIT_ORDER
@@ -5,18 +13,21 @@ from pams import MARKET_ORDER
 from pams import Cancel
 from pams import Order
 from pams import OrderBook
+from pams import PriceLevelOrderBook
 
 
 class TestOrderBook:
+    base_class = OrderBook
+
     def test_init(self) -> None:
-        ob = OrderBook(is_buy=True)
+        ob = self.base_class(is_buy=True)
         o = Order(agent_id=0, market_id=0, is_buy=True, kind=MARKET_ORDER, volume=1)
         ob.add(o)
         o = Order(agent_id=0, market_id=0, is_buy=False, kind=MARKET_ORDER, volume=1)
         with pytest.raises(ValueError):
             ob.add(o)
         assert len(ob) == 1
-        ob = OrderBook(is_buy=False)
+        ob = self.base_class(is_buy=False)
         o = Order(agent_id=0, market_id=0, is_buy=False, kind=MARKET_ORDER, volume=1)
         c = Cancel(order=o)
         ob.add(o)
@@ -32,11 +43,14 @@ class TestOrderBook:
         assert ob.get_best_price() is None
 
     def test__repr__(self) -> None:
-        ob = OrderBook(is_buy=True)
-        assert str(ob) == "<pams.order_book.OrderBook | is_buy=True>"
+        ob = self.base_class(is_buy=True)
+        assert (
+            str(ob)
+            == f"<{self.base_class.__module__}.{self.base_class.__name__} | is_buy=True>"
+        )
 
     def test_time(self) -> None:
-        ob = OrderBook(is_buy=True)
+        ob = self.base_class(is_buy=True)
         assert ob.time == 0
         ob._set_time(time=10)
         assert ob.time == 10
@@ -44,7 +58,7 @@ class TestOrderBook:
         assert ob.time == 11
 
     def test_get_price_volume(self) -> None:
-        ob = OrderBook(is_buy=True)
+        ob = self.base_class(is_buy=True)
         o = Order(agent_id=0, market_id=0, is_buy=True, kind=MARKET_ORDER, volume=1)
         ob.add(o)
         o = Order(
@@ -60,7 +74,10 @@ class TestOrderBook:
         )
         ob.add(o)
         assert ob.get_price_volume() == {None: 1, 1.1: 2, 1.0: 1}
-        ob = OrderBook(is_buy=False)
+        assert ob.get_best_price() is None
+        assert ob.get_best_limit_price() == 1.1
+        assert ob.get_n_price_levels() == 2
+        ob = self.base_class(is_buy=False)
         o = Order(agent_id=0, market_id=0, is_buy=False, kind=MARKET_ORDER, volume=1)
         ob.add(o)
         o = Order(
@@ -76,9 +93,11 @@ class TestOrderBook:
         )
         ob.add(o)
         assert ob.get_price_volume() == {None: 1, 1.0: 1, 1.1: 2}
+        assert ob.get_best_limit_price() == 1.0
+        assert self.base_class(is_buy=False).get_best_limit_price() is None
 
     def test_remove(self) -> None:
-        ob = OrderBook(is_buy=False)
+        ob = self.base_class(is_buy=False)
         o1 = Order(
             agent_id=0,
             market_id=0,
@@ -124,7 +143,7 @@ class TestOrderBook:
             ob._remove(order=o3)
 
     def test_change_order_volume(self) -> None:
-        ob = OrderBook(is_buy=False)
+        ob = self.base_class(is_buy=False)
         o1 = Order(
             agent_id=0,
             market_id=0,
@@ -136,3 +155,296 @@ class TestOrderBook:
         ob.add(o1)
         with pytest.raises(AssertionError):
             ob.change_order_volume(order=o1, delta=-2)
+
+    def test_priority(self) -> None:
+        ob = self.base_class(is_buy=True)
+        orders = [
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=1.0,
+                order_id=0,
+            ),
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=2,
+                price=2.0,
+                order_id=1,
+            ),
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=MARKET_ORDER,
+                volume=3,
+                order_id=2,
+            ),
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=4,
+                price=2.0,
+                order_id=3,
+            ),
+        ]
+        for order in orders:
+            ob.add(order)
+        assert orders[2].priority_key == (0, 0.0, 0, 2)
+        assert orders[1].priority_key == (1, -2.0, 0, 1)
+        assert sorted(orders) == sorted(
+            orders, key=lambda x: cast(tuple, x.priority_key)
+        )
+        assert ob.get_best_order() is orders[2]
+        assert ob.get_best_price() is None
+        assert ob.get_price_volume() == {None: 3, 2.0: 6, 1.0: 1}
+        assert list(ob._iter_orders()) == [orders[2], orders[1], orders[3], orders[0]]
+        assert len(ob) == 4
+        assert ob.get_best_order() is orders[2]
+        ob.change_order_volume(order=orders[2], delta=-3)
+        assert ob.get_best_order() is orders[1]
+        assert ob.get_best_price() == 2.0
+        ob.cancel(Cancel(order=orders[1]))
+        assert len(ob) == 2
+        assert ob.get_best_order() is orders[3]
+        assert ob.get_order(order_id=3) is orders[3]
+        assert ob.get_order(order_id=1) is None
+        assert list(ob._iter_orders()) == [orders[3], orders[0]]
+
+    def test_cancel(self) -> None:
+        ob = self.base_class(is_buy=False)
+        orders = [
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=False,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=1.0 + 0.1 * i,
+                order_id=i,
+                ttl=5,
+            )
+            for i in range(10)
+        ]
+        for order in orders:
+            ob.add(order)
+        for order in orders[1:5]:
+            ob.cancel(Cancel(order=order))
+            assert order.is_canceled
+        assert len(ob) == 6
+        assert ob.get_order(order_id=1) is None
+        assert ob.get_order(order_id=5) is orders[5]
+        assert ob.get_best_order() is orders[0]
+        assert list(ob._iter_orders()) == [orders[0], *orders[5:]]
+        if type(ob) is OrderBook:
+            assert len(ob.priority_queue) == 10
+        ob.cancel(Cancel(order=orders[0]))
+        assert ob.get_best_order() is orders[5]
+        if type(ob) is OrderBook:
+            assert len(ob.priority_queue) == 5
+        ob.cancel(Cancel(order=orders[0]))
+        assert len(ob) == 5
+        ob.cancel(Cancel(order=orders[7]))
+        assert ob.get_price_volume() == {1.5: 1, 1.6: 1, 1.8: 1, 1.9: 1}
+        logs = ob._set_time(time=6)
+        assert [log.order_id for log in logs] == [5, 6, 8, 9]
+        assert len(ob) == 0
+        assert ob.get_best_order() is None
+        assert ob.expire_time_list == {}
+
+    def test_expiration(self) -> None:
+        ob = self.base_class(is_buy=True)
+        orders = [
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=1.0,
+                order_id=i,
+                ttl=ttl,
+            )
+            for i, ttl in enumerate([3, 1, 2, 1, None])
+        ]
+        for order in orders:
+            ob.add(order)
+        assert ob._expiration_times[0] == 1
+        assert sorted(ob.expire_time_list.keys()) == [1, 2, 3]
+        assert ob._set_time(time=1) == []
+        logs = ob._set_time(time=2)
+        assert [log.order_id for log in logs] == [1, 3]
+        assert sorted(ob.expire_time_list.keys()) == [2, 3]
+        assert ob._set_time(time=4, with_logs=False) == []
+        assert ob.expire_time_list == {}
+        assert ob._expiration_times == []
+        assert len(ob) == 1
+        assert ob.get_best_order() is orders[4]
+
+    def test_copy(self) -> None:
+        ob = self.base_class(is_buy=False)
+        orders = [
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=False,
+                kind=MARKET_ORDER if i == 0 else LIMIT_ORDER,
+                volume=1,
+                price=None if i == 0 else 1.0 + 0.1 * (i % 3),
+                order_id=i,
+                ttl=5,
+            )
+            for i in range(6)
+        ]
+        for order in orders:
+            ob.add(order)
+        for ob2 in [copy.deepcopy(ob), pickle.loads(pickle.dumps(ob))]:
+            orders2 = list(ob2._iter_orders())
+            assert [order.order_id for order in orders2] == [
+                order.order_id for order in ob._iter_orders()
+            ]
+            assert all(ob2._contains(order=order) for order in orders2)
+            assert not any(ob2._contains(order=order) for order in orders)
+            ob2.cancel(Cancel(order=orders2[1]))
+            ob2.change_order_volume(order=orders2[0], delta=-1)
+            assert len(ob2) == 4
+            assert len(ob) == 6
+            assert ob2.get_best_order() is orders2[2]
+            assert ob.get_best_order() is orders[0]
+            assert [log.order_id for log in ob2._set_time(time=6)] == [1, 2, 4, 5]
+
+    def test_aggregation(self) -> None:
+        prng = random.Random(42)
+        ob = self.base_class(is_buy=False)
+        live: List[Order] = []
+        for i in range(2000):
+            ob._set_time(time=i // 10)
+            live = [order for order in live if ob._contains(order=order)]
+            action = prng.random()
+            if action < 0.5 or len(live) == 0:
+                is_market = prng.random() < 0.1
+                order = Order(
+                    agent_id=0,
+                    market_id=0,
+                    is_buy=False,
+                    kind=MARKET_ORDER if is_market else LIMIT_ORDER,
+                    volume=prng.randint(1, 5),
+                    price=None if is_market else prng.randint(90, 110) * 0.5,
+                    order_id=i,
+                    ttl=prng.randint(1, 10) if prng.random() < 0.5 else None,
+                )
+                ob.add(order)
+                live.append(order)
+            elif action < 0.75:
+                order = prng.choice(live)
+                ob.cancel(Cancel(order=order))
+            else:
+                order = prng.choice(live)
+                ob.change_order_volume(
+                    order=order, delta=-prng.randint(1, order.volume)
+                )
+            live = [order for order in live if ob._contains(order=order)]
+            expected_volumes: Dict[Optional[float], int] = {}
+            expected_counts: Dict[Optional[float], int] = {}
+            for order in live:
+                expected_volumes[order.price] = (
+                    expected_volumes.get(order.price, 0) + order.volume
+                )
+                expected_counts[order.price] = expected_counts.get(order.price, 0) + 1
+            keys = sorted(
+                expected_volumes.keys(), key=lambda x: -1.0 if x is None else x
+            )
+            assert list(ob.get_price_volume().items()) == [
+                (key, expected_volumes[key]) for key in keys
+            ]
+            assert ob.get_price_n_orders() == expected_counts
+            assert ob.get_market_order_volume() == expected_volumes.get(None, 0)
+            assert len(ob) == len(live)
+
+    def test_level_changes(self) -> None:
+        ob = self.base_class(is_buy=True)
+        with pytest.raises(AssertionError):
+            ob._pop_level_changes()
+        ob._track_level_changes()
+        orders = [
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=True,
+                kind=LIMIT_ORDER if price is not None else MARKET_ORDER,
+                volume=volume,
+                price=price,
+                order_id=i,
+                ttl=1 if i == 3 else None,
+            )
+            for i, (price, volume) in enumerate(
+                [(1.0, 1), (1.0, 2), (None, 3), (1.1, 4), (1.2, 5)]
+            )
+        ]
+        for order in orders[:4]:
+            ob.add(order)
+        assert sorted(ob._pop_level_changes(), key=str) == [
+            (1.0, 3),
+            (1.1, 4),
+            (None, 3),
+        ]
+        assert ob._pop_level_changes() == []
+        ob.add(orders[4])
+        ob.cancel(Cancel(order=orders[4]))
+        ob.change_order_volume(order=orders[0], delta=1)
+        ob.change_order_volume(order=orders[0], delta=-1)
+        assert ob._pop_level_changes() == []
+        ob.change_order_volume(order=orders[1], delta=-1)
+        ob.cancel(Cancel(order=orders[2]))
+        ob._set_time(time=2)
+        assert sorted(ob._pop_level_changes(), key=str) == [
+            (1.0, 2),
+            (1.1, 0),
+            (None, 0),
+        ]
+        ob2 = self.base_class(is_buy=True)
+        ob2.add(orders[0])
+        assert ob2._level_changes is None
+
+
+class TestPriceLevelOrderBook(TestOrderBook):
+    base_class = PriceLevelOrderBook
+
+    def test_levels(self) -> None:
+        ob = self.base_class(is_buy=False)
+        orders = [
+            Order(
+                agent_id=0,
+                market_id=0,
+                is_buy=False,
+                kind=LIMIT_ORDER,
+                volume=1,
+                price=price,
+                order_id=i,
+            )
+            for i, price in enumerate([1.2, 1.0, 1.1, 1.0])
+        ]
+        for order in orders:
+            ob.add(order)
+        assert ob._level_keys == [-1.2, -1.1, -1.0]
+        assert ob.get_best_order() is orders[1]
+        ob._remove(order=orders[2])
+        assert ob._level_keys == [-1.2, -1.0]
+        ob._remove(order=orders[1])
+        assert ob.get_best_order() is orders[3]
+        ob._remove(order=orders[3])
+        assert ob._level_keys == [-1.2]
+        assert ob.get_best_price() == 1.2
+        with pytest.raises(ValueError):
+            ob._remove(order=orders[3])
+        assert not ob._contains(order=orders[3])
+        ob._remove(order=orders[0])
+        assert ob._level_keys == []
+        assert list(ob._iter_orders()) == []
@@ -1,5 +1,8 @@
+import os
 import random
+import tempfile
 from typing import List
+from typing import Optional
 
 import pytest
 
@@ -20,6 +23,8 @@ from pams.logs import CancelLog
 from pams.logs import ExecutionLog
 from pams.logs import Logger
 from pams.logs import OrderLog
+from pams.runners import SequentialRunner
+from pams.utils import load_histories
 
 
 class TestSimulator:
@@ -378,3 +383,222 @@ class TestSimulator:
         assert event.n_hooked_after_session == 2
         assert event.n_hooked_before_step_for_market == 2
         assert event.n_hooked_after_step_for_market == 2
+
+    def test_snapshot(self) -> None:
+        setting = {
+            "simulation": {
+                "markets": ["Market"],
+                "agents": ["FCNAgents"],
+                "sessions": [
+                    {
+                        "sessionName": 0,
+                        "iterationSteps": 30,
+                        "withOrderPlacement": True,
+                        "withOrderExecution": True,
+                        "withPrint": False,
+                        "events": ["FundamentalPriceShock"],
+                    }
+                ],
+            },
+            "FundamentalPriceShock": {
+                "class": "FundamentalPriceShock",
+                "target": "Market",
+                "triggerTime": 40,
+                "priceChangeRate": -0.1,
+                "shockTimeLength": 2,
+            },
+            "Market": {"class": "Market", "tickSize": 0.01, "marketPrice": 300.0},
+            "FCNAgents": {
+                "class": "FCNAgent",
+                "numAgents": 30,
+                "markets": ["Market"],
+                "assetVolume": 50,
+                "cashAmount": 10000,
+                "fundamentalWeight": {"expon": [1.0]},
+                "chartWeight": {"expon": [0.0]},
+                "noiseWeight": {"expon": [1.0]},
+                "meanReversionTime": {"uniform": [50, 100]},
+                "noiseScale": 0.001,
+                "timeWindowSize": [10, 20],
+                "orderMargin": [0.0, 0.1],
+            },
+        }
+        runner = SequentialRunner(settings=setting, prng=random.Random(42), logger=None)
+        runner._setup()
+        sim = runner.simulator
+        session = sim.sessions[0]
+        sim.current_session = session
+        sim._update_times_on_markets(sim.markets)
+        runner._iterate_market_updates(session=session)
+        snapshot = sim.snapshot()
+        runner_state = runner._prng.getstate()
+
+        def get_state() -> tuple:
+            return (
+                sim.markets[0].get_market_prices(),
+                sim.markets[0].get_fundamental_prices(),
+                sim.markets[0].get_executed_volumes(),
+                sim.markets[0].buy_order_book.get_price_volume(),
+                [(agent.cash_amount, agent.asset_volumes) for agent in sim.agents],
+                [agent.prng.random() for agent in sim.agents],
+            )
+
+        runner._iterate_market_updates(session=session)
+        expected = get_state()
+        for _ in range(2):
+            sim.restore(snapshot=snapshot)
+            runner._prng.setstate(runner_state)
+            assert sim.markets[0].get_time() == 30
+            runner._iterate_market_updates(session=session)
+            assert get_state() == expected
+
+        sim.restore(snapshot=snapshot)
+        runner._prng.setstate(runner_state)
+        event = sim.events[0]
+        assert isinstance(event, FundamentalPriceShock)
+        event.price_change_rate = 0.0
+        runner._iterate_market_updates(session=session)
+        assert get_state()[1][:40] == expected[1][:40]
+        assert get_state()[1][40:] != expected[1][40:]
+
+        sim.restore(snapshot=snapshot)
+        assert event.price_change_rate == -0.1
+        sim.agents.pop()
+        with pytest.raises(ValueError):
+            sim.restore(snapshot=snapshot)
+
+    def test_drop_fundamental_prices(self) -> None:
+        def run(retention: bool) -> SequentialRunner:
+            setting = {
+                "simulation": {
+                    "markets": ["Market"],
+                    "agents": ["FCNAgents"],
+                    "sessions": [
+                        {
+                            "sessionName": 0,
+                            "iterationSteps": 500,
+                            "withOrderPlacement": True,
+                            "withOrderExecution": True,
+                            "withPrint": False,
+                        }
+                    ],
+                },
+                "Market": {
+                    "class": "Market",
+                    "tickSize": 0.01,
+                    "marketPrice": 300.0,
+                    "fundamentalVolatility": 0.001,
+                },
+                "FCNAgents": {
+                    "class": "FCNAgent",
+                    "numAgents": 30,
+                    "markets": ["Market"],
+                    "assetVolume": 50,
+                    "cashAmount": 10000,
+                    "fundamentalWeight": {"expon": [1.0]},
+                    "chartWeight": {"expon": [0.0]},
+                    "noiseWeight": {"expon": [1.0]},
+                    "meanReversionTime": {"uniform": [50, 100]},
+                    "noiseScale": 0.001,
+                    "timeWindowSize": [10, 20],
+                    "orderMargin": [0.0, 0.1],
+                },
+            }
+            if retention:
+                setting["Market"].update(
+                    {"historyRetention": "window", "historyWindow": 30}
+                )
+                setting["FCNAgents"]["fundamentalLookback"] = 0
+            runner = SequentialRunner(
+                settings=setting, prng=random.Random(42), logger=None
+            )
+            runner.main()
+            return runner
+
+        expected = run(retention=False)
+        runner = run(retention=True)
+        fundamentals = runner.simulator.fundamentals
+        assert expected.simulator.fundamentals.prices_offset == 0
+        assert fundamentals.prices_offset > 0
+        assert len(fundamentals.prices[0]) < 500
+        market = runner.simulator.markets[0]
+        expected_market = expected.simulator.markets[0]
+        assert market.get_time() == expected_market.get_time()
+        times = range(market.get_time() - 30, market.get_time() + 1)
+        assert market.get_market_prices(times) == expected_market.get_market_prices(
+            times
+        )
+        assert market.get_fundamental_prices(
+            times
+        ) == expected_market.get_fundamental_prices(times)
+        with pytest.raises(ValueError):
+            fundamentals.get_fundamental_price(market_id=0, time=0)
+
+    def test_flush_histories(self) -> None:
+        def run(history_directory: Optional[str]) -> SequentialRunner:
+            setting = {
+                "simulation": {
+                    "markets": ["Market"],
+                    "agents": ["FCNAgents"],
+                    "sessions": [
+                        {
+                            "sessionName": 0,
+                            "iterationSteps": 300,
+                            "withOrderPlacement": True,
+                            "withOrderExecution": True,
+                            "withPrint": False,
+                        }
+                    ],
+                },
+                "Market": {
+                    "class": "Market",
+                    "tickSize": 0.01,
+                    "marketPrice": 300.0,
+                    "fundamentalVolatility": 0.001,
+                },
+                "FCNAgents": {
+                    "class": "FCNAgent",
+                    "numAgents": 30,
+                    "markets": ["Market"],
+                    "assetVolume": 50,
+                    "cashAmount": 10000,
+                    "fundamentalWeight": {"expon": [1.0]},
+                    "chartWeight": {"expon": [0.0]},
+                    "noiseWeight": {"expon": [1.0]},
+                    "meanReversionTime": {"uniform": [50, 100]},
+                    "noiseScale": 0.001,
+                    "timeWindowSize": [10, 20],
+                    "orderMargin": [0.0, 0.1],
+                },
+            }
+            if history_directory is not None:
+                setting["simulation"]["historyDirectory"] = history_directory
+                setting["Market"]["historyMemoryLimit"] = 10000
+            runner = SequentialRunner(
+                settings=setting, prng=random.Random(42), logger=None
+            )
+            runner.main()
+            return runner
+
+        expected = run(history_directory=None)
+        expected_market = expected.simulator.markets[0]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            runner = run(history_directory=tmp_dir)
+            assert runner.simulator.fundamentals.prices_offset > 0
+            market_histories = load_histories(directory=os.path.join(tmp_dir, "Market"))
+            n_steps = expected_market.get_time() + 1
+            assert (
+                market_histories["market_prices"][:n_steps].tolist()
+                == expected_market.get_market_prices()
+            )
+            assert (
+                market_histories["fundamental_prices"][:n_steps].tolist()
+                == expected_market.get_fundamental_prices()
+            )
+            fundamental_histories = load_histories(
+                directory=os.path.join(tmp_dir, "fundamentals")
+            )
+            assert (
+                fundamental_histories["prices_0"][:n_steps].tolist()
+                == expected.simulator.fundamentals.prices[0][:n_steps].tolist()
+            )
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+from pams.utils import load_histories
+from pams.utils.memmap import extend_memmap
+from pams.utils.memmap import remap_memmap
+
+
+def test_extend_memmap() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "values.npy")
+        values = extend_memmap(
+            path=path, values=np.array([1.0, 2.0]), length=4, fill_value=np.nan
+        )
+        assert isinstance(values, np.memmap)
+        np.testing.assert_array_equal(values, [1.0, 2.0, np.nan, np.nan])
+        values[2] = 3.0
+        assert (
+            extend_memmap(path=path, values=values, length=3, fill_value=0.0) is values
+        )
+        extended = extend_memmap(path=path, values=values, length=6, fill_value=0.0)
+        np.testing.assert_array_equal(extended, [1.0, 2.0, 3.0, np.nan, 0.0, 0.0])
+        np.testing.assert_array_equal(np.load(path), extended)
+        assert os.listdir(tmp_dir) == ["values.npy"]
+
+        counts = extend_memmap(
+            path=os.path.join(tmp_dir, "counts.npy"),
+            values=np.empty(0, dtype=np.int64),
+            length=3,
+            fill_value=0,
+        )
+        assert counts.dtype == np.int64
+        np.testing.assert_array_equal(counts, [0, 0, 0])
+
+
+def test_remap_memmap() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "values.npy")
+        values = extend_memmap(path=path, values=np.zeros(3), length=3, fill_value=0.0)
+        values[1] = 1.0
+        remapped = remap_memmap(values=values)
+        assert remapped is not values
+        np.testing.assert_array_equal(remapped, [0.0, 1.0, 0.0])
+        remapped[2] = 2.0
+        remapped.flush()
+        np.testing.assert_array_equal(np.load(path), [0.0, 1.0, 2.0])
+        with pytest.raises(ValueError):
+            remap_memmap(values=np.zeros(3))
+
+
+def test_load_histories() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        values = extend_memmap(
+            path=os.path.join(tmp_dir, "a.npy"),
+            values=np.arange(3.0),
+            length=3,
+            fill_value=0.0,
+        )
+        values.flush()
+        np.save(os.path.join(tmp_dir, "b.npy"), np.arange(2))
+        with open(os.path.join(tmp_dir, "c.txt"), "w") as f:
+            f.write("not a history")
+        histories = load_histories(directory=tmp_dir)
+        assert list(histories.keys()) == ["a", "b"]
+        assert isinstance(histories["a"], np.memmap)
+        np.testing.assert_array_equal(histories["a"], [0.0, 1.0, 2.0])
+        with pytest.raises(ValueError):
+            histories["b"][0] = 1
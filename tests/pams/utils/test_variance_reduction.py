@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from pams.utils import antithetic_pairs
+from pams.utils import common_random_number_sets
+
+
+def test_antithetic_pairs() -> None:
+    settings = {"simulation": {"markets": ["Market"]}}
+    pairs = antithetic_pairs(settings=settings, n_pairs=3, prng=random.Random(42))
+    assert len(pairs) == 3
+    for original, mirrored in pairs:
+        assert original["simulation"]["fundamentalSeed"] == (
+            mirrored["simulation"]["fundamentalSeed"]
+        )
+        assert not original["simulation"]["fundamentalAntithetic"]
+        assert mirrored["simulation"]["fundamentalAntithetic"]
+        assert original["simulation"]["markets"] == ["Market"]
+    assert len(set([pair[0]["simulation"]["fundamentalSeed"] for pair in pairs])) == 3
+    assert settings == {"simulation": {"markets": ["Market"]}}
+    with pytest.raises(ValueError):
+        antithetic_pairs(settings={}, n_pairs=1, prng=random.Random(42))
+
+
+def test_common_random_number_sets() -> None:
+    settings_list = [
+        {"simulation": {"markets": ["Market"]}},
+        {"simulation": {"markets": ["Market"], "events": ["PriceLimitRule"]}},
+    ]
+    sets = common_random_number_sets(
+        settings_list=settings_list, n_sets=2, prng=random.Random(42)
+    )
+    assert len(sets) == 2
+    for settings_set in sets:
+        assert len(settings_set) == 2
+        assert settings_set[0]["simulation"]["fundamentalSeed"] == (
+            settings_set[1]["simulation"]["fundamentalSeed"]
+        )
+        assert "events" not in settings_set[0]["simulation"]
+        assert settings_set[1]["simulation"]["events"] == ["PriceLimitRule"]
+        for settings in settings_set:
+            assert not settings["simulation"]["fundamentalAntithetic"]
+    assert "fundamentalSeed" not in settings_list[0]["simulation"]